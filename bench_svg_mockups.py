@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for generate_svg_mockups.py
+
+Scopes:
+  templates  per-template micro-benchmarks of generate_svg_mockup() for all 32 SLIDE_TYPES
+  e2e        main() end-to-end over synthetic slideData at 1x / 1kx / 100kx scale (one deck = 32 slides)
+  io         render_svg_mockup() into different output sinks
+
+Every scenario runs in a fresh subprocess so its peak RSS is its own.
+Results (slides/sec, bytes/sec, peak RSS) are written as JSON; `compare`
+flags regressions against a saved baseline.
+"""
+
+import argparse
+import contextlib
+import gzip
+import io
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Windows: peak RSS is reported as null
+    resource = None
+
+import generate_svg_mockups as gen
+
+RESULTS_NAME = "bench_results.json"
+SCOPES = ("templates", "e2e", "io")
+DEFAULT_SCALES = (1, 1000)          # 100000 (3.2M slides) is opt-in via --scales
+SINKS = ("stringio", "bytesio", "devnull", "text-file", "binary-file", "gzip", "socket", "files")
+
+_WORDS = ("design", "performance", "battery", "display", "camera", "privacy", "silicon", "workflow",
+          "launch", "growth", "revenue", "team", "roadmap", "quality", "customer", "platform")
+
+def peak_rss_kb():
+    """Peak resident set size of this process in KiB (None if unavailable)."""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss  # macOS reports bytes
+
+def _phrase(rng, words):
+    return " ".join(rng.choice(_WORDS) for _ in range(words)).capitalize()
+
+def synthetic_slide(slide_num, rng):
+    """slideData covering every field the generators read, pinned to one template."""
+    items = [{"title": _phrase(rng, 2), "label": _phrase(rng, 2), "value": str(rng.randint(1, 999)),
+              "q": _phrase(rng, 5) + "?", "a": _phrase(rng, 8), "percent": rng.randint(0, 100)}
+             for _ in range(3)]
+    return {
+        "template": slide_num,
+        "title": _phrase(rng, 3),
+        "subhead": _phrase(rng, 6),
+        "text": _phrase(rng, 7),
+        "author": _phrase(rng, 2),
+        "price": f"${rng.randint(1, 9)},{rng.randint(100, 999)}",
+        "items": items,
+        "points": [_phrase(rng, 5)],
+        "steps": [_phrase(rng, 1) for _ in range(3)],
+        "levels": [{"title": _phrase(rng, 1)} for _ in range(3)],
+        "milestones": [{"date": str(2020 + i), "label": _phrase(rng, 1)} for i in range(3)],
+        "headers": [_phrase(rng, 1), _phrase(rng, 1)],
+        "rows": [[_phrase(rng, 2), _phrase(rng, 2)]],
+        "stats": [{"label": _phrase(rng, 1), "leftValue": f"+{rng.randint(1, 99)}%",
+                   "rightValue": str(rng.randint(1, 999))} for _ in range(3)],
+    }
+
+def write_synthetic_jsonl(path, decks, seed=0):
+    """Write `decks` synthetic decks (one per line, 32 slides each) and return the slide count."""
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        for _ in range(decks):
+            f.write(json.dumps([synthetic_slide(n, rng) for n in gen.SLIDE_TYPES], ensure_ascii=False))
+            f.write("\n")
+    return decks * len(gen.SLIDE_TYPES)
+
+def _result(slides, nbytes, seconds):
+    return {"slides": slides, "bytes": nbytes, "seconds": round(seconds, 6),
+            "slides_per_sec": round(slides / seconds, 2) if seconds else None,
+            "bytes_per_sec": round(nbytes / seconds, 2) if seconds else None}
+
+def _format(value, spec):
+    """Format a metric, or "n/a" when it could not be measured (None)."""
+    return "n/a" if value is None else format(value, spec)
+
+def _directory_bytes(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, files in os.walk(path) for name in files)
+
+# ============================================================================
+# SCENARIOS (each runs inside its own subprocess)
+# ============================================================================
+
+def bench_templates(repeat=3, min_time=0.2):
+    """Best-of-`repeat` throughput of generate_svg_mockup() per template."""
+    results = {}
+    for slide_num, slide_type in gen.SLIDE_TYPES.items():
+        size = len(gen.generate_svg_mockup(slide_num).encode('utf-8'))  # Warm-up
+        loops = 1
+        while True:  # Grow the loop count until one run takes `min_time`, as timeit.autorange() does
+            start = time.perf_counter()
+            for _ in range(loops):
+                gen.generate_svg_mockup(slide_num)
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+            loops *= 2
+        best = elapsed
+        for _ in range(repeat - 1):
+            start = time.perf_counter()
+            for _ in range(loops):
+                gen.generate_svg_mockup(slide_num)
+            best = min(best, time.perf_counter() - start)
+        results[f"template/{slide_num:03d}_{slide_type}"] = _result(loops, loops * size, best)
+    return results
+
+def bench_e2e(scale, jobs=1):
+    """main() over `scale` synthetic decks, writing SVG files into a temp directory."""
+    with tempfile.TemporaryDirectory(prefix="svg_bench_") as tmp:
+        data_path = os.path.join(tmp, "decks.jsonl")
+        slides = write_synthetic_jsonl(data_path, scale)
+        output_dir = os.path.join(tmp, "out")
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            gen.main(["--data", data_path, "--jsonl", "-o", output_dir, "-j", str(jobs)])
+        elapsed = time.perf_counter() - start
+        return {f"e2e/{scale}x": _result(slides, _directory_bytes(output_dir), elapsed)}
+
+@contextlib.contextmanager
+def _open_sink(name, tmp):
+    """Yield (sink, stored_bytes) for a stream sink; stored_bytes() is read after closing."""
+    path = os.path.join(tmp, "out.svg")
+    if name == "stringio":
+        sink = io.StringIO()
+        yield sink, lambda: len(sink.getvalue().encode('utf-8'))
+    elif name == "bytesio":
+        sink = io.BytesIO()
+        yield sink, lambda: len(sink.getvalue())
+    elif name == "devnull":
+        with open(os.devnull, 'wb') as sink:
+            yield sink, lambda: 0
+    elif name == "text-file":
+        with open(path, 'w', encoding='utf-8') as sink:
+            yield sink, lambda: os.path.getsize(path)
+    elif name == "binary-file":
+        with open(path, 'wb') as sink:
+            yield sink, lambda: os.path.getsize(path)
+    elif name == "gzip":
+        with gzip.open(path + "z", 'wb') as sink:
+            yield sink, lambda: os.path.getsize(path + "z")
+    elif name == "socket":
+        reader, writer = socket.socketpair()
+        received = [0]
+
+        def drain():
+            while chunk := reader.recv(1 << 16):
+                received[0] += len(chunk)
+
+        thread = threading.Thread(target=drain)
+        thread.start()
+        try:
+            yield writer, lambda: received[0]
+        finally:
+            writer.close()
+            thread.join()
+            reader.close()
+    else:
+        raise ValueError(f"unknown sink {name!r}")
+
+def bench_io(sink_name, slides=3200):
+    """render_svg_mockup() of `slides` templates (round-robin) into one sink.
+
+    bytes/sec counts the SVG bytes rendered so sinks compare like for like;
+    `stored_bytes` is what actually reached the sink (compressed for gzip).
+    """
+    nums = list(gen.SLIDE_TYPES)
+    sizes = {n: len(gen.generate_svg_mockup(n).encode('utf-8')) for n in nums}
+    nbytes = sum(sizes[nums[i % len(nums)]] for i in range(slides))
+    with tempfile.TemporaryDirectory(prefix="svg_bench_") as tmp:
+        start = time.perf_counter()
+        if sink_name == "files":
+            for i in range(slides):
+                with open(os.path.join(tmp, f"slide_{i:07d}.svg"), 'w', encoding='utf-8') as f:
+                    gen.render_svg_mockup(nums[i % len(nums)], f)
+            elapsed = time.perf_counter() - start
+            stored = _directory_bytes(tmp)
+        else:
+            with _open_sink(sink_name, tmp) as (sink, stored_bytes):
+                for i in range(slides):
+                    gen.render_svg_mockup(nums[i % len(nums)], sink)
+            elapsed = time.perf_counter() - start
+            stored = stored_bytes()
+    return {f"io/{sink_name}": dict(_result(slides, nbytes, elapsed), stored_bytes=stored)}
+
+def run_scenario(spec):
+    """Run one scenario spec in this process and attach its peak RSS."""
+    scope = spec["scope"]
+    if scope == "templates":
+        results = bench_templates(spec["repeat"])
+    elif scope == "e2e":
+        results = bench_e2e(spec["scale"], spec["jobs"])
+    elif scope == "io":
+        results = bench_io(spec["sink"], spec["slides"])
+    else:
+        raise ValueError(f"unknown scope {scope!r}")
+    rss = peak_rss_kb()
+    for result in results.values():
+        result["peak_rss_kb"] = rss
+    return results
+
+def _spawn(spec):
+    """Run a scenario in a fresh interpreter and return its results."""
+    proc = subprocess.run([sys.executable, os.path.abspath(__file__), "_scenario", json.dumps(spec)],
+                          capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    if proc.returncode:
+        raise RuntimeError(f"scenario {spec} failed:\n{proc.stderr}")
+    return json.loads(proc.stdout)
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+def run_suite(scopes, scales=DEFAULT_SCALES, sinks=SINKS, jobs=1, repeat=3, io_slides=3200):
+    """Run the selected scopes and return the results document."""
+    specs = []
+    if "templates" in scopes:
+        specs.append({"scope": "templates", "repeat": repeat})
+    if "e2e" in scopes:
+        specs.extend({"scope": "e2e", "scale": scale, "jobs": jobs} for scale in scales)
+    if "io" in scopes:
+        specs.extend({"scope": "io", "sink": sink, "slides": io_slides} for sink in sinks)
+    results = {}
+    for spec in specs:
+        label = " ".join(f"{key}={value}" for key, value in spec.items())
+        print(f"  ⏱  {label}", file=sys.stderr)
+        results.update(_spawn(spec))
+    return {
+        "meta": {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                 "revision": _git_revision(), "python": platform.python_version(),
+                 "platform": platform.platform(), "cpu_count": os.cpu_count(), "jobs": jobs},
+        "results": results,
+    }
+
+# ============================================================================
+# COMPARE
+# ============================================================================
+
+def compare_results(baseline, current, threshold=0.10, rss_threshold=0.20):
+    """Yield (name, metric, base, cur, change, regressed) for benchmarks present in both files.
+
+    Throughput regresses when it drops by more than `threshold`; memory
+    when peak RSS grows by more than `rss_threshold`. A metric missing on
+    one side (a zero-length run, no RSS probe) is listed with `change` None
+    and never counts as a regression.
+    """
+    base_results, cur_results = baseline["results"], current["results"]
+    for name in sorted(base_results.keys() & cur_results.keys()):
+        base, cur = base_results[name], cur_results[name]
+        for metric, limit, higher_is_better in (("slides_per_sec", threshold, True),
+                                                ("bytes_per_sec", threshold, True),
+                                                ("peak_rss_kb", rss_threshold, False)):
+            base_value, cur_value = base.get(metric), cur.get(metric)
+            if base_value is None and cur_value is None:
+                continue
+            if not base_value or cur_value is None:
+                yield name, metric, base_value, cur_value, None, False
+                continue
+            change = cur_value / base_value - 1
+            regressed = -change > limit if higher_is_better else change > limit
+            yield name, metric, base_value, cur_value, change, regressed
+
+def print_comparison(rows, fp=sys.stdout):
+    """Print a comparison table and return the number of regressions."""
+    regressions = 0
+    for name, metric, base, cur, change, regressed in rows:
+        regressions += regressed
+        mark = "✗" if regressed else " "
+        print(f"  {mark} {name:<36} {metric:<15} {_format(base, ',.1f'):>14} → {_format(cur, ',.1f'):>14}  "
+              f"{_format(change, '+.1%'):>7}", file=fp)
+    return regressions
+
+def _load(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def parse_args(argv=None):
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(description="Benchmark the SVG mockup generator.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("run", help="run benchmarks and write a JSON results file")
+    run.add_argument("--scope", choices=SCOPES, action="append",
+                     help="scope to run (repeatable; default: all)")
+    run.add_argument("--scales", default=",".join(map(str, DEFAULT_SCALES)),
+                     help="comma-separated e2e scales in decks of 32 slides (default: %(default)s; "
+                          "100000 renders 3.2M files)")
+    run.add_argument("--sinks", default=",".join(SINKS), help="comma-separated io sinks (default: all)")
+    run.add_argument("--io-slides", type=int, default=3200, metavar="N", help="slides per io sink")
+    run.add_argument("--repeat", type=int, default=3, help="best-of repeats for template benchmarks")
+    run.add_argument("-j", "--jobs", type=int, default=1, metavar="N", help="--jobs passed to main() in e2e")
+    run.add_argument("-o", "--output", default=RESULTS_NAME, help="results file (default: %(default)s)")
+    run.add_argument("--baseline", metavar="PATH", help="compare against a baseline after running")
+    run.add_argument("--threshold", type=float, default=0.10,
+                     help="allowed throughput drop before flagging a regression (default: %(default)s)")
+    run.add_argument("--rss-threshold", type=float, default=0.20,
+                     help="allowed peak RSS growth before flagging a regression (default: %(default)s)")
+    cmp = sub.add_parser("compare", help="compare a results file against a baseline")
+    cmp.add_argument("baseline")
+    cmp.add_argument("current", nargs="?", default=RESULTS_NAME)
+    cmp.add_argument("--threshold", type=float, default=0.10)
+    cmp.add_argument("--rss-threshold", type=float, default=0.20)
+    scenario = sub.add_parser("_scenario")  # Internal: one scenario per subprocess
+    scenario.add_argument("spec")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """Run or compare benchmarks; exits 1 when regressions are flagged."""
+    args = parse_args(argv)
+    if args.command == "_scenario":
+        json.dump(run_scenario(json.loads(args.spec)), sys.stdout)
+        return 0
+    if args.command == "run":
+        scales = [int(scale) for scale in args.scales.split(",") if scale]
+        sinks = [sink for sink in args.sinks.split(",") if sink]
+        unknown = set(sinks) - set(SINKS)
+        if unknown:
+            sys.exit(f"error: unknown sink(s) {', '.join(sorted(unknown))} (choose from {', '.join(SINKS)})")
+        print("📊 Running SVG mockup benchmarks...", file=sys.stderr)
+        document = run_suite(args.scope or SCOPES, scales, sinks, args.jobs, args.repeat, args.io_slides)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(document, f, indent=2)
+            f.write("\n")
+        for name, result in document["results"].items():
+            mb_per_sec = None if result["bytes_per_sec"] is None else result["bytes_per_sec"] / 1e6
+            print(f"  {name:<36} {_format(result['slides_per_sec'], ',.1f'):>12} slides/s "
+                  f"{_format(mb_per_sec, ',.2f'):>9} MB/s  {result['peak_rss_kb'] or 0:>8,} KiB")
+        print(f"✨ Wrote {len(document['results'])} results to {args.output}")
+        if not args.baseline:
+            return 0
+        baseline, current = _load(args.baseline), document
+    else:
+        baseline, current = _load(args.baseline), _load(args.current)
+    regressions = print_comparison(compare_results(baseline, current, args.threshold, args.rss_threshold))
+    print(f"{'❌' if regressions else '✅'} {regressions} regression(s) against {args.baseline}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,36 +4,318 @@ SVG Mockup Generator for Apple-like Slide Templates
 Generates minimal SVG mockups (3-4 objects max per slide) based on Apple design principles.
 """
 
-import os
+import argparse
+import ast
+import asyncio
+import base64
+import contextlib
+import cProfile
+import datetime
+import fnmatch
+import functools
+import gzip
+import hashlib
+import heapq
+import importlib.util
+import inspect
+import io
+import itertools
+import json
 import math
+import mmap
+import os
+import pstats
+import re
+import struct
+import sys
+import textwrap
+import time
+import tracemalloc
+import types
+import urllib.parse
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from xml.sax.saxutils import escape
+
+try:
+    import numpy as np
+except ImportError:  # Optional: slideData charts, --validate and --regression
+    np = None
+NUMPY_HINT = "pip install numpy; used by slideData charts, --validate and --regression"
+
+# ============================================================================
+# DESIGN TOKENS (compiled from CONFIG in src/config.js, cached on disk)
+# Importing only reads the cache; main() writes it (see save_token_cache).
+# Without a readable src/config.js the built-in copy (BUILTIN_TOKENS) is used.
+# ============================================================================
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+CONFIG_JS = os.environ.get("SVG_MOCKUPS_CONFIG") or os.path.join(_HERE, "src", "config.js")
+TOKEN_CACHE_PATH = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+                                "svg_mockups", "config_tokens.json")
+TOKEN_CACHE_VERSION = 2
+
+_pending_token_cache = []  # Freshly parsed cache entry, written by save_token_cache()
+
+# Mockup token → (CONFIG path, scale). Slides sizes are given on the 960×540
+# BASE_PX page; the mockups render at twice that (1920×1080).
+SVG_SCALE = 2
+TOKEN_SOURCES = {
+    "CANVAS_WIDTH": ("BASE_PX.W", SVG_SCALE),
+    "CANVAS_HEIGHT": ("BASE_PX.H", SVG_SCALE),
+    "BG_COLOR": ("APPLE_TOKENS.mockupColors.background", None),
+    "TEXT_WHITE": ("APPLE_TOKENS.mockupColors.text", None),
+    "TEXT_GRAY": ("APPLE_TOKENS.mockupColors.textSecondary", None),
+    "ACCENT_BLUE": ("APPLE_TOKENS.mockupColors.accent", None),
+    "SURFACE_GRAY": ("APPLE_TOKENS.mockupColors.surface", None),
+    "TEXT_MUTED": ("APPLE_TOKENS.mockupColors.textMuted", None),
+    "ACCENT_GREEN": ("APPLE_TOKENS.mockupColors.positive", None),
+    "ACCENT_ORANGE": ("APPLE_TOKENS.mockupColors.negative", None),
+    "LIGHT_COLORS": ("APPLE_TOKENS.colors.light", None),
+    "SPACING_MD": ("APPLE_TOKENS.spacing.md", SVG_SCALE),
+    "SPACING_LG": ("APPLE_TOKENS.spacing.lg", SVG_SCALE),
+    "SPACING_XL": ("APPLE_TOKENS.spacing.xl", SVG_SCALE),
+    "MARGIN_H_RATIO": ("APPLE_TOKENS.safeMargins.horizontal", None),
+    "MARGIN_V_RATIO": ("APPLE_TOKENS.safeMargins.vertical", None),
+    "FONT_HERO": ("APPLE_TOKENS.mockupTypography.hero", None),
+    "FONT_TITLE": ("APPLE_TOKENS.mockupTypography.title", None),
+    "FONT_BODY": ("APPLE_TOKENS.mockupTypography.body", None),
+    "FONT_CAPTION": ("APPLE_TOKENS.mockupTypography.caption", None),
+    "RADIUS": ("APPLE_TOKENS.cornerRadius.xlarge", None),
+    "LINE_HEIGHT": ("APPLE_TOKENS.lineHeights.normal", None),
+    "LETTER_SPACING": ("APPLE_TOKENS.letterSpacing.tight", None),
+}
+
+# compile_tokens() of the shipped src/config.js, for copies of the script
+# without it (tests/test_tokens.py keeps the two in sync)
+BUILTIN_TOKENS = {
+    "CANVAS_WIDTH": 1920,
+    "CANVAS_HEIGHT": 1080,
+    "BG_COLOR": "#000000",
+    "TEXT_WHITE": "#FFFFFF",
+    "TEXT_GRAY": "#86868B",
+    "ACCENT_BLUE": "#0A84FF",
+    "SURFACE_GRAY": "#333333",
+    "TEXT_MUTED": "#CCCCCC",
+    "ACCENT_GREEN": "#30D158",
+    "ACCENT_ORANGE": "#FF9F0A",
+    "LIGHT_COLORS": {"background": "#FFFFFF", "backgroundSecondary": "#F5F5F7", "backgroundTertiary": "#E8E8ED",
+                     "text": "#1D1D1F", "textSecondary": "#86868B", "textTertiary": "#AEAEB2",
+                     "accent": "#0A84FF", "accentHover": "#0070E0", "border": "#D2D2D7",
+                     "separator": "#E5E5EA", "positive": "#248A3D", "negative": "#C93400"},
+    "SPACING_MD": 64,
+    "SPACING_LG": 96,
+    "SPACING_XL": 128,
+    "MARGIN_H_RATIO": 0.12,
+    "MARGIN_V_RATIO": 0.15,
+    "FONT_HERO": 96,
+    "FONT_TITLE": 64,
+    "FONT_BODY": 32,
+    "FONT_CAPTION": 24,
+    "RADIUS": 24,
+    "LINE_HEIGHT": 1.2,
+    "LETTER_SPACING": -0.5,
+}
+
+_JS_TOKEN_RE = re.compile(r"""
+    (?P<skip>\s+|//[^\n]*|/\*.*?\*/)
+  | (?P<str>'(?:\\.|[^'\\])*'|"(?:\\.|[^"\\])*"|`(?:\\.|[^`\\])*`)
+  | (?P<num>-?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+  | (?P<name>[A-Za-z_$][\w$]*)
+  | (?P<punct>[{}\[\]:,])
+""", re.S | re.X)
+_JS_ESCAPE_RE = re.compile(r"\\(u[0-9A-Fa-f]{4}|x[0-9A-Fa-f]{2}|.)", re.S)
+_JS_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f", "v": "\v", "0": "\0"}
+_JS_LITERALS = {"true": True, "false": False, "null": None, "undefined": None}
+
+def _js_string(token):
+    """Decode a quoted JS string; template literals are kept verbatim (no interpolation)."""
+    body = token[1:-1]
+    if token[0] == "`":
+        return body
+    return _JS_ESCAPE_RE.sub(lambda m: chr(int(m.group(1)[1:], 16)) if m.group(1)[0] in "ux" and len(m.group(1)) > 1
+                             else _JS_ESCAPES.get(m.group(1), m.group(1)), body)
+
+def parse_js_object(source, name="CONFIG"):
+    """Parse the object literal assigned to `const <name>` in a JS source.
+
+    Handles the subset config.js uses: nested objects and arrays, bare or
+    quoted keys, strings, numbers, booleans/null, comments and trailing
+    commas. Raises ValueError for anything else (function calls, spreads).
+    """
+    match = re.search(rf"\b(?:const|let|var)\s+{re.escape(name)}\s*=\s*", source)
+    if match is None:
+        raise ValueError(f"no `const {name} = {{...}}` found")
+    tokens = []
+    pos = match.end()
+    depth = 0
+    while True:
+        m = _JS_TOKEN_RE.match(source, pos)
+        if m is None:
+            raise ValueError(f"unexpected {source[pos:pos + 20]!r} at offset {pos}")
+        pos = m.end()
+        if m.lastgroup == "skip":
+            continue
+        tokens.append((m.lastgroup, m.group()))
+        if m.group() in ("{", "["):
+            depth += 1
+        elif m.group() in ("}", "]"):
+            depth -= 1
+        if depth == 0:
+            break
+    it = iter(tokens)
 
-# Design tokens based on Apple style guide - MINIMAL MODE
-CANVAS_WIDTH = 1920
-CANVAS_HEIGHT = 1080
+    def value(token):
+        kind, text = token
+        if text == "{":
+            obj = {}
+            for kind, text in it:
+                if text == "}":
+                    return obj
+                if text == ",":
+                    continue
+                key = _js_string(text) if kind == "str" else text
+                if next(it)[1] != ":":
+                    raise ValueError(f"expected ':' after key {key!r}")
+                obj[key] = value(next(it))
+            raise ValueError("unterminated object")
+        if text == "[":
+            items = []
+            for token in it:
+                if token[1] == "]":
+                    return items
+                if token[1] != ",":
+                    items.append(value(token))
+            raise ValueError("unterminated array")
+        if kind == "str":
+            return _js_string(text)
+        if kind == "num":
+            number = float(text)
+            return int(number) if number.is_integer() and not any(c in text for c in ".eE") else number
+        if kind == "name" and text in _JS_LITERALS:
+            return _JS_LITERALS[text]
+        raise ValueError(f"unsupported value {text!r} (only literals are read)")
+
+    return value(next(it))
+
+def _freeze(value):
+    """Read-only copy: dicts become mappingproxies, lists become tuples."""
+    if isinstance(value, dict):
+        return types.MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+def _config_value(config, path):
+    value = config
+    for key in path.split("."):
+        try:
+            value = value[key]
+        except (KeyError, TypeError):
+            raise KeyError(f"CONFIG.{path} is missing from {CONFIG_JS}") from None
+    return value
+
+def compile_tokens(config):
+    """Mockup tokens (TOKEN_SOURCES names → values) from a parsed CONFIG."""
+    tokens = {}
+    for name, (path, scale) in TOKEN_SOURCES.items():
+        value = _config_value(config, path)
+        tokens[name] = value * scale if scale else value
+    return tokens
+
+def _read_token_cache():
+    try:
+        with open(TOKEN_CACHE_PATH, encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if cache.get("version") != TOKEN_CACHE_VERSION or cache.get("source") != CONFIG_JS:
+        return None
+    return cache
+
+def _write_token_cache(cache):
+    """Atomically replace the cache; unwritable locations are ignored."""
+    tmp = f"{TOKEN_CACHE_PATH}.{os.getpid()}.tmp"  # Parallel runs never share a temp file
+    try:
+        os.makedirs(os.path.dirname(TOKEN_CACHE_PATH), exist_ok=True)
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, ensure_ascii=False, sort_keys=True)
+        os.replace(tmp, TOKEN_CACHE_PATH)
+    except OSError:
+        with contextlib.suppress(OSError):
+            os.remove(tmp)
+
+def load_config_tokens():
+    """Parse CONFIG from src/config.js, or reuse the on-disk cache.
+
+    The cache is keyed by the file's mtime/size (checked without reading
+    it) and its SHA-256 (checked when the mtime moved, e.g. after a
+    checkout), so only a real content change pays for the parse. Nothing
+    is written here: an updated entry waits for save_token_cache().
+    Tokens are compiled from the cached CONFIG on every load, so edits to
+    TOKEN_SOURCES apply without invalidating the cache. If CONFIG_JS cannot
+    be read, a warning is printed and BUILTIN_TOKENS (with an empty CONFIG)
+    are used instead.
+    Returns (frozen CONFIG, frozen mockup tokens).
+    """
+    try:
+        st = os.stat(CONFIG_JS)
+    except OSError as e:
+        print(f"  ⚠ cannot read {CONFIG_JS} ({e.strerror}); using the built-in design tokens", file=sys.stderr)
+        return _freeze({}), _freeze(BUILTIN_TOKENS)
+    stamp = [st.st_mtime_ns, st.st_size]
+    cache = _read_token_cache()
+    if cache is None or cache.get("stamp") != stamp:
+        with open(CONFIG_JS, 'rb') as f:
+            raw = f.read()
+        digest = hashlib.sha256(raw).hexdigest()
+        if cache is None or cache.get("sha256") != digest:
+            config = parse_js_object(raw.decode('utf-8'))
+            cache = {"version": TOKEN_CACHE_VERSION, "source": CONFIG_JS, "sha256": digest, "config": config}
+        cache["stamp"] = stamp
+        _pending_token_cache[:] = [cache]
+    return _freeze(cache["config"]), _freeze(compile_tokens(cache["config"]))
+
+def save_token_cache():
+    """Write the cache entry load_config_tokens() re-parsed, if any (called from main())."""
+    if _pending_token_cache:
+        _write_token_cache(_pending_token_cache.pop())
+
+CONFIG_TOKENS, DESIGN_TOKENS = load_config_tokens()
+
+# Design tokens based on Apple style guide - MINIMAL MODE (values from src/config.js)
+CANVAS_WIDTH = DESIGN_TOKENS["CANVAS_WIDTH"]        # 1920
+CANVAS_HEIGHT = DESIGN_TOKENS["CANVAS_HEIGHT"]      # 1080
 
 # Color palette (limited to 3 colors per slide)
-BG_COLOR = "#000000"           # Pure black background
-TEXT_WHITE = "#FFFFFF"         # Primary text
-TEXT_GRAY = "#86868B"          # Secondary text
-ACCENT_BLUE = "#0A84FF"        # Apple Blue (only for emphasis)
+BG_COLOR = DESIGN_TOKENS["BG_COLOR"]                # Pure black background
+TEXT_WHITE = DESIGN_TOKENS["TEXT_WHITE"]            # Primary text
+TEXT_GRAY = DESIGN_TOKENS["TEXT_GRAY"]              # Secondary text
+ACCENT_BLUE = DESIGN_TOKENS["ACCENT_BLUE"]          # Apple Blue (only for emphasis)
+SURFACE_GRAY = DESIGN_TOKENS["SURFACE_GRAY"]        # De-emphasized panel
+TEXT_MUTED = DESIGN_TOKENS["TEXT_MUTED"]            # Text on a surface panel
+ACCENT_GREEN = DESIGN_TOKENS["ACCENT_GREEN"]        # Positive stat
+ACCENT_ORANGE = DESIGN_TOKENS["ACCENT_ORANGE"]      # Negative stat
 
 # Spacing (doubled for generous whitespace)
-SPACING_MD = 64                # Medium spacing (32px → 64px)
-SPACING_LG = 96                # Large spacing (48px → 96px)
-SPACING_XL = 128               # Extra large spacing (64px → 128px)
+SPACING_MD = DESIGN_TOKENS["SPACING_MD"]            # Medium spacing (64px)
+SPACING_LG = DESIGN_TOKENS["SPACING_LG"]            # Large spacing (96px)
+SPACING_XL = DESIGN_TOKENS["SPACING_XL"]            # Extra large spacing (128px)
 
 # Safe margins (12% horizontal, 15% vertical)
-MARGIN_H = int(CANVAS_WIDTH * 0.12)   # 230px
-MARGIN_V = int(CANVAS_HEIGHT * 0.15)  # 162px
+MARGIN_H = int(CANVAS_WIDTH * DESIGN_TOKENS["MARGIN_H_RATIO"])   # 230px
+MARGIN_V = int(CANVAS_HEIGHT * DESIGN_TOKENS["MARGIN_V_RATIO"])  # 162px
+CONTENT_WIDTH = CANVAS_WIDTH - 2 * MARGIN_H  # Text box width inside the margins
 
 # Typography (enlarged)
-FONT_HERO = 96                 # Hero title
-FONT_TITLE = 64                # Section title
-FONT_BODY = 32                 # Body text
-FONT_CAPTION = 24              # Caption text
+FONT_HERO = DESIGN_TOKENS["FONT_HERO"]              # Hero title (96)
+FONT_TITLE = DESIGN_TOKENS["FONT_TITLE"]            # Section title (64)
+FONT_BODY = DESIGN_TOKENS["FONT_BODY"]              # Body text (32)
+FONT_CAPTION = DESIGN_TOKENS["FONT_CAPTION"]        # Caption text (24)
 
 # Minimal corner radius
-RADIUS = 24
+RADIUS = DESIGN_TOKENS["RADIUS"]                    # 24
 
 # Slide type mappings
 SLIDE_TYPES = {
@@ -71,340 +353,1483 @@ SLIDE_TYPES = {
     32: "closing_slide",        # Closing
 }
 
-def create_svg_header():
-    """Create SVG header with proper namespace and viewBox."""
-    return f'''<?xml version="1.0" encoding="UTF-8"?>
-<svg width="{CANVAS_WIDTH}" height="{CANVAS_HEIGHT}" viewBox="0 0 {CANVAS_WIDTH} {CANVAS_HEIGHT}" 
-     xmlns="http://www.w3.org/2000/svg">
-  <defs>
+# Font strategy: "google" (@import Inter from Google Fonts), "system" (system
+# font stack only, no network), "local" (shared @font-face file referenced by
+# `url`) or "embed" (font file `src` inlined once per sprite bundle).
+FONT_OPTIONS = {"strategy": "google", "src": None, "url": None}
+FONT_STRATEGIES = ("google", "system", "local", "embed")
+
+GOOGLE_FONTS_URL = "https://fonts.googleapis.com/css2?family=Inter:wght@400;600;700&amp;display=swap"
+FONT_STACK = "'Inter', 'SF Pro Display', -apple-system, sans-serif"
+SYSTEM_FONT_STACK = "'SF Pro Display', -apple-system, BlinkMacSystemFont, 'Helvetica Neue', Arial, sans-serif"
+
+_FONT_MIME_TYPES = {".woff2": "font/woff2", ".woff": "font/woff", ".ttf": "font/ttf", ".otf": "font/otf"}
+
+def configure_fonts(strategy, src=None, url=None):
+    """Select the font strategy used by create_svg_style().
+
+    `src` is the font file to read; `url` is how SVGs reference it
+    (defaults to `src`).
+    """
+    if strategy not in FONT_STRATEGIES:
+        raise ValueError(f"unknown font strategy {strategy!r}")
+    if strategy in ("local", "embed") and not src:
+        raise ValueError(f"font strategy {strategy!r} needs a font file")
+    FONT_OPTIONS.update(strategy=strategy, src=src, url=(url or src or "").replace(os.sep, "/") or None)
+
+@functools.lru_cache(maxsize=4)
+def _font_data_uri(path):
+    """Read a font file once and return it as a base64 data: URI."""
+    mime = _FONT_MIME_TYPES.get(os.path.splitext(path)[1].lower(), "application/octet-stream")
+    with open(path, 'rb') as f:
+        return f"data:{mime};base64,{base64.b64encode(f.read()).decode('ascii')}"
+
+def create_font_rules(embed=False):
+    """Return (css_prelude, font_family) for the current font strategy.
+
+    The "embed" strategy only inlines the font when `embed` is set (sprite
+    bundles); single-file output references the font file instead.
+    """
+    strategy = FONT_OPTIONS["strategy"]
+    if strategy == "google":
+        return f"      @import url('{GOOGLE_FONTS_URL}');\n", FONT_STACK
+    if strategy == "system":
+        return "", SYSTEM_FONT_STACK
+    url = _font_data_uri(FONT_OPTIONS["src"]) if strategy == "embed" and embed else FONT_OPTIONS["url"]
+    return f"      @font-face {{ font-family: 'Inter'; src: url('{url}'); }}\n", FONT_STACK
+
+def create_svg_style(embed_fonts=False, text_color=TEXT_WHITE, letter_spacing=None):
+    """Create the shared <defs> stylesheet (font rules + text defaults).
+
+    `letter_spacing` (px) defaults to LETTER_SPACING on the design canvas.
+    """
+    if letter_spacing is None:
+        letter_spacing = LETTER_SPACING
+    prelude, family = create_font_rules(embed_fonts)
+    return f'''  <defs>
     <style>
-      @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;600;700&amp;display=swap');
-      text {{
-        font-family: 'Inter', 'SF Pro Display', -apple-system, sans-serif;
-        fill: {TEXT_WHITE};
-        letter-spacing: -0.5px;
+{prelude}      text {{
+        font-family: {family};
+        fill: {text_color};
+        letter-spacing: {letter_spacing}px;
       }}
     </style>
   </defs>
-  <rect width="{CANVAS_WIDTH}" height="{CANVAS_HEIGHT}" fill="{BG_COLOR}"/>
 '''
 
+def create_svg_background(width=CANVAS_WIDTH, height=CANVAS_HEIGHT, color=BG_COLOR):
+    """Create the full-canvas background rectangle."""
+    return f'  <rect width="{width}" height="{height}" fill="{color}"/>\n'
+
+def create_svg_header(width=CANVAS_WIDTH, height=CANVAS_HEIGHT, background=BG_COLOR, text_color=TEXT_WHITE,
+                      letter_spacing=None):
+    """Create SVG header with proper namespace and viewBox (defaults: dark 16:9)."""
+    return f'''<?xml version="1.0" encoding="UTF-8"?>
+<svg width="{width}" height="{height}" viewBox="0 0 {width} {height}" 
+     xmlns="http://www.w3.org/2000/svg">
+''' + create_svg_style(text_color=text_color, letter_spacing=letter_spacing) + create_svg_background(width, height, background)
+
 def create_svg_footer():
     """Create SVG footer."""
     return '</svg>\n'
 
 def create_text(x, y, text, size=FONT_BODY, weight=400, color=TEXT_WHITE, anchor="start"):
-    """Helper to create text element."""
-    return f'  <text x="{x}" y="{y}" font-size="{size}" font-weight="{weight}" fill="{color}" text-anchor="{anchor}">{text}</text>\n'
+    """Helper to create text element (a tuple of lines becomes <tspan> rows)."""
+    if isinstance(text, tuple):
+        dy = f' dy="{LINE_HEIGHT}em"'
+        body = "".join(f'<tspan x="{x}"{dy if i else ""}>{escape(line)}</tspan>' for i, line in enumerate(text))
+    else:
+        body = escape(str(text))
+    return f'  <text x="{x}" y="{y}" font-size="{size}" font-weight="{weight}" fill="{color}" text-anchor="{anchor}">{body}</text>\n'
 
-def create_rect(x, y, w, h, fill=TEXT_GRAY, opacity=0.2, radius=RADIUS):
-    """Helper to create rectangle element."""
-    return f'  <rect x="{x}" y="{y}" width="{w}" height="{h}" rx="{radius}" fill="{fill}" opacity="{opacity}"/>\n'
+def create_rect(x, y, w, h, fill=TEXT_GRAY, opacity=0.2, radius=RADIUS, stroke=None, stroke_width=2):
+    """Helper to create rectangle element (outlined when `stroke` is set)."""
+    svg = f'  <rect x="{x}" y="{y}" width="{w}" height="{h}" rx="{radius}" fill="{fill}"'
+    if opacity is not None:
+        svg += f' opacity="{opacity}"'
+    if stroke:
+        svg += f' stroke="{stroke}" stroke-width="{stroke_width}"'
+    return svg + '/>\n'
 
-def create_line(x1, y1, x2, y2, color=TEXT_GRAY, width=2):
+def create_line(x1, y1, x2, y2, color=TEXT_GRAY, width=2, opacity=None):
     """Helper to create line element."""
-    return f'  <line x1="{x1}" y1="{y1}" x2="{x2}" y2="{y2}" stroke="{color}" stroke-width="{width}"/>\n'
+    svg = f'  <line x1="{x1}" y1="{y1}" x2="{x2}" y2="{y2}" stroke="{color}" stroke-width="{width}"'
+    if opacity is not None:
+        svg += f' opacity="{opacity}"'
+    return svg + '/>\n'
+
+def create_circle(cx, cy, r, fill=ACCENT_BLUE, opacity=None, stroke=None, stroke_width=2):
+    """Helper to create circle element (outlined when `stroke` is set)."""
+    svg = f'  <circle cx="{cx}" cy="{cy}" r="{r}" fill="{fill}"'
+    if opacity is not None:
+        svg += f' opacity="{opacity}"'
+    if stroke:
+        svg += f' stroke="{stroke}" stroke-width="{stroke_width}"'
+    return svg + '/>\n'
+
+def create_path(d, fill=ACCENT_BLUE, opacity=None):
+    """Helper to create path element."""
+    svg = f'  <path d="{d}" fill="{fill}"'
+    if opacity is not None:
+        svg += f' opacity="{opacity}"'
+    return svg + '/>\n'
+
+# ============================================================================
+# TEXT METRICS (glyph advance tables, cached measurement, fit-to-box)
+# ============================================================================
+
+LINE_HEIGHT = DESIGN_TOKENS["LINE_HEIGHT"]          # Line advance for wrapped <tspan> lines, in em
+LETTER_SPACING = DESIGN_TOKENS["LETTER_SPACING"]    # `letter-spacing` in the stylesheet, in px
+ELLIPSIS = "…"
+
+# Inter advances in em by character class (regular weight); anything not
+# listed falls back to the lowercase average, CJK to a full em.
+_GLYPH_CLASSES = (
+    (" ", 0.28),
+    ("iljI|!.,:;'`", 0.27),
+    ("frt()[]{}/\\\"-", 0.36),
+    ("0123456789$%+#", 0.62),
+    ("abcdeghknopqsuvxyz?", 0.56),
+    ("mw", 0.84),
+    ("ABCDEFGHJKLNOPQRSTUVXYZ&", 0.68),
+    ("MW@", 0.92),
+    ("—", 1.0),
+    ("•·", 0.4),
+)
+_DEFAULT_ADVANCE = 0.56
+_WIDE_ADVANCE = 1.0
+
+def _is_wide(char):
+    """True for full-width (CJK, kana, full-width forms) characters."""
+    code = ord(char)
+    return (0x1100 <= code <= 0x115F or 0x2E80 <= code <= 0xA4CF or 0xAC00 <= code <= 0xD7A3
+            or 0xF900 <= code <= 0xFAFF or 0xFE30 <= code <= 0xFE4F or 0xFF00 <= code <= 0xFF60
+            or 0xFFE0 <= code <= 0xFFE6)
+
+@functools.lru_cache(maxsize=16)
+def glyph_advances(weight=400):
+    """Per-weight glyph advance table (em), built once per weight."""
+    factor = 1 + (weight - 400) * 0.00025   # Bolder cuts run slightly wider
+    table = {}
+    for chars, advance in _GLYPH_CLASSES:
+        for char in chars:
+            table[char] = advance * factor
+    return table, _DEFAULT_ADVANCE * factor, _WIDE_ADVANCE
+
+def text_lines(text):
+    """Lines of a Text record's `text` (a str, or a tuple once wrapped)."""
+    return text if isinstance(text, tuple) else (str(text),)
+
+@functools.lru_cache(maxsize=1 << 16)
+def measure_text(text, size=FONT_BODY, weight=400):
+    """Rendered width in px of a single line of text."""
+    if not text:
+        return 0.0
+    table, default, wide = glyph_advances(weight)
+    em = sum(table.get(char) or (wide if _is_wide(char) else default) for char in text)
+    return em * size + LETTER_SPACING * (len(text) - 1)
+
+def _break_units(text):
+    """Split text into wrap units: words (with their trailing space) or single wide glyphs."""
+    units, word = [], ""
+    for char in text:
+        if _is_wide(char):
+            if word:
+                units.append(word)
+                word = ""
+            units.append(char)
+        else:
+            word += char
+            if char == " ":
+                units.append(word)
+                word = ""
+    if word:
+        units.append(word)
+    return units
+
+def _wrap(text, max_width, size, weight):
+    """Greedy line breaking on additive unit widths; returns the list of lines."""
+    lines, line, width = [], "", 0.0
+    for unit in _break_units(text):
+        unit_width = measure_text(unit.rstrip(), size, weight)
+        if line and width + LETTER_SPACING + unit_width > max_width:
+            lines.append(line.rstrip())
+            line, width = "", 0.0
+        if line:
+            width += LETTER_SPACING
+        line += unit
+        width += measure_text(unit, size, weight) if unit.endswith(" ") else unit_width
+    lines.append(line.rstrip())
+    return lines
+
+def _ellipsize(text, max_width, size, weight, truncated=False):
+    """Trim `text` until it fits with a trailing ellipsis (always added when `truncated`)."""
+    if not truncated and measure_text(text, size, weight) <= max_width:
+        return text
+    while text and measure_text(text.rstrip() + ELLIPSIS, size, weight) > max_width:
+        text = text[:-1]
+    return text.rstrip() + ELLIPSIS
+
+@functools.lru_cache(maxsize=1 << 14)
+def fit_text(text, max_width, size=FONT_BODY, weight=400, max_lines=1, min_size=FONT_CAPTION):
+    """Fit text into `max_width` px using at most `max_lines` lines.
+
+    Wraps first, then shrinks the font in 10% steps down to `min_size`, and
+    finally ellipsizes the last line. Returns (size, lines).
+    """
+    min_size = min(min_size, size)
+    while True:
+        lines = _wrap(text, max_width, size, weight) if max_lines > 1 else [text]
+        if len(lines) <= max_lines and all(measure_text(line, size, weight) <= max_width for line in lines):
+            return size, tuple(lines)
+        if size <= min_size:
+            break
+        size = max(min_size, int(size * 0.9))
+    truncated = len(lines) > max_lines
+    lines = lines[:max_lines]
+    last = len(lines) - 1
+    return size, tuple(_ellipsize(line, max_width, size, weight, truncated and i == last)
+                       for i, line in enumerate(lines))
+
+# ============================================================================
+# SCENE IR (slotted element records built by the generators)
+# ============================================================================
+
+class Element:
+    """Base class for scene records.
+
+    Slots are listed in the same order as the matching create_* helper's
+    parameters, so `values()` can be passed straight to a serializer.
+    """
+    __slots__ = ()
+    kind = ""
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+    def values(self):
+        """Field values in slot order."""
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+class Text(Element):
+    __slots__ = ("x", "y", "text", "size", "weight", "fill", "anchor")
+    kind = "text"
+
+class Rect(Element):
+    __slots__ = ("x", "y", "w", "h", "fill", "opacity", "radius", "stroke", "stroke_width")
+    kind = "rect"
+
+class Line(Element):
+    __slots__ = ("x1", "y1", "x2", "y2", "stroke", "stroke_width", "opacity")
+    kind = "line"
+
+class Circle(Element):
+    __slots__ = ("cx", "cy", "r", "fill", "opacity", "stroke", "stroke_width")
+    kind = "circle"
+
+class Path(Element):
+    __slots__ = ("d", "fill", "opacity")
+    kind = "path"
+
+class Scene:
+    """In-memory slide: canvas size plus an ordered list of element records.
+
+    Generators build into a Scene; serializers such as write_svg() turn it
+    into output, and analysis passes can inspect it without parsing XML.
+    """
+    __slots__ = ("width", "height", "elements")
+
+    def __init__(self, width=CANVAS_WIDTH, height=CANVAS_HEIGHT):
+        self.width = width
+        self.height = height
+        self.elements = []
+
+    def __iter__(self):
+        return iter(self.elements)
+
+    def __len__(self):
+        return len(self.elements)
+
+    def text(self, x, y, text, size=FONT_BODY, weight=400, fill=TEXT_WHITE, anchor="start",
+             max_width=None, max_lines=1):
+        """Add a text run; with `max_width` it is wrapped/shrunk to fit (see fit_text)."""
+        if max_width is not None:
+            size, lines = fit_text(str(text), max_width, size, weight, max_lines)
+            text = lines[0] if len(lines) == 1 else lines
+        self.elements.append(Text(x, y, text, size, weight, fill, anchor))
+
+    def rect(self, x, y, w, h, fill=TEXT_GRAY, opacity=0.2, radius=RADIUS, stroke=None, stroke_width=2):
+        self.elements.append(Rect(x, y, w, h, fill, opacity, radius, stroke, stroke_width))
+
+    def line(self, x1, y1, x2, y2, stroke=TEXT_GRAY, stroke_width=2, opacity=None):
+        self.elements.append(Line(x1, y1, x2, y2, stroke, stroke_width, opacity))
+
+    def circle(self, cx, cy, r, fill=ACCENT_BLUE, opacity=None, stroke=None, stroke_width=2):
+        self.elements.append(Circle(cx, cy, r, fill, opacity, stroke, stroke_width))
+
+    def path(self, d, fill=ACCENT_BLUE, opacity=None):
+        self.elements.append(Path(d, fill, opacity))
+
+# Element kind → SVG serializer
+SVG_SERIALIZERS = {
+    "text": create_text,
+    "rect": create_rect,
+    "line": create_line,
+    "circle": create_circle,
+    "path": create_path,
+}
+
+def element_to_svg(element, theme=None):
+    """Serialize one scene record to an SVG fragment (honours OUTPUT_OPTIONS and a Theme)."""
+    precision = OUTPUT_OPTIONS["precision"]
+    values = element.values() if precision is None else _round_values(element, precision)
+    if theme is not None:
+        values = theme.recolor(element.kind, values)
+    serializers = MINIFIED_SERIALIZERS if OUTPUT_OPTIONS["minify"] else SVG_SERIALIZERS
+    return serializers[element.kind](*values)
+
+class SvgWriter:
+    """Buffered SVG emitter that streams fragments straight into a sink.
+
+    The sink may be a text stream (file opened in text mode, io.StringIO),
+    a binary stream (io.BytesIO, gzip.GzipFile, socket.makefile("wb")) or a
+    socket (anything with `sendall`). Fragments are collected until
+    `buffer_size` characters are pending and then written in one call, so
+    no full-document string is ever built.
+    """
+
+    def __init__(self, sink, buffer_size=1 << 16, encoding="utf-8"):
+        self.sink = sink
+        self.buffer_size = buffer_size
+        self.encoding = encoding
+        self._binary = not isinstance(sink, io.TextIOBase)
+        self._send = sink.write if hasattr(sink, "write") else sink.sendall
+        self._pending = []
+        self._size = 0
+
+    def write(self, fragment):
+        """Queue a raw SVG fragment, flushing once the buffer is full."""
+        self._pending.append(fragment)
+        self._size += len(fragment)
+        if self._size >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        """Write all pending fragments to the sink."""
+        if not self._pending:
+            return
+        chunk = "".join(self._pending)
+        self._pending.clear()
+        self._size = 0
+        self._send(chunk.encode(self.encoding) if self._binary else chunk)
+
+    def scene(self, scene, theme=None):
+        """Serialize every element of a Scene (recolored for `theme` if given)."""
+        for element in scene:
+            self.write(element_to_svg(element, theme))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.flush()
+
+# ============================================================================
+# OUTPUT OPTIMIZER (--precision, --minify, --svgz)
+# ============================================================================
+
+# "precision": decimal places kept for coordinates (None = as computed),
+# "minify": compact markup without defaults, "svgz": gzip-compressed files.
+OUTPUT_OPTIONS = {"precision": None, "minify": False, "svgz": False}
+SVGZ_SUFFIX = ".svgz"
+
+_NUMBER_RE = re.compile(r"-?\d+\.\d+")
+_SHORT_COLOR_RE = re.compile(r"^#([0-9A-Fa-f])\1([0-9A-Fa-f])\2([0-9A-Fa-f])\3$")
+
+def configure_output(precision=None, minify=False, svgz=False):
+    """Select coordinate rounding, minified markup and gzip output."""
+    if precision is not None and precision < 0:
+        raise ValueError("precision must be >= 0")
+    OUTPUT_OPTIONS.update(precision=precision, minify=bool(minify), svgz=bool(svgz))
+
+def output_suffix():
+    """File extension for rendered slides."""
+    return SVGZ_SUFFIX if OUTPUT_OPTIONS["svgz"] else ".svg"
+
+def round_number(value, precision):
+    """Round a float to `precision` places; integral results become ints."""
+    if not isinstance(value, float):
+        return value
+    value = round(value, precision)
+    return int(value) if value.is_integer() else value
+
+def _round_path(d, precision):
+    return _NUMBER_RE.sub(lambda m: str(round_number(float(m.group()), precision)), d)
+
+def _round_values(element, precision):
+    """Element values with coordinates rounded (path data included)."""
+    if element.kind == "path":
+        d, fill, opacity = element.values()
+        return _round_path(d, precision), fill, opacity
+    return tuple(round_number(value, precision) for value in element.values())
+
+def _num(value):
+    """Compact number: no trailing '.0' and no leading zero ('0.5' → '.5')."""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    text = str(value)
+    return text.replace("0.", ".", 1) if text.startswith(("0.", "-0.")) else text
+
+def _color(value):
+    """Shorten #RRGGBB to #rgb where possible."""
+    match = _SHORT_COLOR_RE.match(value) if isinstance(value, str) else None
+    return f"#{match.group(1)}{match.group(2)}{match.group(3)}".lower() if match else value
+
+def _attrs(*pairs):
+    """Serialize (name, value, default) triples, skipping None and default values."""
+    out = []
+    for name, value, default in pairs:
+        if value is None or value == default:
+            continue
+        out.append(f' {name}="{_num(value) if isinstance(value, (int, float)) else value}"')
+    return "".join(out)
+
+def _min_text(x, y, text, size=FONT_BODY, weight=400, color=TEXT_WHITE, anchor="start"):
+    # fill falls back to the stylesheet's `text { fill }`, weight/anchor to SVG defaults
+    if isinstance(text, tuple):
+        dy = f' dy="{LINE_HEIGHT}em"'
+        body = "".join(f'<tspan x="{_num(x)}"{dy if i else ""}>{escape(line)}</tspan>' for i, line in enumerate(text))
+    else:
+        body = escape(str(text))
+    attrs = _attrs(("x", x, None), ("y", y, None), ("font-size", size, None), ("font-weight", weight, 400),
+                   ("fill", _color(color), _color(TEXT_WHITE)), ("text-anchor", anchor, "start"))
+    return f'<text{attrs}>{body}</text>'
+
+def _min_rect(x, y, w, h, fill=TEXT_GRAY, opacity=0.2, radius=RADIUS, stroke=None, stroke_width=2):
+    attrs = _attrs(("x", x, 0), ("y", y, 0), ("width", w, None), ("height", h, None), ("rx", radius, 0),
+                   ("fill", _color(fill), None), ("opacity", opacity, 1))
+    if stroke:
+        attrs += _attrs(("stroke", _color(stroke), None), ("stroke-width", stroke_width, 1))
+    return f'<rect{attrs}/>'
+
+def _min_line(x1, y1, x2, y2, color=TEXT_GRAY, width=2, opacity=None):
+    attrs = _attrs(("x1", x1, 0), ("y1", y1, 0), ("x2", x2, 0), ("y2", y2, 0), ("stroke", _color(color), None),
+                   ("stroke-width", width, 1), ("opacity", opacity, 1))
+    return f'<line{attrs}/>'
+
+def _min_circle(cx, cy, r, fill=ACCENT_BLUE, opacity=None, stroke=None, stroke_width=2):
+    attrs = _attrs(("cx", cx, 0), ("cy", cy, 0), ("r", r, None), ("fill", _color(fill), None), ("opacity", opacity, 1))
+    if stroke:
+        attrs += _attrs(("stroke", _color(stroke), None), ("stroke-width", stroke_width, 1))
+    return f'<circle{attrs}/>'
+
+def _min_path(d, fill=ACCENT_BLUE, opacity=None):
+    d = _NUMBER_RE.sub(lambda m: _num(float(m.group())), d)
+    d = re.sub(r"\s*([MLAZHVCQSTmlazhvcqst])\s*", r"\1", d)
+    return f'<path{_attrs(("d", d, None), ("fill", _color(fill), None), ("opacity", opacity, 1))}/>'
+
+# Element kind → minified serializer (same signatures as SVG_SERIALIZERS)
+MINIFIED_SERIALIZERS = {
+    "text": _min_text,
+    "rect": _min_rect,
+    "line": _min_line,
+    "circle": _min_circle,
+    "path": _min_path,
+}
+
+def _min_css(css):
+    return re.sub(r"\s*([{};,])\s*", r"\1", css.strip()).replace(": ", ":")
+
+def create_min_svg_style(embed_fonts=False, text_color=TEXT_WHITE, letter_spacing=None):
+    """Compact <style> element: create_svg_style() without whitespace or <defs>."""
+    prelude, family = create_font_rules(embed_fonts)
+    if letter_spacing is None:
+        letter_spacing = LETTER_SPACING
+    return (f'<style>{_min_css(prelude)}'
+            f'text{{font-family:{_min_css(family)};fill:{_color(text_color).lower()};letter-spacing:{_num(letter_spacing)}px}}'
+            f'</style>')
+
+def create_min_svg_header(width=CANVAS_WIDTH, height=CANVAS_HEIGHT, background=BG_COLOR, text_color=TEXT_WHITE,
+                          letter_spacing=None):
+    """Minified header: no XML declaration, compact stylesheet, background rect."""
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+            f'viewBox="0 0 {width} {height}"><defs>{create_min_svg_style(text_color=text_color, letter_spacing=letter_spacing)}'
+            f'</defs><rect width="{width}" height="{height}" fill="{_color(background)}"/>')
+
+def encode_output(content, filepath):
+    """Bytes to store for `filepath`: gzip (deterministic, mtime 0) for .svgz."""
+    if filepath.endswith(SVGZ_SUFFIX):
+        return gzip.compress(content, compresslevel=9, mtime=0)
+    return content
+
+# ============================================================================
+# THEMES AND CANVASES (--theme, --aspect: templates × themes × aspect ratios)
+# ============================================================================
+
+# Element kind → slot indices holding a paint (fill/stroke) color
+_PAINT_SLOTS = {cls.kind: tuple(i for i, name in enumerate(cls.__slots__) if name in ("fill", "stroke"))
+                for cls in (Text, Rect, Line, Circle, Path)}
+
+class Theme:
+    """Named palette for the token colors the generators draw with.
+
+    Generators keep using the design tokens (BG_COLOR, TEXT_WHITE,
+    TEXT_GRAY, ACCENT_BLUE, SURFACE_GRAY, TEXT_MUTED, ACCENT_GREEN,
+    ACCENT_ORANGE); serialization maps them to the theme's colors, so one
+    Scene renders in every theme. Other colors pass through as-is.
+    """
+    __slots__ = ("name", "background", "text", "secondary", "accent", "surface", "muted", "positive", "negative",
+                 "_palette")
+
+    def __init__(self, name, background, text, secondary, accent, surface, muted, positive, negative):
+        self.name = name
+        self.background = background
+        self.text = text
+        self.secondary = secondary
+        self.accent = accent
+        self.surface = surface
+        self.muted = muted
+        self.positive = positive
+        self.negative = negative
+        self._palette = {BG_COLOR: background, TEXT_WHITE: text, TEXT_GRAY: secondary, ACCENT_BLUE: accent,
+                         SURFACE_GRAY: surface, TEXT_MUTED: muted, ACCENT_GREEN: positive, ACCENT_ORANGE: negative}
+
+    def recolor(self, kind, values):
+        """Element values (slot order) with token colors replaced."""
+        palette = self._palette
+        values = list(values)
+        for i in _PAINT_SLOTS[kind]:
+            values[i] = palette.get(values[i], values[i])
+        return values
+
+    def __repr__(self):
+        return (f"Theme({self.name!r}, {self.background!r}, {self.text!r}, {self.secondary!r}, {self.accent!r}, "
+                f"{self.surface!r}, {self.muted!r}, {self.positive!r}, {self.negative!r})")
+
+class Canvas:
+    """Output page size. Scenes are laid out on the 1920×1080 design canvas
+    and fit() scales them uniformly onto this one, centered.
+
+    Layout and margins are not recomputed per canvas: on other aspect ratios
+    (16:10, 4:3) the 16:9 layout is letterboxed, with background-colored
+    bands above and below it (see `letterboxed`).
+    """
+    __slots__ = ("name", "width", "height")
+
+    def __init__(self, name, width, height):
+        self.name = name
+        self.width = width
+        self.height = height
+
+    @property
+    def letterboxed(self):
+        """True if this canvas's aspect ratio differs from the design canvas's."""
+        return self.width * CANVAS_HEIGHT != self.height * CANVAS_WIDTH
+
+    def fit(self, scene):
+        """The scene scaled and centered onto this canvas (itself if the size already matches)."""
+        if (scene.width, scene.height) == (self.width, self.height):
+            return scene
+        scale = min(self.width / scene.width, self.height / scene.height)
+        dx = (self.width - scene.width * scale) / 2
+        dy = (self.height - scene.height * scale) / 2
+        fitted = Scene(self.width, self.height)
+        fitted.elements = [fit_element(element, scale, dx, dy) for element in scene]
+        return fitted
+
+    def __repr__(self):
+        return f"Canvas({self.name!r}, {self.width!r}, {self.height!r})"
+
+LIGHT_COLORS = DESIGN_TOKENS["LIGHT_COLORS"]
+
+# Palettes from CONFIG.APPLE_TOKENS.colors in src/config.js (see
+# docs/issues/dark_mode_theme_refresh_proposal.md). "dark" is the mockups'
+# own tokens, so its secondary text stays #86868B rather than #98989D. On
+# light slides the surface panel is backgroundTertiary with primary text.
+THEMES = {
+    "dark": Theme("dark", BG_COLOR, TEXT_WHITE, TEXT_GRAY, ACCENT_BLUE, SURFACE_GRAY, TEXT_MUTED, ACCENT_GREEN,
+                  ACCENT_ORANGE),
+    "light": Theme("light", LIGHT_COLORS["background"], LIGHT_COLORS["text"], LIGHT_COLORS["textSecondary"],
+                   LIGHT_COLORS["accent"], LIGHT_COLORS["backgroundTertiary"], LIGHT_COLORS["text"],
+                   LIGHT_COLORS["positive"], LIGHT_COLORS["negative"]),
+}
+CANVASES = {
+    "16x9": Canvas("16x9", CANVAS_WIDTH, CANVAS_HEIGHT),
+    "16x10": Canvas("16x10", 1920, 1200),
+    "4x3": Canvas("4x3", 1440, 1080),
+    "4k": Canvas("4k", 3840, 2160),
+}
+DEFAULT_THEME = "dark"
+DEFAULT_CANVAS = "16x9"
+
+# Absolute path commands → role of each argument: x/y coordinate, l length, - kept
+_PATH_ROLES = {"M": "xy", "L": "xy", "H": "x", "V": "y", "C": "xyxyxy", "S": "xyxy", "Q": "xyxy", "T": "xy",
+               "A": "ll---xy", "Z": ""}
+
+def _scaled(value, scale, offset=0):
+    return round_number(value * scale + offset, 2)
+
+def _fit_path(d, scale, dx, dy):
+    """Absolute path data scaled by `scale` and shifted by (dx, dy)."""
+    out, roles, index = [], "", 0
+    for token in d.replace(",", " ").split():
+        if token in _PATH_ROLES:
+            roles, index = _PATH_ROLES[token], 0
+            out.append(token)
+            continue
+        role = roles[index % len(roles)] if roles else "-"
+        index += 1
+        if role == "-":
+            out.append(token)
+        else:
+            offset = dx if role == "x" else dy if role == "y" else 0
+            out.append(str(_scaled(float(token), scale, offset)))
+    return " ".join(out)
+
+def fit_element(element, scale, dx, dy):
+    """Copy of a scene record scaled by `scale` and shifted by (dx, dy)."""
+    kind = element.kind
+    if kind == "text":
+        x, y, text, size, weight, fill, anchor = element.values()
+        return Text(_scaled(x, scale, dx), _scaled(y, scale, dy), text, _scaled(size, scale), weight, fill, anchor)
+    if kind == "rect":
+        x, y, w, h, fill, opacity, radius, stroke, stroke_width = element.values()
+        return Rect(_scaled(x, scale, dx), _scaled(y, scale, dy), _scaled(w, scale), _scaled(h, scale), fill,
+                    opacity, _scaled(radius, scale), stroke, _scaled(stroke_width, scale))
+    if kind == "line":
+        x1, y1, x2, y2, stroke, stroke_width, opacity = element.values()
+        return Line(_scaled(x1, scale, dx), _scaled(y1, scale, dy), _scaled(x2, scale, dx), _scaled(y2, scale, dy),
+                    stroke, _scaled(stroke_width, scale), opacity)
+    if kind == "circle":
+        cx, cy, r, fill, opacity, stroke, stroke_width = element.values()
+        return Circle(_scaled(cx, scale, dx), _scaled(cy, scale, dy), _scaled(r, scale), fill, opacity, stroke,
+                      _scaled(stroke_width, scale))
+    d, fill, opacity = element.values()
+    return Path(_fit_path(d, scale, dx, dy), fill, opacity)
+
+def theme_header(theme, width, height):
+    """SVG header for a theme and page size, formatted once per font/minify setting."""
+    return _theme_header(theme, width, height, OUTPUT_OPTIONS["minify"], tuple(FONT_OPTIONS.values()))
+
+@functools.lru_cache(maxsize=64)
+def _theme_header(theme, width, height, minify, font_options):
+    header = create_min_svg_header if minify else create_svg_header
+    # Letter-spacing is in px, so it scales with the canvas like the font sizes in Canvas.fit()
+    scale = min(width / CANVAS_WIDTH, height / CANVAS_HEIGHT)
+    return header(width, height, theme.background, theme.text, round_number(LETTER_SPACING * scale, 2))
+
+def select_variants(themes=None, aspects=None):
+    """(themes, canvases) picked by --theme / --aspect.
+
+    Both take comma-separated names or "all"; aspect ratios may be written
+    "16:9" or "16x9". Raises ValueError for unknown names.
+    """
+    def pick(selectors, catalog, default, label):
+        if not selectors:
+            return [catalog[default]]
+        names = [name.strip().replace(":", "x").lower() for name in selectors.split(",") if name.strip()]
+        if "all" in names:
+            return list(catalog.values())
+        unknown = [name for name in names if name not in catalog]
+        if unknown:
+            raise ValueError(f"unknown {label} {unknown[0]!r} (choose from {', '.join(catalog)}, all)")
+        return [catalog[name] for name in dict.fromkeys(names)]
+
+    return pick(themes, THEMES, DEFAULT_THEME, "theme"), pick(aspects, CANVASES, DEFAULT_CANVAS, "aspect ratio")
+
+def variant_name(theme, canvas):
+    """Output subdirectory of one theme × canvas variant ("light_4x3")."""
+    return f"{theme.name}_{canvas.name}"
+
+# ============================================================================
+# SLIDE DATA HELPERS (slideData JSON shared with src/presentation.js)
+# ============================================================================
+
+# slideData `type` → template number (see slideGenerators in src/presentation.js)
+SLIDE_DATA_TYPES = {
+    "title": 1,
+    "imageText": 3,
+    "barCompare": 4,
+    "cards": 5,
+    "diagram": 5,
+    "kpi": 6,
+    "timeline": 8,
+    "compare": 9,
+    "table": 9,
+    "pie": 10,
+    "barChart": 11,
+    "quote": 15,
+    "statsCompare": 17,
+    "section": 19,
+    "content": 20,
+    "process": 21,
+    "processList": 21,
+    "headerCards": 22,
+    "bulletCards": 23,
+    "progress": 24,
+    "cycle": 25,
+    "triangle": 26,
+    "pyramid": 27,
+    "flowChart": 28,
+    "stepUp": 29,
+    "faq": 30,
+    "agenda": 31,
+    "closing": 32,
+}
+
+def _field(data, key, default):
+    """Return a non-empty slideData field as text, or the mockup default."""
+    value = (data or {}).get(key)
+    return default if value in (None, "") else str(value)
+
+def _items(data, key, default, limit=3):
+    """Return up to `limit` entries of a slideData list, or the mockup default."""
+    value = (data or {}).get(key)
+    if isinstance(value, list) and value:
+        return value[:limit]
+    return default
+
+def _label(item, *keys):
+    """Return display text for a slideData item (plain string or object)."""
+    if isinstance(item, dict):
+        for key in keys:
+            if item.get(key) not in (None, ""):
+                return str(item[key])
+        return ""
+    return str(item)
+
+def _number(value, default=0.0):
+    """Parse the numeric part of a value such as "$1,599", "47%" or 12."""
+    if isinstance(value, (int, float)):
+        return float(value) if math.isfinite(value) else default
+    digits = "".join(c for c in str(value or "") if c.isdigit() or c in ".-")
+    try:
+        return float(digits)
+    except ValueError:
+        return default
+
+# Types a slideData list may hold, by field name (other lists: text, numbers or
+# objects). Items of nested lists are text or numbers.
+_ITEM_TYPES = (str, int, float, dict)
+SLIDE_ITEM_TYPES = {
+    "rows": (list,),
+    "columns": (list,),
+    "flows": (dict,),
+    "series": (str, int, float, list, dict, type(None)),
+}
+_JSON_TYPE_NAMES = {dict: "object", list: "array", str: "string", int: "number", float: "number",
+                    bool: "boolean", type(None): "null"}
+
+def _list_error(fields, where=""):
+    for key, value in fields.items():
+        if not isinstance(value, list):
+            continue
+        allowed = SLIDE_ITEM_TYPES.get(key, _ITEM_TYPES)
+        for i, item in enumerate(value):
+            path = f"{where}{key}[{i}]"
+            if not isinstance(item, allowed) or (isinstance(item, list)
+                                                 and not all(isinstance(v, (str, int, float)) for v in item)):
+                return f"{path} has an invalid {_JSON_TYPE_NAMES.get(type(item), 'value')}"
+            if isinstance(item, dict):
+                error = _list_error(item, f"{path}.")
+                if error:
+                    return error
+    return None
+
+def slide_data_error(slide):
+    """Why a slideData entry cannot be rendered (a short message), or None.
+
+    Checked before rendering, so a malformed slide is reported and skipped
+    instead of failing the whole batch.
+    """
+    if not isinstance(slide, dict):
+        return f"slide is a JSON {_JSON_TYPE_NAMES.get(type(slide), 'value')}, not an object"
+    if not isinstance(slide.get("type", ""), str):
+        return f"type is a JSON {_JSON_TYPE_NAMES.get(type(slide['type']), 'value')}, not a string"
+    template_key = slide.get("template")
+    if template_key is not None and (isinstance(template_key, bool) or not isinstance(template_key, (str, int))):
+        return "template must be a number or a type name"
+    return _list_error(slide)
+
+def resolve_slide_num(slide):
+    """Map a slideData entry to a template number, or None if unsupported.
+
+    An explicit `template` key (number or type name, plugins included)
+    overrides `type`.
+    """
+    key = slide.get("template")
+    if key is not None:
+        return find_template(key) if isinstance(key, (str, int)) else None
+    slide_type = slide.get("type")
+    if not isinstance(slide_type, str):
+        return None
+    if slide_type == "content" and (slide.get("twoColumn") or slide.get("columns")):
+        return 2
+    return SLIDE_DATA_TYPES.get(slide_type)
+
+# ============================================================================
+# CHART DATA (real series for the chart templates; geometry via NumPy)
+# Large inputs are reduced before anything is drawn (LTTB downsampling for
+# series, top categories + "Other" for pies), so a chart slide keeps its
+# 3-4 objects and its SVG size no matter how many points the data has.
+# ============================================================================
+
+CHART_MAX_POINTS = 64       # Vertices kept per series after downsampling
+CHART_MAX_BARS = 3          # Longer series are drawn as an area chart
+PIE_MAX_SLICES = 3          # Wedges drawn, "Other" included
+PIE_MIN_SHARE = 0.05        # Smaller categories always go to "Other"
+
+@functools.lru_cache(maxsize=None)
+def _warn_no_numpy():
+    print(f"  ⚠ chart data needs numpy ({NUMPY_HINT}); using mockup charts", file=sys.stderr)
+
+def _x_value(item, index):
+    """x of a series entry: "x", an ISO "date" (as a day ordinal) or the index."""
+    if isinstance(item, dict):
+        if item.get("x") is not None:
+            return _number(item["x"], index)
+        if item.get("date"):
+            try:
+                return float(datetime.date.fromisoformat(str(item["date"])[:10]).toordinal())
+            except ValueError:
+                return float(index)
+    elif isinstance(item, (list, tuple)) and len(item) > 1:
+        return _number(item[0], index)
+    return float(index)
+
+def _y_value(item):
+    """y of a series entry: a number, the last element of a pair or "value"."""
+    if isinstance(item, dict):
+        return _number(item.get("value"), math.nan)
+    if isinstance(item, (list, tuple)):
+        return _number(item[-1], math.nan) if item else math.nan
+    return _number(item, math.nan)
+
+def chart_values(items):
+    """y values of series entries as a float array (NaN if not numeric), or None without NumPy."""
+    if np is None:
+        _warn_no_numpy()
+        return None
+    return np.fromiter((_y_value(item) for item in items), float, len(items))
+
+def chart_series(data, key="series"):
+    """Return (x, y, source) arrays for a slideData series, or None.
+
+    Entries may be numbers, [x, y] pairs or {"value", "x" | "date",
+    "label"} objects. Non-numeric points are dropped and the result is
+    sorted by x; `source` holds each point's index in the original list.
+    None means no usable data (or no NumPy), in which case the caller
+    draws its mockup chart.
+    """
+    items = (data or {}).get(key)
+    if not isinstance(items, list) or not items:
+        return None
+    y = chart_values(items)
+    if y is None:
+        return None
+    x = np.fromiter((_x_value(item, i) for i, item in enumerate(items)), float, len(items))
+    source = np.flatnonzero(np.isfinite(x) & np.isfinite(y))
+    if not len(source):
+        return None
+    source = source[np.argsort(x[source], kind="stable")]
+    return x[source], y[source], source
+
+def lttb(x, y, threshold=CHART_MAX_POINTS):
+    """Indices of a Largest-Triangle-Three-Buckets downsampling of (x, y).
+
+    The first and last points are kept; the rest are split into
+    `threshold - 2` buckets and each contributes the point spanning the
+    largest triangle with the previously kept point and the mean of the
+    next bucket, which preserves peaks and dips. The loop runs once per
+    bucket (constant); the work inside each bucket is vectorized.
+    """
+    n = len(x)
+    if n <= threshold or threshold < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    counts = np.diff(edges)
+    mean_x = np.add.reduceat(x[:n - 1], edges[:-1]) / counts
+    mean_y = np.add.reduceat(y[:n - 1], edges[:-1]) / counts
+    # Each bucket looks ahead to the next bucket's mean (the last one to the final point)
+    next_x = np.append(mean_x[1:], x[-1])
+    next_y = np.append(mean_y[1:], y[-1])
+    picked = np.empty(threshold, dtype=int)
+    picked[0], picked[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        area = np.abs((x[a] - next_x[i]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (next_y[i] - y[a]))
+        a = lo + int(np.argmax(area))
+        picked[i + 1] = a
+    return picked
+
+def area_path(x, y, left, top, width, height):
+    """Closed area-chart path for a series scaled into a plot box.
+
+    Returns (d, end_x, end_y), the end point being the last vertex so a
+    marker can sit on it. y is scaled from 0 (or the minimum, if negative)
+    to the maximum.
+    """
+    floor = min(float(y.min()), 0.0)
+    span_x = float(x[-1] - x[0]) or 1.0
+    span_y = float(y.max()) - floor or 1.0
+    px = np.round(left + (x - x[0]) * (width / span_x), 2)
+    py = np.round(top + height - (y - floor) * (height / span_y), 2)
+    bottom = round(top + height, 2)
+    points = " L ".join(f"{a:g} {b:g}" for a, b in zip(px.tolist(), py.tolist()))
+    d = f"M {px[0]:g} {bottom:g} L {points} L {px[-1]:g} {bottom:g} Z"
+    return d, float(px[-1]), float(py[-1])
+
+def bar_heights(values, extent):
+    """Bar lengths for values scaled so the largest spans `extent` (negatives clip to 0)."""
+    values = np.clip(np.asarray(values, dtype=float), 0, None)
+    peak = values.max() if len(values) else 0.0
+    return np.round(values * (extent / (peak or 1.0)), 2)
+
+def pie_slices(labels, values, max_slices=PIE_MAX_SLICES, min_share=PIE_MIN_SHARE):
+    """Return ([label], fractions) for the largest categories, largest first.
+
+    Categories beyond `max_slices - 1`, or below `min_share` of the total,
+    are bucketed into a trailing "Other" slice. Selection uses a partial
+    sort, so only the kept categories are ordered. Non-numeric values
+    count as 0; None if nothing is positive.
+    """
+    values = np.nan_to_num(np.clip(np.asarray(values, dtype=float), 0, None))
+    total = values.sum()
+    if not total > 0:
+        return None
+    shares = values / total
+    top = np.flatnonzero(shares)
+    if len(top) > max_slices:
+        top = top[np.argpartition(-shares[top], max_slices - 2)[:max_slices - 1]]
+    top = top[np.argsort(-shares[top], kind="stable")]
+    top = top[shares[top] >= min_share]
+    names = [labels[i] for i in top.tolist()]
+    fractions = shares[top]
+    other = 1.0 - fractions.sum()
+    if other > 1e-9:
+        names.append("Other")
+        fractions = np.append(fractions, other)
+    return names, fractions
+
+def wedge_paths(cx, cy, radius, fractions):
+    """Path data for consecutive pie wedges, clockwise from 12 o'clock.
+
+    A single wedge covering the whole pie has no drawable arc; callers
+    draw a circle instead.
+    """
+    ends = np.cumsum(fractions) * (2 * math.pi)
+    starts = np.concatenate(([0.0], ends[:-1]))
+    x0 = np.round(cx + radius * np.sin(starts), 2).tolist()
+    y0 = np.round(cy - radius * np.cos(starts), 2).tolist()
+    x1 = np.round(cx + radius * np.sin(ends), 2).tolist()
+    y1 = np.round(cy - radius * np.cos(ends), 2).tolist()
+    large = (np.asarray(fractions) > 0.5).astype(int).tolist()
+    return [f"M {cx:g} {cy:g} L {a:g} {b:g} A {radius} {radius} 0 {flag} 1 {c:g} {d:g} Z"
+            for a, b, flag, c, d in zip(x0, y0, large, x1, y1)]
+
+def progress_fraction(item, as_of=None):
+    """Completion of a progress item in [0, 1].
+
+    Uses "percent", else "value"/"total", else the elapsed share of the
+    "start".."end" dates at `as_of` (an ISO date; the slide's "asOf").
+    """
+    if not isinstance(item, dict):
+        return 0.0
+    if item.get("percent") is not None:
+        fraction = _number(item["percent"]) / 100
+    elif item.get("total") is not None:
+        fraction = _number(item.get("value")) / (_number(item["total"]) or 1.0)
+    elif item.get("start") and item.get("end") and as_of:
+        try:
+            start, end, now = (datetime.date.fromisoformat(str(v)[:10]).toordinal()
+                               for v in (item["start"], item["end"], as_of))
+        except ValueError:
+            return 0.0
+        fraction = (now - start) / ((end - start) or 1)
+    else:
+        fraction = 0.0
+    return min(max(fraction, 0.0), 1.0)
+
+# ============================================================================
+# TEMPLATE REGISTRY (@template decorator + lazily loaded entry-point plugins)
+# ============================================================================
+
+# Third-party templates are entry points in this group, named "NNN_type"
+# (e.g. "040_sales_funnel = acme_slides.funnel:create_sales_funnel"); the
+# number and type are read from the name, so nothing is imported until a
+# plugin template is actually rendered.
+TEMPLATE_ENTRY_POINT_GROUP = "apple_svg_mockups.templates"
+
+_registry = {}                      # slide_num → (slide_type, generator)
+_PLUGIN_NAME_RE = re.compile(r"^(\d+)_([A-Za-z]\w*)$")
+
+def template(slide_num, slide_type):
+    """Decorator registering a generator as template `slide_num`.
+
+    Built-in numbers must match SLIDE_TYPES; registering a number twice is
+    an error.
+    """
+    def register(generator):
+        if slide_num in _registry:
+            raise ValueError(f"template {slide_num} is already registered as {_registry[slide_num][0]!r}")
+        if SLIDE_TYPES.get(slide_num, slide_type) != slide_type:
+            raise ValueError(f"template {slide_num} is the built-in {SLIDE_TYPES[slide_num]!r}, not {slide_type!r}")
+        _registry[slide_num] = (slide_type, generator)
+        return generator
+    return register
+
+@functools.lru_cache(maxsize=None)
+def _plugin_index():
+    """slide_num → (slide_type, entry point) for installed plugins (metadata only, no imports)."""
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:
+        return {}
+    try:
+        points = entry_points(group=TEMPLATE_ENTRY_POINT_GROUP)
+    except TypeError:  # Python < 3.10
+        points = entry_points().get(TEMPLATE_ENTRY_POINT_GROUP, ())
+    index = {}
+    for point in points:
+        match = _PLUGIN_NAME_RE.match(point.name)
+        if not match:
+            print(f"  ⚠ ignoring template plugin {point.name!r}: name must be NNN_type", file=sys.stderr)
+            continue
+        slide_num = int(match.group(1))
+        if slide_num in SLIDE_TYPES or slide_num in index:
+            print(f"  ⚠ ignoring template plugin {point.name!r}: number {slide_num} is taken", file=sys.stderr)
+            continue
+        index[slide_num] = (match.group(2), point)
+    return index
+
+def available_templates():
+    """Sorted (slide_num, slide_type) of every known template, plugins included."""
+    known = {num: slide_type for num, (slide_type, _) in _registry.items()}
+    for num, (slide_type, _) in _plugin_index().items():
+        known.setdefault(num, slide_type)
+    return sorted(known.items())
+
+def template_type(slide_num):
+    """Type name of a template number (raises ValueError if unknown)."""
+    entry = _registry.get(slide_num) or _plugin_index().get(slide_num)
+    if entry is None:
+        raise ValueError(f"unknown template {slide_num!r}")
+    return entry[0]
+
+def find_template(key):
+    """Template number for 4, '4', '004' or 'bar_compare'; None if unknown."""
+    if isinstance(key, str) and key.isdigit():
+        key = int(key)
+    if isinstance(key, int) and not isinstance(key, bool):
+        return key if key in _registry or key in _plugin_index() else None
+    return next((num for num, slide_type in available_templates() if slide_type == key), None)
+
+def get_generator(slide_num):
+    """Return the generator function for a slide number.
+
+    Plugin templates are imported on first use; unknown numbers raise
+    ValueError instead of falling back to another template.
+    """
+    entry = _registry.get(slide_num)
+    if entry is None:
+        plugin = _plugin_index().get(slide_num)
+        if plugin is None:
+            raise ValueError(f"unknown template {slide_num!r}")
+        slide_type, point = plugin
+        generator = point.load()
+        if slide_num not in _registry:  # The plugin may have used @template itself
+            template(slide_num, slide_type)(generator)
+        entry = _registry[slide_num]
+    return entry[1]
+
+def select_templates(only=None, exclude=None):
+    """Template numbers picked by --only / --exclude selectors.
+
+    Selectors are comma-separated numbers, ranges ("4-9"), type names or
+    glob patterns over type names ("*_diagram"). Without `only` every known
+    template is selected. Raises ValueError for selectors matching nothing.
+    """
+    templates = available_templates()
+
+    def expand(selectors):
+        picked = set()
+        for selector in filter(None, (part.strip() for part in selectors.split(","))):
+            low, sep, high = selector.partition("-")
+            if low.isdigit() and (not sep or high.isdigit()):
+                span = range(int(low), int(high or low) + 1)
+                matched = {num for num, _ in templates if num in span}
+            else:
+                matched = {num for num, slide_type in templates if fnmatch.fnmatchcase(slide_type, selector)}
+            if not matched:
+                raise ValueError(f"no template matches {selector!r}")
+            picked |= matched
+        return picked
+
+    selected = expand(only) if only else {num for num, _ in templates}
+    if exclude:
+        selected -= expand(exclude)
+    return sorted(selected)
 
 # ============================================================================
 # SLIDE GENERATORS (3-4 objects maximum per slide)
+# Each generator builds its body into a Scene and takes an optional
+# slideData dict; without it the built-in mockup copy is used.
 # ============================================================================
 
-def create_title():
+@template(1, "title")
+def create_title(scene, data=None):
     """001: Title slide - 1 object only (text)"""
-    svg = create_svg_header()
-    svg += create_text(CANVAS_WIDTH/2, CANVAS_HEIGHT/2 - 20, "Think Different", 
-                       FONT_HERO, 600, TEXT_WHITE, "middle")
-    svg += create_svg_footer()
-    return svg
+    scene.text(CANVAS_WIDTH/2, CANVAS_HEIGHT/2 - 20, _field(data, "title", "Think Different"),
+             FONT_HERO, 600, TEXT_WHITE, "middle", CONTENT_WIDTH, 2)
 
-def create_content_two_column():
+@template(2, "content_two_column")
+def create_content_two_column(scene, data=None):
     """002: 2-column content - 3 objects (title, text, shape)"""
-    svg = create_svg_header()
+    points = _items(data, "points", None, 1) or _items(data, "columns", [["Powerful performance"]], 1)[0]
     # Title
-    svg += create_text(MARGIN_H, MARGIN_V + 50, "Innovation", FONT_TITLE, 600)
+    text_w = CONTENT_WIDTH - 500 - SPACING_MD
+    scene.text(MARGIN_H, MARGIN_V + 50, _field(data, "title", "Innovation"), FONT_TITLE, 600, max_width=text_w)
     # Body text
-    svg += create_text(MARGIN_H, MARGIN_V + 150, "Powerful performance", FONT_BODY, 400, TEXT_GRAY)
+    body = _field(data, "subhead", _label(points[0]) if points else "")
+    scene.text(MARGIN_H, MARGIN_V + 150, body, FONT_BODY, 400, TEXT_GRAY, max_width=text_w, max_lines=3)
     # Visual element (right side)
-    svg += create_rect(CANVAS_WIDTH - MARGIN_H - 500, MARGIN_V + 100, 500, 600, TEXT_GRAY, 0.1)
-    svg += create_svg_footer()
-    return svg
+    scene.rect(CANVAS_WIDTH - MARGIN_H - 500, MARGIN_V + 100, 500, 600, TEXT_GRAY, 0.1)
 
-def create_image_text():
+@template(3, "image_text")
+def create_image_text(scene, data=None):
     """003: Image + text - 2 objects"""
-    svg = create_svg_header()
     # Large image placeholder
-    svg += create_rect(MARGIN_H, MARGIN_V, 700, 700, TEXT_GRAY, 0.15)
+    scene.rect(MARGIN_H, MARGIN_V, 700, 700, TEXT_GRAY, 0.15)
     # Text block
-    svg += create_text(MARGIN_H + 800, CANVAS_HEIGHT/2, "Beautiful design", FONT_TITLE, 600)
-    svg += create_svg_footer()
-    return svg
-
-def create_bar_compare():
-    """004: Bar comparison - 3 objects (3 bars)"""
-    svg = create_svg_header()
-    svg += create_text(CANVAS_WIDTH/2, MARGIN_V + 50, "Performance", FONT_TITLE, 600, TEXT_WHITE, "middle")
-    # Bar 1
-    svg += create_rect(MARGIN_H + 200, 400, 1000, 80, ACCENT_BLUE, 0.9)
-    svg += create_text(MARGIN_H + 220, 450, "M4", FONT_BODY, 600)
-    # Bar 2
-    svg += create_rect(MARGIN_H + 200, 520, 700, 80, TEXT_GRAY, 0.5)
-    svg += create_text(MARGIN_H + 220, 570, "M3", FONT_BODY, 600, TEXT_GRAY)
-    # Bar 3
-    svg += create_rect(MARGIN_H + 200, 640, 500, 80, TEXT_GRAY, 0.3)
-    svg += create_text(MARGIN_H + 220, 690, "M1", FONT_BODY, 600, TEXT_GRAY)
-    svg += create_svg_footer()
-    return svg
-
-def create_cards_grid():
+    scene.text(MARGIN_H + 800, CANVAS_HEIGHT/2, _field(data, "title", "Beautiful design"), FONT_TITLE, 600,
+               max_width=CANVAS_WIDTH - 2*MARGIN_H - 800, max_lines=3)
+
+@template(4, "bar_compare")
+def create_bar_compare(scene, data=None):
+    """004: Bar comparison - 3 objects (3 bars)
+
+    Takes `items` ({label, value}) or `stats` (rightValue); with more
+    than three entries the three largest are compared.
+    """
+    bars = [("M4", 1000), ("M3", 700), ("M1", 500)]
+    entries = _items(data, "items", None, None) or _items(data, "stats", None, None)
+    if entries:
+        values = [_number(entry.get("value", entry.get("rightValue")) if isinstance(entry, dict) else entry)
+                  for entry in entries]
+        if len(entries) > CHART_MAX_BARS:
+            # Many categories: the largest ones, in their original order
+            keep = sorted(heapq.nlargest(CHART_MAX_BARS, range(len(values)), key=values.__getitem__))
+            entries, values = [entries[i] for i in keep], [values[i] for i in keep]
+        peak = max(values) or 1
+        bars = [(_label(entry, "label"), int(round(1000 * (max(v, 0) / peak)))) for entry, v in zip(entries, values)]
+    styles = [(ACCENT_BLUE, 0.9, TEXT_WHITE), (TEXT_GRAY, 0.5, TEXT_GRAY), (TEXT_GRAY, 0.3, TEXT_GRAY)]
+    scene.text(CANVAS_WIDTH/2, MARGIN_V + 50, _field(data, "title", "Performance"), FONT_TITLE, 600, TEXT_WHITE, "middle",
+               CONTENT_WIDTH)
+    for i, ((label, width), (fill, opacity, color)) in enumerate(zip(bars, styles)):
+        y = 400 + i * 120
+        scene.rect(MARGIN_H + 200, y, width, 80, fill, opacity)
+        scene.text(MARGIN_H + 220, y + 50, label, FONT_BODY, 600, color, max_width=1000 - 40)
+
+@template(5, "cards_grid")
+def create_cards_grid(scene, data=None):
     """005: Card grid - 3 cards maximum"""
-    svg = create_svg_header()
+    cards = _items(data, "items", None) or _items(data, "lanes", [f"Feature {i+1}" for i in range(3)])
     card_w = 400
     card_h = 500
     spacing = (CANVAS_WIDTH - 2*MARGIN_H - 3*card_w) / 2
     y = MARGIN_V + 100
-    for i in range(3):
+    for i, card in enumerate(cards):
         x = MARGIN_H + i * (card_w + spacing)
-        svg += create_rect(x, y, card_w, card_h, TEXT_GRAY, 0.1)
-        svg += create_text(x + card_w/2, y + card_h/2, f"Feature {i+1}", FONT_BODY, 600, TEXT_WHITE, "middle")
-    svg += create_svg_footer()
-    return svg
+        scene.rect(x, y, card_w, card_h, TEXT_GRAY, 0.1)
+        scene.text(x + card_w/2, y + card_h/2, _label(card, "title"), FONT_BODY, 600, TEXT_WHITE, "middle",
+                   card_w - 80, 3)
 
-def create_kpi_display():
+@template(6, "kpi_display")
+def create_kpi_display(scene, data=None):
     """006: KPI display - 2 objects (number + label)"""
-    svg = create_svg_header()
-    svg += create_text(CANVAS_WIDTH/2, CANVAS_HEIGHT/2 - 50, "24", 200, 700, ACCENT_BLUE, "middle")
-    svg += create_text(CANVAS_WIDTH/2, CANVAS_HEIGHT/2 + 100, "hours", FONT_TITLE, 400, TEXT_GRAY, "middle")
-    svg += create_svg_footer()
-    return svg
+    kpi = _items(data, "items", [{"value": "24", "label": "hours"}], 1)[0]
+    scene.text(CANVAS_WIDTH/2, CANVAS_HEIGHT/2 - 50, _label(kpi, "value"), 200, 700, ACCENT_BLUE, "middle",
+               CONTENT_WIDTH)
+    scene.text(CANVAS_WIDTH/2, CANVAS_HEIGHT/2 + 100, _label(kpi, "label"), FONT_TITLE, 400, TEXT_GRAY, "middle",
+               CONTENT_WIDTH)
 
-def create_pricing():
+@template(7, "pricing")
+def create_pricing(scene, data=None):
     """007: Pricing - 3 objects (product, price, description)"""
-    svg = create_svg_header()
-    svg += create_text(CANVAS_WIDTH/2, CANVAS_HEIGHT/2 - 150, "MacBook Pro", FONT_TITLE, 600, TEXT_WHITE, "middle")
-    svg += create_text(CANVAS_WIDTH/2, CANVAS_HEIGHT/2, "$1,599", FONT_HERO, 700, TEXT_WHITE, "middle")
-    svg += create_text(CANVAS_WIDTH/2, CANVAS_HEIGHT/2 + 100, "14-inch model", FONT_BODY, 400, TEXT_GRAY, "middle")
-    svg += create_svg_footer()
-    return svg
-
-def create_timeline():
+    scene.text(CANVAS_WIDTH/2, CANVAS_HEIGHT/2 - 150, _field(data, "title", "MacBook Pro"), FONT_TITLE, 600, TEXT_WHITE, "middle",
+               CONTENT_WIDTH)
+    scene.text(CANVAS_WIDTH/2, CANVAS_HEIGHT/2, _field(data, "price", "$1,599"), FONT_HERO, 700, TEXT_WHITE, "middle",
+               CONTENT_WIDTH)
+    scene.text(CANVAS_WIDTH/2, CANVAS_HEIGHT/2 + 100, _field(data, "subhead", "14-inch model"), FONT_BODY, 400, TEXT_GRAY, "middle",
+               CONTENT_WIDTH)
+
+@template(8, "timeline")
+def create_timeline(scene, data=None):
     """008: Timeline - 4 objects (line + 3 nodes)"""
-    svg = create_svg_header()
     # Timeline line
-    svg += create_line(MARGIN_H + 200, CANVAS_HEIGHT/2, CANVAS_WIDTH - MARGIN_H - 200, CANVAS_HEIGHT/2, TEXT_GRAY, 3)
+    scene.line(MARGIN_H + 200, CANVAS_HEIGHT/2, CANVAS_WIDTH - MARGIN_H - 200, CANVAS_HEIGHT/2, TEXT_GRAY, 3)
     # 3 nodes
-    years = ["2022", "2023", "2024"]
+    years = _items(data, "milestones", ["2022", "2023", "2024"])
     node_spacing = (CANVAS_WIDTH - 2*MARGIN_H - 400) / 2
     for i, year in enumerate(years):
         x = MARGIN_H + 200 + i * node_spacing
-        svg += f'  <circle cx="{x}" cy="{CANVAS_HEIGHT/2}" r="16" fill="{TEXT_WHITE}"/>\n'
-        svg += create_text(x, CANVAS_HEIGHT/2 - 80, year, FONT_BODY, 600, TEXT_WHITE, "middle")
-    svg += create_svg_footer()
-    return svg
+        scene.circle(x, CANVAS_HEIGHT/2, 16, TEXT_WHITE)
+        scene.text(x, CANVAS_HEIGHT/2 - 80, _label(year, "date", "label"), FONT_BODY, 600, TEXT_WHITE, "middle",
+                   node_spacing - SPACING_MD)
 
-def create_table_two_column():
+@template(9, "table_two_column")
+def create_table_two_column(scene, data=None):
     """009: 2-column table - 3 objects (2 columns + divider)"""
-    svg = create_svg_header()
+    headers = _items(data, "headers", ["Performance", "Efficiency"], 2)
+    row = _items(data, "rows", [["2× faster", "All-day battery"]], 1)[0]
+    left = _items(data, "leftItems", row[:1], 1)
+    right = _items(data, "rightItems", row[1:2], 1)
     mid = CANVAS_WIDTH / 2
+    col_w = mid - MARGIN_H - 150 - SPACING_MD
     # Left column
-    svg += create_text(MARGIN_H + 150, CANVAS_HEIGHT/2 - 100, "Performance", FONT_TITLE, 600)
-    svg += create_text(MARGIN_H + 150, CANVAS_HEIGHT/2 + 50, "2× faster", FONT_BODY, 400, TEXT_GRAY)
+    scene.text(MARGIN_H + 150, CANVAS_HEIGHT/2 - 100, _field(data, "leftTitle", headers[0]), FONT_TITLE, 600,
+               max_width=col_w)
+    scene.text(MARGIN_H + 150, CANVAS_HEIGHT/2 + 50, _label(left[0]) if left else "", FONT_BODY, 400, TEXT_GRAY,
+               max_width=col_w, max_lines=3)
     # Divider
-    svg += create_line(mid, MARGIN_V + 100, mid, CANVAS_HEIGHT - MARGIN_V - 100, TEXT_GRAY, 1)
+    scene.line(mid, MARGIN_V + 100, mid, CANVAS_HEIGHT - MARGIN_V - 100, TEXT_GRAY, 1)
     # Right column
-    svg += create_text(mid + 150, CANVAS_HEIGHT/2 - 100, "Efficiency", FONT_TITLE, 600)
-    svg += create_text(mid + 150, CANVAS_HEIGHT/2 + 50, "All-day battery", FONT_BODY, 400, TEXT_GRAY)
-    svg += create_svg_footer()
-    return svg
-
-def create_diagram_pie():
-    """010: Pie diagram - 1 object (simplified pie)"""
-    svg = create_svg_header()
+    right_title = _field(data, "rightTitle", headers[1] if len(headers) > 1 else "")
+    scene.text(mid + 150, CANVAS_HEIGHT/2 - 100, right_title, FONT_TITLE, 600, max_width=col_w)
+    scene.text(mid + 150, CANVAS_HEIGHT/2 + 50, _label(right[0]) if right else "", FONT_BODY, 400, TEXT_GRAY,
+               max_width=col_w, max_lines=3)
+
+@template(10, "diagram_pie")
+def create_diagram_pie(scene, data=None):
+    """010: Pie diagram - 1 object (simplified pie)
+
+    With `items` ({label, value}) the pie shows the largest categories
+    (the rest as "Other") and labels the leading share.
+    """
     cx, cy = CANVAS_WIDTH / 2, CANVAS_HEIGHT / 2
     radius = 300
+    items = _items(data, "items", None, None)
+    values = chart_values(items) if items else None
+    slices = values is not None and pie_slices([_label(item, "label") if isinstance(item, dict) else "" for item in items],
+                                                   values)
+    if slices:
+        names, fractions = slices
+        if len(fractions) == 1:
+            scene.circle(cx, cy, radius, ACCENT_BLUE, 0.9)
+        else:
+            for d, opacity in zip(wedge_paths(cx, cy, radius, fractions), (0.9, 0.6, 0.3)):
+                scene.path(d, ACCENT_BLUE, opacity)
+        scene.text(cx + radius + 80, cy + 12, f"{names[0]} {fractions[0]:.0%}".strip(), FONT_BODY, 600,
+                   TEXT_WHITE, max_width=CANVAS_WIDTH - MARGIN_H - cx - radius - 80)
+        return
     # Simple 3-segment pie
-    svg += f'  <circle cx="{cx}" cy="{cy}" r="{radius}" fill="{ACCENT_BLUE}" opacity="0.3"/>\n'
-    svg += f'  <path d="M {cx} {cy} L {cx} {cy-radius} A {radius} {radius} 0 0 1 {cx+radius} {cy} Z" fill="{ACCENT_BLUE}" opacity="0.7"/>\n'
-    svg += create_svg_footer()
-    return svg
-
-def create_bar_chart_simple():
-    """011: Simple bar chart - 3 objects (3 bars)"""
-    svg = create_svg_header()
+    scene.circle(cx, cy, radius, ACCENT_BLUE, 0.3)
+    scene.path(f"M {cx} {cy} L {cx} {cy-radius} A {radius} {radius} 0 0 1 {cx+radius} {cy} Z", ACCENT_BLUE, 0.7)
+
+@template(11, "bar_chart_simple")
+def create_bar_chart_simple(scene, data=None):
+    """011: Simple bar chart - 3 objects (3 bars)
+
+    A `series` of up to three values is drawn as bars; longer series
+    (numbers, [x, y] pairs or dated {date, value} points) become an
+    LTTB-downsampled area with a marker and label on the latest value.
+    """
     bars = [(600, 300, 100, ACCENT_BLUE), (900, 450, 100, ACCENT_BLUE), (1200, 250, 100, ACCENT_BLUE)]
+    bottom = CANVAS_HEIGHT - MARGIN_V - 100
+    series = chart_series(data)
+    if series is not None:
+        x, y, source = series
+        if len(y) > CHART_MAX_BARS:
+            keep = lttb(x, y)
+            d, end_x, end_y = area_path(x[keep], y[keep], 600, bottom - 450, 700, 450)
+            last = data["series"][source[-1]]  # The entry under the marker
+            scene.path(d, ACCENT_BLUE, 0.3)
+            scene.circle(end_x, end_y, 12, ACCENT_BLUE)
+            scene.text(end_x + 40, end_y + 12, _label(last, "displayValue", "label") or f"{y[-1]:g}", FONT_BODY,
+                       600, TEXT_WHITE, max_width=CANVAS_WIDTH - MARGIN_H - end_x - 40)
+            return
+        center = (len(y) - 1) / 2
+        bars = [(950 + 300 * (i - center) - 50, h, 100, ACCENT_BLUE)
+                for i, h in enumerate(bar_heights(y, 450).tolist())]
     for x, h, w, color in bars:
-        svg += create_rect(x, CANVAS_HEIGHT - MARGIN_V - h - 100, w, h, color, 0.8, 12)
-    svg += create_svg_footer()
-    return svg
+        scene.rect(x, bottom - h, w, h, color, 0.8, 12)
 
-def create_icon_trio():
+@template(12, "icon_trio")
+def create_icon_trio(scene, data=None):
     """012: Icon trio - 3 objects (3 icons)"""
-    svg = create_svg_header()
+    labels = _items(data, "items", [f"Feature {i+1}" for i in range(3)])
     icons_x = [500, 960, 1420]
     y = CANVAS_HEIGHT / 2
-    for i, x in enumerate(icons_x):
-        svg += f'  <circle cx="{x}" cy="{y}" r="80" fill="none" stroke="{TEXT_WHITE}" stroke-width="3"/>\n'
-        svg += create_text(x, y + 150, f"Feature {i+1}", FONT_CAPTION, 400, TEXT_GRAY, "middle")
-    svg += create_svg_footer()
-    return svg
+    for x, label in zip(icons_x, labels):
+        scene.circle(x, y, 80, "none", stroke=TEXT_WHITE, stroke_width=3)
+        scene.text(x, y + 150, _label(label, "title", "label"), FONT_CAPTION, 400, TEXT_GRAY, "middle",
+                   400, 2)
 
-def create_image_collage():
+@template(13, "image_collage")
+def create_image_collage(scene, data=None):
     """013: Image collage - 3 objects (3 image frames)"""
-    svg = create_svg_header()
     # Large frame
-    svg += create_rect(MARGIN_H, MARGIN_V, 800, 750, TEXT_GRAY, 0.15)
+    scene.rect(MARGIN_H, MARGIN_V, 800, 750, TEXT_GRAY, 0.15)
     # Top right
-    svg += create_rect(MARGIN_H + 900, MARGIN_V, 700, 350, TEXT_GRAY, 0.15)
+    scene.rect(MARGIN_H + 900, MARGIN_V, 700, 350, TEXT_GRAY, 0.15)
     # Bottom right
-    svg += create_rect(MARGIN_H + 900, MARGIN_V + 450, 700, 300, TEXT_GRAY, 0.15)
-    svg += create_svg_footer()
-    return svg
+    scene.rect(MARGIN_H + 900, MARGIN_V + 450, 700, 300, TEXT_GRAY, 0.15)
 
-def create_hero_image():
+@template(14, "hero_image")
+def create_hero_image(scene, data=None):
     """014: Hero image - 1 object (full-bleed image)"""
-    svg = create_svg_header()
-    svg += create_rect(0, 0, CANVAS_WIDTH, CANVAS_HEIGHT, ACCENT_BLUE, 0.3, 0)
-    svg += create_svg_footer()
-    return svg
+    scene.rect(0, 0, CANVAS_WIDTH, CANVAS_HEIGHT, ACCENT_BLUE, 0.3, 0)
 
-def create_quote_testimonial():
+@template(15, "quote_testimonial")
+def create_quote_testimonial(scene, data=None):
     """015: Quote - 3 objects (vertical bar + quote + attribution)
     Markdown-style blockquote with thin gray vertical bar on left"""
-    svg = create_svg_header()
     # Vertical blockquote bar (Markdown-style)
     bar_x = MARGIN_H + 150
     bar_y = CANVAS_HEIGHT/2 - 110
-    svg += create_rect(bar_x, bar_y, 4, 210, TEXT_GRAY, 0.4, 2)
+    scene.rect(bar_x, bar_y, 4, 210, TEXT_GRAY, 0.4, 2)
     # Quote text (without quotation marks for cleaner look)
-    svg += create_text(MARGIN_H + 200, CANVAS_HEIGHT/2 - 50, "Revolutionary design", FONT_TITLE, 600)
+    scene.text(MARGIN_H + 200, CANVAS_HEIGHT/2 - 50, _field(data, "text", "Revolutionary design"), FONT_TITLE, 600,
+               max_width=CONTENT_WIDTH - 200, max_lines=2)
     # Attribution
-    svg += create_text(MARGIN_H + 200, CANVAS_HEIGHT/2 + 80, "— Tech Review", FONT_BODY, 400, TEXT_GRAY)
-    svg += create_svg_footer()
-    return svg
+    scene.text(MARGIN_H + 200, CANVAS_HEIGHT/2 + 80, "— " + _field(data, "author", "Tech Review"), FONT_BODY, 400, TEXT_GRAY,
+               max_width=CONTENT_WIDTH - 200)
 
-def create_before_after():
+@template(16, "before_after")
+def create_before_after(scene, data=None):
     """016: Before/after - 2 objects (2 sides)"""
-    svg = create_svg_header()
     mid = CANVAS_WIDTH / 2
     # Before (left)
-    svg += create_rect(0, 0, mid, CANVAS_HEIGHT, "#333333", 1, 0)
-    svg += create_text(mid/2, CANVAS_HEIGHT/2, "Before", FONT_TITLE, 600, "#CCCCCC", "middle")
+    scene.rect(0, 0, mid, CANVAS_HEIGHT, SURFACE_GRAY, 1, 0)
+    scene.text(mid/2, CANVAS_HEIGHT/2, _field(data, "leftTitle", "Before"), FONT_TITLE, 600, TEXT_MUTED, "middle",
+               mid - 2*SPACING_MD, 3)
     # After (right)
-    svg += create_rect(mid, 0, mid, CANVAS_HEIGHT, BG_COLOR, 1, 0)
-    svg += create_text(mid + mid/2, CANVAS_HEIGHT/2, "After", FONT_TITLE, 600, TEXT_WHITE, "middle")
-    svg += create_svg_footer()
-    return svg
+    scene.rect(mid, 0, mid, CANVAS_HEIGHT, BG_COLOR, 1, 0)
+    scene.text(mid + mid/2, CANVAS_HEIGHT/2, _field(data, "rightTitle", "After"), FONT_TITLE, 600, TEXT_WHITE, "middle",
+               mid - 2*SPACING_MD, 3)
 
-def create_stats_contrast():
+@template(17, "stats_contrast")
+def create_stats_contrast(scene, data=None):
     """017: Stats contrast - 2 objects (2 numbers)"""
-    svg = create_svg_header()
-    svg += create_text(MARGIN_H + 300, CANVAS_HEIGHT/2, "+47%", 120, 700, "#30D158")
-    svg += create_text(CANVAS_WIDTH - MARGIN_H - 300, CANVAS_HEIGHT/2, "-32%", 120, 700, "#FF9F0A", "end")
-    svg += create_svg_footer()
-    return svg
+    stat = _items(data, "stats", [{"leftValue": "+47%", "rightValue": "-32%"}], 1)[0]
+    scene.text(MARGIN_H + 300, CANVAS_HEIGHT/2, _label(stat, "leftValue"), 120, 700, ACCENT_GREEN,
+               max_width=CANVAS_WIDTH/2 - MARGIN_H - 300 - SPACING_MD/2)
+    scene.text(CANVAS_WIDTH - MARGIN_H - 300, CANVAS_HEIGHT/2, _label(stat, "rightValue"), 120, 700, ACCENT_ORANGE, "end",
+               CANVAS_WIDTH/2 - MARGIN_H - 300 - SPACING_MD/2)
 
-def create_feature_slots():
+@template(18, "feature_slots")
+def create_feature_slots(scene, data=None):
     """018: Feature slots - 3 objects (3 slots)"""
-    svg = create_svg_header()
     positions = [(MARGIN_H + 200, CANVAS_HEIGHT/2 - 150), 
                  (CANVAS_WIDTH/2 - 150, CANVAS_HEIGHT/2 - 150),
                  (CANVAS_WIDTH - MARGIN_H - 500, CANVAS_HEIGHT/2 - 150)]
     for x, y in positions:
-        svg += f'  <rect x="{x}" y="{y}" width="300" height="300" rx="{RADIUS}" fill="none" stroke="{TEXT_GRAY}" stroke-width="2"/>\n'
-    svg += create_svg_footer()
-    return svg
+        scene.rect(x, y, 300, 300, "none", None, RADIUS, TEXT_GRAY, 2)
 
-def create_section_divider():
+@template(19, "section_divider")
+def create_section_divider(scene, data=None):
     """019: Section divider - 2 objects (text + line)"""
-    svg = create_svg_header()
-    svg += create_text(CANVAS_WIDTH/2, CANVAS_HEIGHT/2 - 50, "Next", FONT_HERO, 600, TEXT_WHITE, "middle")
-    svg += create_line(CANVAS_WIDTH/2 - 150, CANVAS_HEIGHT/2 + 50, CANVAS_WIDTH/2 + 150, CANVAS_HEIGHT/2 + 50, ACCENT_BLUE, 4)
-    svg += create_svg_footer()
-    return svg
+    scene.text(CANVAS_WIDTH/2, CANVAS_HEIGHT/2 - 50, _field(data, "title", "Next"), FONT_HERO, 600, TEXT_WHITE, "middle",
+               CONTENT_WIDTH)
+    scene.line(CANVAS_WIDTH/2 - 150, CANVAS_HEIGHT/2 + 50, CANVAS_WIDTH/2 + 150, CANVAS_HEIGHT/2 + 50, ACCENT_BLUE, 4)
 
-def create_content_text_focused():
+@template(20, "content_text_focused")
+def create_content_text_focused(scene, data=None):
     """020: Text-focused - 2 objects (heading + body)"""
-    svg = create_svg_header()
-    svg += create_text(MARGIN_H + 200, MARGIN_V + 200, "Innovation", FONT_TITLE, 600)
-    svg += create_text(MARGIN_H + 200, MARGIN_V + 320, "Pushing boundaries every day", FONT_BODY, 400, TEXT_GRAY)
-    svg += create_svg_footer()
-    return svg
+    points = _items(data, "points", ["Pushing boundaries every day"], 1)
+    scene.text(MARGIN_H + 200, MARGIN_V + 200, _field(data, "title", "Innovation"), FONT_TITLE, 600,
+               max_width=CONTENT_WIDTH - 400)
+    scene.text(MARGIN_H + 200, MARGIN_V + 320, _field(data, "subhead", _label(points[0])), FONT_BODY, 400, TEXT_GRAY,
+               max_width=CONTENT_WIDTH - 400, max_lines=4)
 
-def create_process_steps():
+@template(21, "process_steps")
+def create_process_steps(scene, data=None):
     """021: Process steps - 3 objects (3 steps)"""
-    svg = create_svg_header()
-    steps = ["Design", "Build", "Launch"]
+    steps = _items(data, "steps", ["Design", "Build", "Launch"])
     step_w = 400
     spacing = (CANVAS_WIDTH - 2*MARGIN_H - 3*step_w) / 2
     y = CANVAS_HEIGHT/2 - 50
     for i, step in enumerate(steps):
         x = MARGIN_H + i * (step_w + spacing)
-        svg += create_text(x + step_w/2, y, f"{i+1}", FONT_HERO, 700, TEXT_GRAY, "middle")
-        svg += create_text(x + step_w/2, y + 120, step, FONT_BODY, 600, TEXT_WHITE, "middle")
-    svg += create_svg_footer()
-    return svg
+        scene.text(x + step_w/2, y, f"{i+1}", FONT_HERO, 700, TEXT_GRAY, "middle")
+        scene.text(x + step_w/2, y + 120, _label(step, "title", "label"), FONT_BODY, 600, TEXT_WHITE, "middle",
+                   step_w, 2)
 
-def create_header_cards():
+@template(22, "header_cards")
+def create_header_cards(scene, data=None):
     """022: Header cards - 3 objects (3 cards)"""
-    svg = create_svg_header()
+    cards = _items(data, "items", [f"Title {i+1}" for i in range(3)])
     card_w = 450
     spacing = (CANVAS_WIDTH - 2*MARGIN_H - 3*card_w) / 2
     y = MARGIN_V + 150
-    for i in range(3):
+    for i, card in enumerate(cards):
         x = MARGIN_H + i * (card_w + spacing)
-        svg += create_rect(x, y, card_w, 400, TEXT_GRAY, 0.1)
-        svg += create_text(x + card_w/2, y + 80, f"Title {i+1}", FONT_BODY, 600, TEXT_WHITE, "middle")
-    svg += create_svg_footer()
-    return svg
+        scene.rect(x, y, card_w, 400, TEXT_GRAY, 0.1)
+        scene.text(x + card_w/2, y + 80, _label(card, "title"), FONT_BODY, 600, TEXT_WHITE, "middle",
+                   card_w - 80, 2)
 
-def create_bullet_cards():
+@template(23, "bullet_cards")
+def create_bullet_cards(scene, data=None):
     """023: Bullet cards - 3 objects (3 cards with bullets)"""
-    svg = create_svg_header()
+    cards = _items(data, "items", [f"Feature {i+1}" for i in range(3)])
     card_w = 450
     spacing = (CANVAS_WIDTH - 2*MARGIN_H - 3*card_w) / 2
     y = MARGIN_V + 150
-    for i in range(3):
+    for i, card in enumerate(cards):
         x = MARGIN_H + i * (card_w + spacing)
-        svg += create_rect(x, y, card_w, 450, TEXT_GRAY, 0.1)
-        svg += create_text(x + 40, y + 80, f"• Feature {i+1}", FONT_CAPTION, 400, TEXT_GRAY)
-    svg += create_svg_footer()
-    return svg
-
-def create_progress_bar():
-    """024: Progress bar - 3 objects (3 bars)"""
-    svg = create_svg_header()
+        scene.rect(x, y, card_w, 450, TEXT_GRAY, 0.1)
+        scene.text(x + 40, y + 80, f"• {_label(card, 'title')}", FONT_CAPTION, 400, TEXT_GRAY,
+                   max_width=card_w - 80, max_lines=8)
+
+@template(24, "progress_bar")
+def create_progress_bar(scene, data=None):
+    """024: Progress bar - 3 objects (3 bars)
+
+    Items give `percent`, `value`/`total`, or `start`/`end` dates that are
+    measured at the slide's `asOf` date.
+    """
     labels = ["Design", "Development", "Launch"]
     progress = [1.0, 0.7, 0.3]
+    items = _items(data, "items", None)
+    if items:
+        labels = [_label(item, "label") for item in items]
+        progress = [progress_fraction(item, data.get("asOf")) for item in items]
     bar_w = 900
     x_start = MARGIN_H + 300
     y_start = MARGIN_V + 250
     for i, (label, prog) in enumerate(zip(labels, progress)):
         y = y_start + i * 150
         # Background
-        svg += create_rect(x_start, y, bar_w, 60, TEXT_GRAY, 0.2, 30)
+        scene.rect(x_start, y, bar_w, 60, TEXT_GRAY, 0.2, 30)
         # Progress
-        svg += create_rect(x_start, y, bar_w * prog, 60, ACCENT_BLUE, 0.8, 30)
-        svg += create_text(x_start, y - 20, label, FONT_CAPTION, 400, TEXT_GRAY)
-    svg += create_svg_footer()
-    return svg
+        scene.rect(x_start, y, bar_w * prog, 60, ACCENT_BLUE, 0.8, 30)
+        scene.text(x_start, y - 20, label, FONT_CAPTION, 400, TEXT_GRAY, max_width=bar_w)
 
-def create_cycle_diagram():
+@template(25, "cycle_diagram")
+def create_cycle_diagram(scene, data=None):
     """025: Cycle diagram - 3 objects (3 nodes in circle)"""
-    svg = create_svg_header()
+    labels = _items(data, "items", [f"{i+1}" for i in range(3)])
     cx, cy = CANVAS_WIDTH / 2, CANVAS_HEIGHT / 2
     radius = 280
-    for i in range(3):
+    for i, label in enumerate(labels):
         angle = (i * 120 - 90) * math.pi / 180
         x = cx + radius * math.cos(angle)
         y = cy + radius * math.sin(angle)
-        svg += f'  <circle cx="{x}" cy="{y}" r="60" fill="{ACCENT_BLUE}" opacity="0.3"/>\n'
-        svg += create_text(x, y + 10, f"{i+1}", FONT_BODY, 600, TEXT_WHITE, "middle")
-    svg += create_svg_footer()
-    return svg
+        scene.circle(x, y, 60, ACCENT_BLUE, 0.3)
+        scene.text(x, y + 10, _label(label, "label", "title"), FONT_BODY, 600, TEXT_WHITE, "middle",
+                   140)
 
-def create_triangle_diagram():
+@template(26, "triangle_diagram")
+def create_triangle_diagram(scene, data=None):
     """026: Triangle diagram - 4 objects (3 nodes + connection lines)
     Differentiated from cycle/pyramid with connecting lines between nodes"""
-    svg = create_svg_header()
+    labels = _items(data, "items", [f"{i+1}" for i in range(3)])
     cx, cy = CANVAS_WIDTH / 2, CANVAS_HEIGHT / 2
     h = 300
     points = [
@@ -414,168 +1839,2795 @@ def create_triangle_diagram():
     ]
     
     # Connection lines (4th visual element for differentiation)
-    svg += f'  <line x1="{points[0][0]}" y1="{points[0][1] + 60}" x2="{points[1][0]}" y2="{points[1][1] - 60}" stroke="{TEXT_GRAY}" stroke-width="2" opacity="0.4"/>\n'
-    svg += f'  <line x1="{points[0][0]}" y1="{points[0][1] + 60}" x2="{points[2][0]}" y2="{points[2][1] - 60}" stroke="{TEXT_GRAY}" stroke-width="2" opacity="0.4"/>\n'
-    svg += f'  <line x1="{points[1][0]}" y1="{points[1][1]}" x2="{points[2][0]}" y2="{points[2][1]}" stroke="{TEXT_GRAY}" stroke-width="2" opacity="0.4"/>\n'
+    scene.line(points[0][0], points[0][1] + 60, points[1][0], points[1][1] - 60, TEXT_GRAY, 2, 0.4)
+    scene.line(points[0][0], points[0][1] + 60, points[2][0], points[2][1] - 60, TEXT_GRAY, 2, 0.4)
+    scene.line(points[1][0], points[1][1], points[2][0], points[2][1], TEXT_GRAY, 2, 0.4)
     
     # Nodes
-    for i, (x, y) in enumerate(points):
-        svg += f'  <circle cx="{x}" cy="{y}" r="60" fill="{ACCENT_BLUE}" opacity="0.3"/>\n'
-        svg += create_text(x, y + 10, f"{i+1}", FONT_BODY, 600, TEXT_WHITE, "middle")
-    svg += create_svg_footer()
-    return svg
+    for (x, y), label in zip(points, labels):
+        scene.circle(x, y, 60, ACCENT_BLUE, 0.3)
+        scene.text(x, y + 10, _label(label, "title"), FONT_BODY, 600, TEXT_WHITE, "middle", 140)
 
-def create_pyramid_diagram():
+@template(27, "pyramid_diagram")
+def create_pyramid_diagram(scene, data=None):
     """027: Pyramid diagram - 3 objects (3 levels)"""
-    svg = create_svg_header()
+    # slideData lists levels top-down; they are drawn from the base up
+    levels = _items(data, "levels", [f"Level {i+1}" for i in range(3)])
     cx = CANVAS_WIDTH / 2
     y_base = CANVAS_HEIGHT - MARGIN_V - 100
     widths = [1000, 700, 400]
-    for i, w in enumerate(widths):
+    for i, (w, level) in enumerate(zip(widths, reversed(levels))):
         y = y_base - i * 180
         x = cx - w/2
-        svg += create_rect(x, y, w, 140, ACCENT_BLUE, 0.3 + i * 0.2)
-        svg += create_text(cx, y + 80, f"Level {3-i}", FONT_BODY, 600, TEXT_WHITE, "middle")
-    svg += create_svg_footer()
-    return svg
+        scene.rect(x, y, w, 140, ACCENT_BLUE, 0.3 + i * 0.2)
+        scene.text(cx, y + 80, _label(level, "title"), FONT_BODY, 600, TEXT_WHITE, "middle", w - 80)
 
-def create_flow_chart():
+@template(28, "flow_chart")
+def create_flow_chart(scene, data=None):
     """028: Flow chart - 3 objects (3 nodes)"""
-    svg = create_svg_header()
+    flows = _items(data, "flows", [{}], 1)
+    steps = _items(flows[0], "steps", None) or _items(data, "steps", [f"Step {i+1}" for i in range(3)])
     node_w = 300
     spacing = 200
     y = CANVAS_HEIGHT / 2 - 75
     x_start = (CANVAS_WIDTH - 3*node_w - 2*spacing) / 2
-    for i in range(3):
+    for i, step in enumerate(steps):
         x = x_start + i * (node_w + spacing)
-        svg += create_rect(x, y, node_w, 150, TEXT_GRAY, 0.15)
-        svg += create_text(x + node_w/2, y + 90, f"Step {i+1}", FONT_BODY, 600, TEXT_WHITE, "middle")
+        scene.rect(x, y, node_w, 150, TEXT_GRAY, 0.15)
+        scene.text(x + node_w/2, y + 90, _label(step, "title", "label"), FONT_BODY, 600, TEXT_WHITE, "middle",
+                   node_w - 40)
         # Arrow
-        if i < 2:
+        if i < len(steps) - 1:
             arrow_x = x + node_w + 30
-            svg += f'  <line x1="{arrow_x}" y1="{y + 75}" x2="{arrow_x + spacing - 60}" y2="{y + 75}" stroke="{TEXT_GRAY}" stroke-width="2"/>\n'
-    svg += create_svg_footer()
-    return svg
+            scene.line(arrow_x, y + 75, arrow_x + spacing - 60, y + 75, TEXT_GRAY, 2)
 
-def create_step_up_diagram():
+@template(29, "step_up_diagram")
+def create_step_up_diagram(scene, data=None):
     """029: Step-up diagram - 3 objects (3 ascending boxes)"""
-    svg = create_svg_header()
+    labels = _items(data, "items", [f"{i+1}" for i in range(3)])
     box_w = 350
-    for i in range(3):
+    for i, label in enumerate(labels):
         x = MARGIN_H + 300 + i * 400
         h = 200 + i * 100
         y = CANVAS_HEIGHT - MARGIN_V - 100 - h
-        svg += create_rect(x, y, box_w, h, ACCENT_BLUE, 0.3 + i * 0.2)
-        svg += create_text(x + box_w/2, y + h/2 + 10, f"{i+1}", FONT_TITLE, 600, TEXT_WHITE, "middle")
-    svg += create_svg_footer()
-    return svg
+        scene.rect(x, y, box_w, h, ACCENT_BLUE, 0.3 + i * 0.2)
+        scene.text(x + box_w/2, y + h/2 + 10, _label(label, "title"), FONT_TITLE, 600, TEXT_WHITE, "middle",
+                   box_w - 40)
 
-def create_faq_slide():
+@template(30, "faq_slide")
+def create_faq_slide(scene, data=None):
     """030: FAQ - 3 objects (3 Q&A pairs)"""
-    svg = create_svg_header()
+    pairs = _items(data, "items", [{"q": "Question here?", "a": "Answer goes here"}] * 3)
     y_start = MARGIN_V + 150
-    for i in range(3):
+    for i, pair in enumerate(pairs):
         y = y_start + i * 220
-        svg += create_text(MARGIN_H + 200, y, f"Q{i+1}. Question here?", FONT_BODY, 600)
-        svg += create_text(MARGIN_H + 200, y + 80, "Answer goes here", FONT_CAPTION, 400, TEXT_GRAY)
-    svg += create_svg_footer()
-    return svg
+        scene.text(MARGIN_H + 200, y, f"Q{i+1}. {_label(pair, 'q')}", FONT_BODY, 600, max_width=CONTENT_WIDTH - 400)
+        scene.text(MARGIN_H + 200, y + 80, _label(pair, "a"), FONT_CAPTION, 400, TEXT_GRAY,
+                   max_width=CONTENT_WIDTH - 400, max_lines=2)
 
-def create_agenda_slide():
+@template(31, "agenda_slide")
+def create_agenda_slide(scene, data=None):
     """031: Agenda - 3 objects (3 agenda items)"""
-    svg = create_svg_header()
-    svg += create_text(MARGIN_H + 200, MARGIN_V + 100, "Agenda", FONT_TITLE, 600)
-    items = ["Introduction", "Key Features", "Conclusion"]
+    scene.text(MARGIN_H + 200, MARGIN_V + 100, _field(data, "title", "Agenda"), FONT_TITLE, 600,
+               max_width=CONTENT_WIDTH - 400)
+    items = _items(data, "items", ["Introduction", "Key Features", "Conclusion"])
     y_start = MARGIN_V + 250
     for i, item in enumerate(items):
         y = y_start + i * 120
-        svg += create_text(MARGIN_H + 250, y, f"{i+1}. {item}", FONT_BODY, 400, TEXT_GRAY)
-    svg += create_svg_footer()
-    return svg
+        scene.text(MARGIN_H + 250, y, f"{i+1}. {_label(item, 'title')}", FONT_BODY, 400, TEXT_GRAY,
+                   max_width=CONTENT_WIDTH - 450)
 
-def create_closing_slide():
+@template(32, "closing_slide")
+def create_closing_slide(scene, data=None):
     """032: Closing - 2 objects (text + line)"""
-    svg = create_svg_header()
-    svg += create_text(CANVAS_WIDTH/2, CANVAS_HEIGHT/2 - 50, "Thank you", FONT_HERO, 600, TEXT_WHITE, "middle")
-    svg += create_line(CANVAS_WIDTH/2 - 200, CANVAS_HEIGHT/2 + 50, CANVAS_WIDTH/2 + 200, CANVAS_HEIGHT/2 + 50, ACCENT_BLUE, 4)
-    svg += create_svg_footer()
-    return svg
-
-def generate_svg_mockup(slide_num):
-    """Generate SVG mockup for a specific slide number."""
-    slide_type = SLIDE_TYPES.get(slide_num, f"unknown_{slide_num}")
-    
-    # Map slide types to generator functions
-    generators = {
-        "title": create_title,
-        "content_two_column": create_content_two_column,
-        "image_text": create_image_text,
-        "bar_compare": create_bar_compare,
-        "cards_grid": create_cards_grid,
-        "kpi_display": create_kpi_display,
-        "pricing": create_pricing,
-        "timeline": create_timeline,
-        "table_two_column": create_table_two_column,
-        "diagram_pie": create_diagram_pie,
-        "bar_chart_simple": create_bar_chart_simple,
-        "icon_trio": create_icon_trio,
-        "image_collage": create_image_collage,
-        "hero_image": create_hero_image,
-        "quote_testimonial": create_quote_testimonial,
-        "before_after": create_before_after,
-        "stats_contrast": create_stats_contrast,
-        "feature_slots": create_feature_slots,
-        "section_divider": create_section_divider,
-        "content_text_focused": create_content_text_focused,
-        "process_steps": create_process_steps,
-        "header_cards": create_header_cards,
-        "bullet_cards": create_bullet_cards,
-        "progress_bar": create_progress_bar,
-        "cycle_diagram": create_cycle_diagram,
-        "triangle_diagram": create_triangle_diagram,
-        "pyramid_diagram": create_pyramid_diagram,
-        "flow_chart": create_flow_chart,
-        "step_up_diagram": create_step_up_diagram,
-        "faq_slide": create_faq_slide,
-        "agenda_slide": create_agenda_slide,
-        "closing_slide": create_closing_slide,
+    scene.text(CANVAS_WIDTH/2, CANVAS_HEIGHT/2 - 50, _field(data, "title", "Thank you"), FONT_HERO, 600, TEXT_WHITE, "middle",
+               CONTENT_WIDTH)
+    scene.line(CANVAS_WIDTH/2 - 200, CANVAS_HEIGHT/2 + 50, CANVAS_WIDTH/2 + 200, CANVAS_HEIGHT/2 + 50, ACCENT_BLUE, 4)
+
+def build_scene(slide_num, data=None):
+    """Build the Scene for a slide number (and optional slideData entry)."""
+    scene = Scene()
+    get_generator(slide_num)(scene, data)
+    return scene
+
+def write_svg(scene, sink, theme=None):
+    """Serialize a Scene as a standalone SVG document into a sink.
+
+    With a Theme the token colors are remapped and the header comes from
+    the per-theme cache (see theme_header).
+    """
+    header, footer = document_fragments(theme, scene.width, scene.height)
+    with SvgWriter(sink) as svg:
+        svg.write(header)
+        svg.scene(scene, theme)
+        svg.write(footer)
+
+def document_fragments(theme=None, width=CANVAS_WIDTH, height=CANVAS_HEIGHT):
+    """(header, footer) that write_svg() puts around a scene's elements."""
+    footer = '</svg>' if OUTPUT_OPTIONS["minify"] else create_svg_footer()
+    if theme is not None:
+        return theme_header(theme, width, height), footer
+    return create_min_svg_header() if OUTPUT_OPTIONS["minify"] else create_svg_header(), footer
+
+def render_svg_mockup(slide_num, sink, data=None):
+    """Stream the SVG mockup for a slide number into a file-like sink.
+
+    `data` is an optional slideData entry that replaces the mockup copy.
+    """
+    write_svg(build_scene(slide_num, data), sink)
+
+def generate_svg_mockup(slide_num, data=None):
+    """Generate SVG mockup for a specific slide number as a string."""
+    buf = io.StringIO()
+    render_svg_mockup(slide_num, buf, data)
+    return buf.getvalue()
+
+# ============================================================================
+# SPRITE BUNDLE (--format sprite)
+# ============================================================================
+
+SPRITE_STEM = "apple_templates_sprite"
+
+def sprite_name():
+    """File name of the sprite bundle (.svgz with --svgz)."""
+    return SPRITE_STEM + output_suffix()
+
+def template_id(slide_num):
+    """Symbol id / file stem of a built-in template, e.g. apple_template_004_bar_compare."""
+    return f"apple_template_{slide_num:03d}_{template_type(slide_num)}"
+
+def render_sprite(entries, sink):
+    """Stream several slides into a single SVG sprite.
+
+    `entries` yields (symbol_id, slide_num, data). The stylesheet and the
+    background rect are emitted once in a shared <defs>; every slide becomes
+    a <symbol> that can be shown with <use href="#symbol_id"/>. Honours
+    OUTPUT_OPTIONS like write_svg() does.
+    """
+    with SvgWriter(sink) as svg:
+        if OUTPUT_OPTIONS["minify"]:
+            svg.write(f'<svg xmlns="http://www.w3.org/2000/svg"><defs>{create_min_svg_style(embed_fonts=True)}'
+                      f'<rect id="slide-bg" width="{CANVAS_WIDTH}" height="{CANVAS_HEIGHT}" fill="{_color(BG_COLOR)}"/>'
+                      f'</defs>')
+            symbol, background, close = '<symbol id="{}" viewBox="0 0 {} {}">', '<use href="#slide-bg"/>', '</symbol>'
+        else:
+            svg.write('<?xml version="1.0" encoding="UTF-8"?>\n<svg xmlns="http://www.w3.org/2000/svg">\n')
+            svg.write(create_svg_style(embed_fonts=True))
+            svg.write(f'  <defs>\n    <rect id="slide-bg" width="{CANVAS_WIDTH}" height="{CANVAS_HEIGHT}" fill="{BG_COLOR}"/>\n  </defs>\n')
+            symbol, background, close = '  <symbol id="{}" viewBox="0 0 {} {}">\n', '  <use href="#slide-bg"/>\n', '  </symbol>\n'
+        for symbol_id, slide_num, data in entries:
+            svg.write(symbol.format(symbol_id, CANVAS_WIDTH, CANVAS_HEIGHT))
+            svg.write(background)
+            svg.scene(build_scene(slide_num, data))
+            svg.write(close)
+        svg.write('</svg>' if OUTPUT_OPTIONS["minify"] else create_svg_footer())
+
+def write_sprite(entries, filepath):
+    """render_sprite() into `filepath`, gzip-compressed for .svgz (see encode_output)."""
+    buf = io.BytesIO()
+    render_sprite(entries, buf)
+    with open(filepath, 'wb') as f:
+        f.write(encode_output(buf.getvalue(), filepath))
+
+# ============================================================================
+# GOOGLE SLIDES API EXPORT (--format slides-api)
+# Turns scenes into presentations.batchUpdate request payloads so Apps Script
+# can build a whole deck with a few bulk calls instead of per-shape calls.
+# ============================================================================
+
+SLIDES_PAGE_WIDTH_PT = 720      # Default 16:9 Google Slides page (10in)
+SLIDES_API_SUFFIX = ".batchUpdate.json"
+SLIDES_ARC_STEP = math.pi / 12  # Longest arc piece (15°) when a path is flattened
+SLIDES_TRIANGLE_SIZE = 100      # pt; unit box that a path's fill triangles are mapped from
+
+_SLIDES_ALIGNMENT = {"start": "START", "middle": "CENTER", "end": "END"}
+
+def _pt(value, scale):
+    """Canvas pixels → points, rounded for stable JSON."""
+    return round(float(value) * scale, 2)
+
+def _rgb(hex_color):
+    """'#0A84FF' → Slides API RgbColor."""
+    hex_color = hex_color.lstrip("#")
+    r, g, b = (int(hex_color[i:i + 2], 16) / 255 for i in (0, 2, 4))
+    return {"red": round(r, 4), "green": round(g, 4), "blue": round(b, 4)}
+
+def _solid_fill(color, opacity=None):
+    fill = {"color": {"rgbColor": _rgb(color)}}
+    if opacity is not None:
+        fill["alpha"] = opacity
+    return fill
+
+def _element_properties(page_id, x, y, w, h, scale, flip_y=False):
+    """Size/transform placing a box at canvas (x, y, w, h)."""
+    return {
+        "pageObjectId": page_id,
+        "size": {"width": {"magnitude": _pt(w, scale), "unit": "PT"},
+                 "height": {"magnitude": _pt(h, scale), "unit": "PT"}},
+        "transform": {"scaleX": 1, "scaleY": -1 if flip_y else 1,
+                      "translateX": _pt(x, scale), "translateY": _pt(y + h if flip_y else y, scale),
+                      "unit": "PT"},
     }
-    
-    generator = generators.get(slide_type)
-    if generator:
-        return generator()
+
+def _shape_requests(object_id, page_id, shape_type, box, fill, opacity, stroke, stroke_width, scale):
+    requests = [{"createShape": {"objectId": object_id, "shapeType": shape_type,
+                                 "elementProperties": _element_properties(page_id, *box, scale)}}]
+    properties = {"outline": {"propertyState": "NOT_RENDERED"}}
+    if stroke:
+        properties["outline"] = {"outlineFill": {"solidFill": _solid_fill(stroke)},
+                                 "weight": {"magnitude": _pt(stroke_width, scale), "unit": "PT"}}
+    if fill == "none":
+        properties["shapeBackgroundFill"] = {"propertyState": "NOT_RENDERED"}
     else:
-        # Fallback to generic slide
-        return create_title()
+        properties["shapeBackgroundFill"] = {"solidFill": _solid_fill(fill, opacity)}
+    requests.append({"updateShapeProperties": {"objectId": object_id, "shapeProperties": properties,
+                                               "fields": ",".join(sorted(properties))}})
+    return requests
 
-def main():
-    """Main function to generate all SVG mockups."""
-    output_dir = "img/svg_mockups"
-    os.makedirs(output_dir, exist_ok=True)
-    
-    print(f"🎨 Generating minimal Apple-style SVG mockups...")
-    print(f"📁 Output directory: {output_dir}/")
-    print(f"🎯 Design principle: 3-4 objects maximum per slide\n")
-    
-    for i in range(1, 33):
-        slide_type = SLIDE_TYPES[i]
-        filename = f"apple_template_{i:03d}_{slide_type}.svg"
-        filepath = os.path.join(output_dir, filename)
-        
-        svg_content = generate_svg_mockup(i)
-        
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(svg_content)
-        
-        print(f"  ✓ {i:2d}. {filename}")
-    
-    print(f"\n✨ Successfully generated 32 minimal SVG mockups!")
+def _path_box(d):
+    """Bounding box of a pie-wedge path ("M cx cy L ... A r r ...") or a polyline."""
+    tokens = d.replace(",", " ").split()
+    if "A" in tokens:
+        cx, cy = float(tokens[1]), float(tokens[2])
+        r = float(tokens[tokens.index("A") + 1])
+        return cx - r, cy - r, 2 * r, 2 * r
+    numbers = [float(t) for t in tokens if t not in ("M", "L", "Z")]
+    xs, ys = numbers[0::2], numbers[1::2]
+    return min(xs), min(ys), max(xs) - min(xs), max(ys) - min(ys)
+
+def _line_requests(object_id, page_id, x1, y1, x2, y2, color, opacity, width, scale):
+    x, y = min(x1, x2), min(y1, y2)
+    flip = (x2 - x1) * (y2 - y1) < 0
+    properties = {"lineFill": {"solidFill": _solid_fill(color, opacity)},
+                  "weight": {"magnitude": _pt(width, scale), "unit": "PT"}}
+    return [
+        {"createLine": {"objectId": object_id, "lineCategory": "STRAIGHT",
+                        "elementProperties": _element_properties(page_id, x, y, abs(x2 - x1), abs(y2 - y1),
+                                                                 scale, flip)}},
+        {"updateLineProperties": {"objectId": object_id, "lineProperties": properties,
+                                  "fields": "lineFill,weight"}},
+    ]
+
+def path_outline(d):
+    """Outline of a pie-wedge ("M cx cy L x y A r r 0 large sweep x y Z") or polyline path.
+
+    Arcs are flattened into segments of at most SLIDES_ARC_STEP radians.
+    Returns the (x, y) vertices (closed paths end on their first vertex),
+    or None for path data that uses any other command.
+    """
+    tokens = d.replace(",", " ").split()
+    commands = [token for token in tokens if token.isalpha()]
+    if tokens[:1] != ["M"] or not set(commands) <= {"M", "L", "A", "Z"}:
+        return None
+    try:
+        if "A" in commands:
+            if len(tokens) != 15 or [tokens[3], tokens[6], tokens[14]] != ["L", "A", "Z"]:
+                return None
+            cx, cy, sx, sy, r, ex, ey = (float(tokens[i]) for i in (1, 2, 4, 5, 7, 12, 13))
+            start = math.atan2(sy - cy, sx - cx)
+            sweep = (math.atan2(ey - cy, ex - cx) - start) % (2 * math.pi)
+            if tokens[11] == "0":
+                sweep -= 2 * math.pi
+            steps = max(1, math.ceil(abs(sweep) / SLIDES_ARC_STEP))
+            points = [(cx, cy)] + [(cx + r * math.cos(start + sweep * i / steps),
+                                    cy + r * math.sin(start + sweep * i / steps)) for i in range(steps + 1)]
+        else:
+            numbers = [float(token) for token in tokens if token not in ("M", "L", "Z")]
+            if len(numbers) % 2:
+                return None
+            points = list(zip(numbers[0::2], numbers[1::2]))
+    except ValueError:
+        return None
+    if "Z" in commands and points[0] != points[-1]:
+        points.append(points[0])
+    return points
+
+def _cross(o, a, b):
+    return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+def triangulate(points):
+    """Ear-clipping triangulation of a simple polygon.
+
+    `points` may end on its first vertex. Returns a list of (a, b, c)
+    vertex triples; zero-area pieces are dropped.
+    """
+    polygon = [point for i, point in enumerate(points) if point != points[i - 1]]
+    if len(polygon) < 3:
+        return []
+    area = sum(_cross((0, 0), polygon[i - 1], polygon[i]) for i in range(len(polygon)))
+    if area < 0:
+        polygon.reverse()
+    triangles = []
+    while len(polygon) > 3:
+        n = len(polygon)
+        for i in range(n):
+            a, b, c = polygon[i - 1], polygon[i], polygon[(i + 1) % n]
+            turn = _cross(a, b, c)
+            if turn < 0:
+                continue
+            if turn == 0:  # Collinear vertex: drop it without a triangle
+                del polygon[i]
+                break
+            if not any(p not in (a, b, c) and _cross(a, b, p) >= 0 and _cross(b, c, p) >= 0
+                       and _cross(c, a, p) >= 0 for p in polygon):
+                triangles.append((a, b, c))
+                del polygon[i]
+                break
+        else:
+            return triangles  # Self-intersecting: keep what was clipped
+    if _cross(*polygon):
+        triangles.append(tuple(polygon))
+    return triangles
+
+def _triangle_requests(object_id, page_id, a, b, c, fill, opacity, scale):
+    """A filled RIGHT_TRIANGLE mapped onto canvas vertices a, b, c.
+
+    The shape's corners (0, 0), (0, s), (s, s) of its s×s box land on a, b
+    and c through the element's affine transform.
+    """
+    size = SLIDES_TRIANGLE_SIZE
+    (ax, ay), (bx, by), (cx, cy) = ((_pt(x, scale), _pt(y, scale)) for x, y in (a, b, c))
+    transform = {"scaleX": round((cx - bx) / size, 6), "scaleY": round((by - ay) / size, 6),
+                 "shearX": round((bx - ax) / size, 6), "shearY": round((cy - by) / size, 6),
+                 "translateX": ax, "translateY": ay, "unit": "PT"}
+    properties = {"outline": {"propertyState": "NOT_RENDERED"},
+                  "shapeBackgroundFill": {"solidFill": _solid_fill(fill, opacity)}}
+    return [
+        {"createShape": {"objectId": object_id, "shapeType": "RIGHT_TRIANGLE",
+                         "elementProperties": {"pageObjectId": page_id,
+                                               "size": {"width": {"magnitude": size, "unit": "PT"},
+                                                        "height": {"magnitude": size, "unit": "PT"}},
+                                               "transform": transform}}},
+        {"updateShapeProperties": {"objectId": object_id, "shapeProperties": properties,
+                                   "fields": "outline,shapeBackgroundFill"}},
+    ]
+
+def element_to_slides_requests(element, object_id, page_id, scale):
+    """Translate one scene record into Slides API requests.
+
+    Text boxes are positioned from the SVG baseline and sized with
+    measure_text(). The API has no freeform shapes, so a path's outline
+    (see path_outline) is triangulated and each piece becomes a filled,
+    affine-mapped RIGHT_TRIANGLE; unsupported path data yields no requests
+    (scene_to_slides_requests() reports it).
+    """
+    kind = element.kind
+    if kind == "rect":
+        shape = "ROUND_RECTANGLE" if element.radius else "RECTANGLE"
+        box = (element.x, element.y, element.w, element.h)
+        return _shape_requests(object_id, page_id, shape, box, element.fill, element.opacity,
+                               element.stroke, element.stroke_width, scale)
+    if kind == "circle":
+        r = element.r
+        box = (element.cx - r, element.cy - r, 2 * r, 2 * r)
+        return _shape_requests(object_id, page_id, "ELLIPSE", box, element.fill, element.opacity,
+                               element.stroke, element.stroke_width, scale)
+    if kind == "path":
+        requests = []
+        for i, (a, b, c) in enumerate(triangulate(path_outline(element.d) or [])):
+            requests.extend(_triangle_requests(f"{object_id}_{i:03d}", page_id, a, b, c, element.fill,
+                                               element.opacity, scale))
+        return requests
+    if kind == "line":
+        return _line_requests(object_id, page_id, element.x1, element.y1, element.x2, element.y2,
+                              element.stroke, element.opacity, element.stroke_width, scale)
+    if kind == "text":
+        lines = text_lines(element.text)
+        text = "\n".join(lines)
+        if not text:
+            return []  # insertText rejects empty strings
+        # Measured width plus room for the text box's inner padding
+        width = max(measure_text(line, element.size, element.weight) for line in lines) + element.size * 0.5
+        height = element.size * (1.4 + LINE_HEIGHT * (len(lines) - 1))
+        x = element.x - {"start": 0, "middle": width / 2, "end": width}[element.anchor]
+        y = element.y - element.size
+        style = {"fontFamily": "Inter",
+                 "fontSize": {"magnitude": _pt(element.size, scale), "unit": "PT"},
+                 "bold": int(element.weight) >= 600,
+                 "foregroundColor": {"opaqueColor": {"rgbColor": _rgb(element.fill)}}}
+        return [
+            {"createShape": {"objectId": object_id, "shapeType": "TEXT_BOX",
+                             "elementProperties": _element_properties(page_id, x, y, width, height, scale)}},
+            {"insertText": {"objectId": object_id, "text": text}},
+            {"updateTextStyle": {"objectId": object_id, "style": style,
+                                 "fields": "fontFamily,fontSize,bold,foregroundColor"}},
+            {"updateParagraphStyle": {"objectId": object_id,
+                                      "style": {"alignment": _SLIDES_ALIGNMENT[element.anchor]},
+                                      "fields": "alignment"}},
+        ]
+    raise ValueError(f"no Slides API mapping for element kind {kind!r}")
+
+def scene_to_slides_requests(scene, page_id, insertion_index, page_width_pt=SLIDES_PAGE_WIDTH_PT):
+    """(requests, warnings): the requests that create one slide and draw
+    every element of a scene, and messages for elements left out."""
+    scale = page_width_pt / scene.width
+    requests = [
+        {"createSlide": {"objectId": page_id, "insertionIndex": insertion_index,
+                         "slideLayoutReference": {"predefinedLayout": "BLANK"}}},
+        {"updatePageProperties": {"objectId": page_id,
+                                  "pageProperties": {"pageBackgroundFill": {"solidFill": _solid_fill(BG_COLOR)}},
+                                  "fields": "pageBackgroundFill.solidFill.color"}},
+    ]
+    skipped = 0
+    for n, element in enumerate(scene):
+        requests.extend(element_to_slides_requests(element, f"{page_id}_e{n:02d}", page_id, scale))
+        if element.kind == "path" and path_outline(element.d) is None:
+            skipped += 1
+    warnings = [f"{page_id}: {skipped} path(s) with unsupported commands skipped"] if skipped else []
+    return requests, warnings
+
+def deck_to_slides_payload(slides, deck_index=0):
+    """(payload, warnings): one batchUpdate payload built from
+    (slide_index, slide_num, data) entries, and the slides' export warnings."""
+    requests, warnings = [], []
+    for position, (slide_index, slide_num, data) in enumerate(slides):
+        page_id = f"d{deck_index:04d}_s{slide_index:03d}"
+        slide_requests, slide_warnings = scene_to_slides_requests(build_scene(slide_num, data), page_id, position)
+        requests.extend(slide_requests)
+        warnings.extend(slide_warnings)
+    return {"requests": requests}, warnings
+
+def write_slides_payload(payload, filepath):
+    """Write a batchUpdate payload as deterministic, compact JSON."""
+    with open(filepath, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False, separators=(",", ":"))
+
+# ============================================================================
+# BATCH RENDERING (streams slideData decks one slide at a time)
+# ============================================================================
+
+def _iter_json_array(fp, chunk_size=1 << 16):
+    """Yield the elements of a top-level JSON array without loading it whole.
+
+    Reads are always `chunk_size`; the buffer only grows past that while a
+    single element is incomplete, and elements are decoded in place at
+    `pos` instead of slicing the buffer after each one. Separators are
+    checked like json.load() does: exactly one comma between elements.
+    """
+    decoder = json.JSONDecoder()
+    buf, pos = "", 0
+    expect = "["  # Then "first" (element or "]"), "next" ("," or "]") and "element"
+    while True:
+        # Skip whitespace, refilling the buffer as needed
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n":
+                pos += 1
+            if pos < len(buf):
+                break
+            buf, pos = fp.read(chunk_size), 0
+            if not buf:
+                raise ValueError("slideData: unexpected end of JSON array")
+        char = buf[pos]
+        if expect == "[":
+            if char != "[":
+                raise ValueError("slideData: expected a JSON array")
+            expect = "first"
+            pos += 1
+            continue
+        if expect == "next":
+            if char == "]":
+                return
+            if char != ",":
+                raise ValueError(f"slideData: expected ',' or ']' after an array element, found {char!r}")
+            expect = "element"
+            pos += 1
+            continue
+        if char == "]" and expect == "first":
+            return
+        if char in ",]":
+            raise ValueError(f"slideData: expected an array element, found {char!r}")
+        error = None
+        try:
+            value, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError as e:
+            error, end = e, None
+        if end is None or end == len(buf):
+            # Incomplete (or possibly truncated, e.g. a number cut at the boundary)
+            more = fp.read(chunk_size)
+            if more:
+                buf, pos = buf[pos:] + more, 0
+                continue
+            if error is not None:
+                raise error
+        yield value
+        pos = end
+        expect = "next"
+
+def iter_slide_data(fp, jsonl=False):
+    """Yield (deck_index, slide_index, slide) from a slideData stream.
+
+    A JSON array is read incrementally: it is either one deck (an array of
+    slide objects, as passed to generateSlidesFromWebApp) or an array of
+    decks, and a ValueError is raised when it mixes the two. With `jsonl`,
+    every non-blank line is one deck.
+    """
+    if jsonl:
+        decks = (json.loads(line) for line in fp if line.strip())
+        for deck_index, deck in enumerate(decks):
+            # A line that is not an array is one (possibly malformed) slide
+            for slide_index, slide in enumerate(deck if isinstance(deck, list) else [deck]):
+                yield deck_index, slide_index, slide
+        return
+    decks = None  # Whether the array holds decks, set by its first element
+    for position, entry in enumerate(_iter_json_array(fp)):
+        if decks is None:
+            decks = isinstance(entry, list)
+        elif decks != isinstance(entry, list):
+            raise ValueError(f"slideData: element {position} is a {'slide' if decks else 'deck'}, but the array "
+                             f"started with a {'deck' if decks else 'slide'} (mixed decks and slides)")
+        if decks:
+            for slide_index, slide in enumerate(entry):
+                yield position, slide_index, slide
+        else:
+            yield 0, position, entry
+
+def resolve_batch(slides):
+    """Attach template numbers to slideData entries, yielding
+    (deck, index, slide_num, slide).
+
+    Entries whose type has no matching template, or whose fields have the
+    wrong JSON types (see slide_data_error), are reported and skipped,
+    like createPresentation does for unknown slide types.
+    """
+    for deck_index, slide_index, slide in slides:
+        slide_num = None
+        error = slide_data_error(slide)
+        if error is None:
+            slide_num = resolve_slide_num(slide)
+            if slide_num is None:
+                error = f"unsupported type {slide.get('type')!r}"
+        if error is not None:
+            print(f"  ⚠ deck {deck_index} slide {slide_index}: {error}, skipped", file=sys.stderr)
+            continue
+        yield deck_index, slide_index, slide_num, slide
+
+def batch_slide_id(deck_index, slide_index, slide_num):
+    """'/'-separated id of a batch slide: its output path without the extension."""
+    return f"deck_{deck_index:04d}/slide_{slide_index:03d}_{template_type(slide_num)}"
+
+def batch_filename(deck_index, slide_index, slide_num):
+    """Relative output path for a rendered batch slide."""
+    return batch_slide_id(deck_index, slide_index, slide_num).replace("/", os.sep) + output_suffix()
+
+# ============================================================================
+# PARALLEL RENDERING (--jobs N)
+# ============================================================================
+
+class _HashingSink:
+    """Binary file wrapper that hashes and counts the bytes written through it."""
+
+    def __init__(self, f):
+        self.f = f
+        self.sha = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        self.sha.update(data)
+        self.size += len(data)
+        return self.f.write(data)
+
+def render_job(job):
+    """Render one (slide_num, data, filepath, previous_digest) job to disk.
+
+    With `previous_digest` None the SVG is streamed straight into the file
+    (and hashed on the way). Otherwise (incremental builds) it is rendered
+    and hashed first, and the file is only rewritten when the hash differs
+    from `previous_digest`. Returns (slide_num, filepath, size, digest,
+    written, timing): `digest` and `size` describe the bytes on disk (gzip
+    for .svgz) and `timing` is None unless instrumentation is enabled (see
+    _timed_render_job).
+    """
+    if _instrumentation["enabled"]:
+        return _timed_render_job(*job)
+    slide_num, data, filepath, previous_digest = job
+    return write_scene(slide_num, build_scene(slide_num, data), filepath, previous_digest)
+
+def write_scene(slide_num, scene, filepath, previous_digest=None):
+    """Write a built Scene the way render_job() does; returns its result tuple."""
+    if previous_digest is None and not filepath.endswith(SVGZ_SUFFIX):
+        with open(filepath, 'wb') as f:
+            sink = _HashingSink(f)
+            write_svg(scene, sink)
+        return slide_num, filepath, sink.size, sink.sha.hexdigest(), True, None
+    buf = io.StringIO()
+    write_svg(scene, buf)
+    stored = encode_output(buf.getvalue().encode('utf-8'), filepath)
+    digest = hashlib.sha256(stored).hexdigest()  # Hash and size both describe the bytes on disk
+    written = previous_digest is None or digest != previous_digest or not os.path.exists(filepath)
+    if written:
+        with open(filepath, 'wb') as f:
+            f.write(stored)
+    return slide_num, filepath, len(stored), digest, written, None
+
+def render_indexed_job(job):
+    """render_job() for a ViewerIndex: returns (result, visual object count)."""
+    slide_num, data, filepath, previous_digest = job
+    scene = build_scene(slide_num, data)
+    if _instrumentation["enabled"]:
+        return _timed_render_job(*job), count_objects(scene)
+    return write_scene(slide_num, scene, filepath, previous_digest), count_objects(scene)
+
+def render_variants_job(job):
+    """Render one (slide_num, data, variants) matrix job to disk.
+
+    `variants` holds (canvas_name, ((theme_name, filepath), ...)) pairs. The
+    Scene is built once, fitted once per canvas and serialized once per
+    theme. Returns a list of render_job()-style results.
+    """
+    slide_num, data, variants = job
+    scene = build_scene(slide_num, data)
+    results = []
+    for canvas_name, outputs in variants:
+        fitted = CANVASES[canvas_name].fit(scene)
+        for theme_name, filepath in outputs:
+            theme = THEMES[theme_name]
+            if filepath.endswith(SVGZ_SUFFIX):
+                buf = io.StringIO()
+                write_svg(fitted, buf, theme)
+                stored = encode_output(buf.getvalue().encode('utf-8'), filepath)
+                with open(filepath, 'wb') as f:
+                    f.write(stored)
+                size = len(stored)
+            else:
+                with open(filepath, 'w', encoding='utf-8') as f:
+                    write_svg(fitted, f, theme)
+                    size = f.tell()
+            results.append((slide_num, filepath, size, None, True, None))
+    return results
+
+def _render_chunk(chunk, render=render_job):
+    """Process-pool entry point: render a list of jobs in one task."""
+    return [render(job) for job in chunk]
+
+def _init_worker(font_options, output_options, instrumentation, module_path=None):
+    """Process-pool initializer: replay render options set in the parent.
+
+    `module_path` is set when the jobs come from a --watch reload. Workers
+    started with the spawn method do not inherit that module, so it is
+    executed again here before any job naming it is unpickled.
+    """
+    module = sys.modules[__name__]
+    if module_path is not None:
+        module = sys.modules.get(_WATCH_MODULE) or _exec_generator_module(module_path)
+    module.FONT_OPTIONS.update(font_options)
+    module.OUTPUT_OPTIONS.update(output_options)
+    module._instrumentation.update(instrumentation)
+
+def run_jobs(jobs, workers=1, chunk_size=None, render=render_job):
+    """Render jobs and yield their results in input order.
+
+    With `workers` > 1 the jobs are split into chunks of `chunk_size` and
+    spread over a ProcessPoolExecutor. At most two chunks per worker are in
+    flight, so `jobs` may be an unbounded generator. Falls back to serial
+    rendering when a process pool cannot be started, or for the remaining
+    jobs when a worker dies (killed, out of memory) mid-run. `render` is the
+    module-level job function (render_job or render_variants_job).
+    """
+    if workers > 1:
+        try:
+            module_path = __file__ if __name__ == _WATCH_MODULE else None
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                           initargs=(dict(FONT_OPTIONS), dict(OUTPUT_OPTIONS), dict(_instrumentation),
+                                                     module_path))
+        except (OSError, NotImplementedError, ImportError) as e:
+            print(f"  ⚠ process pool unavailable ({e}), rendering serially", file=sys.stderr)
+            workers = 1
+    if workers <= 1:
+        for job in jobs:
+            yield render(job)
+        return
+
+    jobs = iter(jobs)
+    chunk_size = chunk_size or 64
+    pending = deque()  # (chunk, future) in submission order
+    with executor:
+        try:
+            while True:
+                while len(pending) < workers * 2:
+                    chunk = list(itertools.islice(jobs, chunk_size))
+                    if not chunk:
+                        break
+                    pending.append((chunk, None))  # Queued first: submit() raises once the pool is broken
+                    pending[-1] = (chunk, executor.submit(_render_chunk, chunk, render))
+                if not pending:
+                    return
+                results = pending[0][1].result()
+                pending.popleft()
+                yield from results
+        except BrokenProcessPool as e:
+            print(f"  ⚠ process pool broke ({e}), rendering the remaining jobs serially", file=sys.stderr)
+    for chunk, _ in pending:
+        yield from _render_chunk(chunk, render)
+    for job in jobs:
+        yield render(job)
+
+def run_indexed(jobs, workers=1, chunk_size=None, index=None):
+    """run_jobs() that also records every result in a ViewerIndex (if given)."""
+    if index is None:
+        yield from run_jobs(jobs, workers, chunk_size)
+        return
+    for result, objects in run_jobs(jobs, workers, chunk_size, render_indexed_job):
+        index.record(*result[:4], objects)
+        yield result
+
+def _resolve_workers(jobs):
+    """Translate the --jobs value (0 = all CPUs) into a worker count."""
+    return jobs if jobs > 0 else (os.cpu_count() or 1)
+
+def template_jobs(output_dir, templates=None):
+    """Jobs for the built-in mockups (or the given template numbers)."""
+    for i in range(1, 33) if templates is None else templates:
+        yield i, None, os.path.join(output_dir, template_id(i) + output_suffix()), None
+
+def matrix_jobs(output_dir, templates, themes, canvases):
+    """One render_variants_job() job per template covering every theme × canvas."""
+    for canvas in canvases:
+        for theme in themes:
+            os.makedirs(os.path.join(output_dir, variant_name(theme, canvas)), exist_ok=True)
+    for i in templates:
+        filename = template_id(i) + output_suffix()
+        yield i, None, tuple((canvas.name, tuple((theme.name, os.path.join(output_dir, variant_name(theme, canvas),
+                                                                           filename)) for theme in themes))
+                             for canvas in canvases)
+
+def batch_jobs(fp, output_dir, jsonl=False, create_dirs=True):
+    """Jobs for every renderable slide in a slideData stream."""
+    made_dirs = set()
+    for deck_index, slide_index, slide_num, slide in resolve_batch(iter_slide_data(fp, jsonl)):
+        filepath = os.path.join(output_dir, batch_filename(deck_index, slide_index, slide_num))
+        if create_dirs and deck_index not in made_dirs:
+            os.makedirs(os.path.dirname(filepath), exist_ok=True)
+            made_dirs.add(deck_index)
+        yield slide_num, slide, filepath, None
+
+# ============================================================================
+# INSTRUMENTATION (--metrics, --profile, --trace-memory)
+# ============================================================================
+
+# Off by default: render_job() then pays a single dict lookup per slide
+_instrumentation = {"enabled": False}
+
+def configure_instrumentation(enabled):
+    """Turn per-slide timing in render_job() on or off."""
+    _instrumentation["enabled"] = bool(enabled)
+
+def _timed_render_job(slide_num, data, filepath, previous_digest):
+    """render_job() with build / serialize / write phases timed separately.
+
+    The document is serialized in memory so the write latency covers only
+    the file write. Returns render_job()'s tuple with timing set to
+    (build_seconds, serialize_seconds, write_seconds, element_count).
+    """
+    clock = time.perf_counter
+    t0 = clock()
+    scene = build_scene(slide_num, data)
+    t1 = clock()
+    buf = io.StringIO()
+    write_svg(scene, buf)
+    stored = encode_output(buf.getvalue().encode('utf-8'), filepath)
+    digest = hashlib.sha256(stored).hexdigest()
+    t2 = clock()
+    written = previous_digest is None or digest != previous_digest or not os.path.exists(filepath)
+    if written:
+        with open(filepath, 'wb') as f:
+            f.write(stored)
+    t3 = clock()
+    return slide_num, filepath, len(stored), digest, written, (t1 - t0, t2 - t1, t3 - t2, len(scene))
+
+class RenderMetrics:
+    """Per-template render statistics aggregated from render_job() results.
+
+    Exported as a JSON summary or as a Prometheus textfile for the
+    node_exporter textfile collector.
+    """
+
+    FIELDS = ("slides", "build_seconds", "serialize_seconds", "write_seconds", "write_seconds_max",
+              "elements", "bytes")
+
+    def __init__(self):
+        self.templates = {}
+        self.started = time.time()
+        self.run_seconds = None
+        self.memory = None
+
+    def observe(self, result):
+        """Add one render_job() result (ignored when it carries no timing)."""
+        slide_num, _, size, _, written, timing = result
+        if timing is None:
+            return
+        build, serialize, write, elements = timing
+        stats = self.templates.get(slide_num)
+        if stats is None:
+            stats = self.templates[slide_num] = dict.fromkeys(self.FIELDS, 0)
+        stats["slides"] += 1
+        stats["build_seconds"] += build
+        stats["serialize_seconds"] += serialize
+        stats["write_seconds"] += write
+        stats["write_seconds_max"] = max(stats["write_seconds_max"], write)
+        stats["elements"] += elements
+        stats["bytes"] += size
+
+    def summary(self):
+        """JSON-ready summary: per-template stats plus totals."""
+        templates = {}
+        totals = dict.fromkeys(self.FIELDS, 0)
+        for slide_num in sorted(self.templates):
+            stats = self.templates[slide_num]
+            templates[template_label(slide_num)] = dict(
+                stats, render_seconds=stats["build_seconds"] + stats["serialize_seconds"])
+            for field in self.FIELDS:
+                if field.endswith("_max"):
+                    totals[field] = max(totals[field], stats[field])
+                else:
+                    totals[field] += stats[field]
+        totals["render_seconds"] = totals["build_seconds"] + totals["serialize_seconds"]
+        summary = {"started": self.started, "run_seconds": self.run_seconds, "totals": totals,
+                   "templates": templates}
+        if self.memory is not None:
+            summary["tracemalloc"] = self.memory
+        return summary
+
+    def write_json(self, fp):
+        json.dump(self.summary(), fp, indent=2)
+        fp.write("\n")
+
+    def write_prometheus(self, fp):
+        """Write gauges in the Prometheus text exposition format."""
+        summary = self.summary()
+        gauges = (
+            ("slides", "Slides rendered"),
+            ("render_seconds", "Time spent building and serializing slides"),
+            ("build_seconds", "Time spent building slide scenes"),
+            ("serialize_seconds", "Time spent serializing scenes to SVG"),
+            ("write_seconds", "Time spent writing SVG files"),
+            ("write_seconds_max", "Slowest single SVG file write"),
+            ("elements", "Scene elements rendered"),
+            ("bytes", "SVG bytes written"),
+        )
+        for field, help_text in gauges:
+            name = f"svg_mockup_{field}"
+            fp.write(f"# HELP {name} {help_text}.\n# TYPE {name} gauge\n")
+            for label, stats in summary["templates"].items():
+                fp.write(f'{name}{{template="{label}"}} {stats[field]}\n')
+        fp.write("# HELP svg_mockup_run_seconds Wall time of the last generator run.\n"
+                 "# TYPE svg_mockup_run_seconds gauge\n"
+                 f"svg_mockup_run_seconds {summary['run_seconds'] or 0}\n"
+                 "# HELP svg_mockup_last_run_timestamp_seconds Start time of the last generator run.\n"
+                 "# TYPE svg_mockup_last_run_timestamp_seconds gauge\n"
+                 f"svg_mockup_last_run_timestamp_seconds {self.started}\n")
+        if self.memory is not None:
+            fp.write("# HELP svg_mockup_tracemalloc_peak_bytes Peak traced Python memory.\n"
+                     "# TYPE svg_mockup_tracemalloc_peak_bytes gauge\n"
+                     f"svg_mockup_tracemalloc_peak_bytes {self.memory['peak_bytes']}\n")
+
+    def save(self, path, fmt="json"):
+        """Write the summary ('-' = stdout); files are replaced atomically."""
+        write = self.write_prometheus if fmt == "prometheus" else self.write_json
+        if path == "-":
+            write(sys.stdout)
+            return
+        tmp = path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            write(f)
+        os.replace(tmp, path)
+
+def template_label(slide_num):
+    """Metric label for a template, e.g. '004_bar_compare'."""
+    return f"{slide_num:03d}_{template_type(slide_num)}"
+
+@contextlib.contextmanager
+def profiling(profile_path=None, trace_memory=False, metrics=None, top=15):
+    """Optionally run the body under cProfile and/or tracemalloc.
+
+    cProfile stats are dumped to `profile_path` (pstats format) and the top
+    entries by cumulative time printed to stderr. tracemalloc's peak and
+    top allocation sites go into `metrics` (or stderr without it). Only the
+    calling process is traced, so use -j 1 to profile rendering itself.
+    """
+    profiler = cProfile.Profile() if profile_path else None
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        if metrics is not None:
+            metrics.run_seconds = time.perf_counter() - start
+        if profiler is not None:
+            profiler.dump_stats(profile_path)
+            pstats.Stats(profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(top)
+        if trace_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            sites = tracemalloc.take_snapshot().statistics("lineno")[:top]
+            tracemalloc.stop()
+            memory = {"peak_bytes": peak,
+                      "top": [{"site": str(stat.traceback), "bytes": stat.size, "count": stat.count}
+                              for stat in sites]}
+            if metrics is not None:
+                metrics.memory = memory
+            else:
+                print(f"🧠 tracemalloc peak: {peak:,} bytes", file=sys.stderr)
+                for site in memory["top"]:
+                    print(f"  {site['bytes']:>12,} B  {site['count']:>7,}×  {site['site']}", file=sys.stderr)
+
+# ============================================================================
+# INCREMENTAL BUILDS (--incremental)
+# ============================================================================
+
+MANIFEST_NAME = ".svg_manifest.json"
+
+def input_fingerprint(slide_num, data=None):
+    """Fingerprint everything a rendered slide depends on.
+
+    That is the generator, every helper, serializer and design token it
+    reaches (see template_dependencies) and the slideData entry, so an
+    edit anywhere on the render path invalidates the slides it affects.
+    """
+    return dependency_fingerprint(slide_num, data)
+
+class BuildManifest:
+    """Input fingerprints and output hashes of the previous build.
+
+    `filter()` drops jobs whose inputs are unchanged and whose output is
+    still on disk; `record()` stores the result of every job that ran.
+    """
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self.path = os.path.join(output_dir, MANIFEST_NAME)
+        self.entries = {}
+        self.skipped = []
+        self.unchanged = []
+        self.rewritten = []
+        self._pending = {}
+        if os.path.exists(self.path):
+            with open(self.path, encoding='utf-8') as f:
+                self.entries = json.load(f).get("entries", {})
+
+    def _intact(self, entry, filepath):
+        """Whether the output on disk still looks like the one `entry` recorded."""
+        return entry is not None and os.path.exists(filepath) and os.path.getsize(filepath) == entry.get("size")
+
+    def _is_fresh(self, entry, fingerprint, filepath):
+        return entry is not None and entry.get("input") == fingerprint and self._intact(entry, filepath)
+
+    def filter(self, jobs, index=None):
+        """Yield only the jobs that need rendering, tagged for hash comparison.
+
+        Skipped jobs are handed to `index` (a ViewerIndex tracking `jobs`)
+        at once, so its pages do not wait for close().
+        """
+        for slide_num, data, filepath, _ in jobs:
+            key = os.path.relpath(filepath, self.output_dir).replace(os.sep, "/")
+            fingerprint = input_fingerprint(slide_num, data)
+            entry = self.entries.get(key)
+            if self._is_fresh(entry, fingerprint, filepath):
+                self.skipped.append(key)
+                if index is not None:
+                    index.skip(filepath)
+                continue
+            self._pending[filepath] = (key, fingerprint)
+            # An output edited or truncated on disk is rewritten even if the render matches the manifest
+            yield slide_num, data, filepath, entry.get("output", "") if self._intact(entry, filepath) else ""
+
+    def record(self, result):
+        """Store the outcome of a rendered job."""
+        _, filepath, size, digest, written, _ = result
+        key, fingerprint = self._pending.pop(filepath)
+        self.entries[key] = {"input": fingerprint, "output": digest, "size": size}
+        (self.rewritten if written else self.unchanged).append(key)
+
+    def save(self):
+        """Atomically write the manifest next to the outputs."""
+        tmp = self.path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({"version": 1, "entries": self.entries}, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.path)
+
+    def summary(self):
+        """One-line report of what was rebuilt and what was skipped."""
+        return (f"{len(self.rewritten)} written, {len(self.unchanged)} re-rendered but identical, "
+                f"{len(self.skipped)} skipped (inputs unchanged)")
+
+def write_batch(data_path, output_dir, jsonl=False, workers=1, chunk_size=None, progress_every=1000,
+                manifest=None, metrics=None, index=None):
+    """Render a slideData file (or '-' for stdin) into `output_dir`.
+
+    Slides are written as soon as they are rendered; returns the number of
+    slides rendered. With a BuildManifest, unchanged slides are skipped;
+    with RenderMetrics, per-template timings are collected; with a
+    ViewerIndex, every slide is listed for svg_viewer.html.
+    """
+    jsonl = jsonl or data_path.endswith((".jsonl", ".ndjson"))
+    fp = sys.stdin if data_path == "-" else open(data_path, encoding="utf-8")
+    count = 0
+    try:
+        jobs = batch_jobs(fp, output_dir, jsonl)
+        if index is not None:
+            jobs = index.track(jobs)
+        if manifest is not None:
+            jobs = manifest.filter(jobs, index)
+        for count, result in enumerate(run_indexed(jobs, workers, chunk_size, index), 1):
+            if manifest is not None:
+                manifest.record(result)
+            if metrics is not None:
+                metrics.observe(result)
+            if progress_every and count % progress_every == 0:
+                print(f"  … {count} slides", file=sys.stderr)
+    finally:
+        if fp is not sys.stdin:
+            fp.close()
+    return count
+
+# ============================================================================
+# VIEWER INDEX (svg_index.json: paged slide manifest read by svg_viewer.html)
+# ============================================================================
+
+VIEWER_INDEX_NAME = "svg_index.json"
+VIEWER_PAGE_DIR = "svg_index"
+VIEWER_PAGE_SIZE = 64               # Slides per page file; the viewer fetches pages as they scroll in
+
+class ViewerIndex:
+    """Paged manifest of the slides in an output directory.
+
+    VIEWER_INDEX_NAME holds the slide count, page size and page files;
+    each page (svg_index/page_NNNN.json) lists up to VIEWER_PAGE_SIZE
+    slides as {id, type, template, objects, bytes, hash, thumb}, where
+    `thumb` is the SVG's path relative to the index. `track()` fixes the
+    slide order, `record()` fills in rendered slides and `skip()` slides
+    that --incremental left alone (from the previous index, or re-hashed
+    from disk), in any order. Every page is written as soon as it is
+    complete, so only the pages in flight are held in memory.
+    """
+
+    def __init__(self, output_dir, incremental=False, sprite=None):
+        self.output_dir = output_dir
+        self.path = os.path.join(output_dir, VIEWER_INDEX_NAME)
+        self._prefix = os.path.join(output_dir, "")  # Job paths are built from it (see _entry)
+        self.sprite = sprite
+        self.count = 0
+        self.pages = 0
+        self._slots = {}        # position → entry, or None while the slide is not recorded
+        self._positions = {}    # filepath → position
+        self._previous = self._load_previous() if incremental else {}
+
+    def _load_previous(self):
+        entries = {}
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                index = json.load(f)
+            for page in index["pages"]:
+                with open(os.path.join(self.output_dir, page), encoding='utf-8') as f:
+                    entries.update((entry["id"], entry) for entry in json.load(f)["slides"])
+        except (OSError, ValueError, KeyError):
+            pass
+        return entries
+
+    def track(self, jobs):
+        """Register jobs in output order; place this before any filtering."""
+        for job in jobs:
+            self._positions[job[2]] = (self.count, job[0])
+            self._slots[self.count] = None
+            self.count += 1
+            yield job
+
+    def _entry(self, slide_num, filepath, size, digest, objects):
+        if filepath.startswith(self._prefix):
+            thumb = filepath[len(self._prefix):].replace(os.sep, "/")
+        else:
+            thumb = os.path.relpath(filepath, self.output_dir).replace(os.sep, "/")
+        return {"id": thumb.rsplit(".", 1)[0], "type": template_type(slide_num), "template": slide_num,
+                "objects": objects, "bytes": size, "hash": digest, "thumb": thumb}
+
+    def record(self, slide_num, filepath, size, digest, objects):
+        """Fill in one rendered slide and write any page that is now complete."""
+        position, _ = self._positions.pop(filepath)
+        self._slots[position] = self._entry(slide_num, filepath, size, digest, objects)
+        self._flush()
+
+    def skip(self, filepath):
+        """Fill in one slide that was not rendered this run and write any page that is now complete."""
+        position, slide_num = self._positions.pop(filepath)
+        self._slots[position] = self._skipped_entry(slide_num, filepath)
+        self._flush()
+
+    def _flush(self, final=False):
+        while self.pages * VIEWER_PAGE_SIZE < self.count:
+            start = self.pages * VIEWER_PAGE_SIZE
+            stop = min(start + VIEWER_PAGE_SIZE, self.count)
+            if stop - start < VIEWER_PAGE_SIZE and not final:
+                return
+            if not final and any(self._slots[i] is None for i in range(start, stop)):
+                return
+            self._write_page([self._slots.pop(i) for i in range(start, stop)])
+
+    def _skipped_entry(self, slide_num, filepath):
+        """Entry for a slide that was not rendered this run (--incremental)."""
+        entry = self._entry(slide_num, filepath, 0, None, None)
+        previous = self._previous.get(entry["id"])
+        if previous is not None:
+            return previous
+        with open(filepath, 'rb') as f:
+            content = f.read()
+        entry.update(bytes=len(content), hash=hashlib.sha256(content).hexdigest())
+        return entry
+
+    def _write_page(self, slides):
+        path = os.path.join(self.output_dir, VIEWER_PAGE_DIR, f"page_{self.pages:04d}.json")
+        if self.pages == 0:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({"slides": slides}, ensure_ascii=False, separators=(",", ":")))
+        os.replace(tmp, path)
+        self.pages += 1
+
+    def close(self):
+        """Resolve slides never recorded, write the remaining pages and then the index itself."""
+        for filepath, (position, slide_num) in self._positions.items():
+            self._slots[position] = self._skipped_entry(slide_num, filepath)
+        self._positions.clear()
+        self._flush(final=True)
+        pages = [f"{VIEWER_PAGE_DIR}/page_{i:04d}.json" for i in range(self.pages)]
+        index = {"version": 1, "count": self.count, "page_size": VIEWER_PAGE_SIZE, "pages": pages}
+        if self.sprite:
+            index["sprite"] = self.sprite
+        tmp = self.path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(index, f, indent=1)
+            f.write("\n")
+        os.replace(tmp, self.path)
+        # Pages left over from a larger previous index
+        for page in itertools.count(self.pages):
+            try:
+                os.remove(os.path.join(self.output_dir, VIEWER_PAGE_DIR, f"page_{page:04d}.json"))
+            except FileNotFoundError:
+                break
+
+# ============================================================================
+# PACKED OUTPUT (--pack, --unpack: one indexed file instead of loose SVGs)
+# ============================================================================
+
+# Layout: PACK_MAGIC | stored slide bytes ... | JSON index | trailer. The index
+# maps each relative name to [offset, length, etag]; the trailer holds the
+# index offset, so a writer streams blobs and appends the index on close.
+PACK_MAGIC = b"SVGPACK1"
+PACK_SUFFIX = ".svgpack"
+_PACK_TRAILER = struct.Struct("<Q8s")  # index offset, PACK_MAGIC
+
+class PackWriter:
+    """Streams slides into a single pack file.
+
+    The pack is written to PATH.tmp and moved into place (after one fsync)
+    when the writer is closed; on error the partial file is removed.
+    Identical entries are stored once and share an index offset.
+    """
+
+    def __init__(self, path, buffer_size=1 << 20):
+        self.path = path
+        self.entries = {}
+        self._blobs = {}  # etag → offset of its first copy
+        self._tmp = path + ".tmp"
+        self._file = open(self._tmp, 'wb', buffering=buffer_size)
+        self._file.write(PACK_MAGIC)
+        self._offset = len(PACK_MAGIC)
+
+    def add(self, name, data):
+        """Append one entry; `name` is its relative path inside the pack."""
+        name = name.replace(os.sep, "/")
+        if name in self.entries:
+            raise ValueError(f"duplicate pack entry {name!r}")
+        etag = hashlib.sha256(data).hexdigest()[:32]
+        offset = self._blobs.get(etag)
+        if offset is None:
+            # Identical slides share one stored copy; their index entries point at it
+            offset = self._blobs[etag] = self._offset
+            self._file.write(data)
+            self._offset += len(data)
+        self.entries[name] = [offset, len(data), etag]
+
+    @property
+    def ratio(self):
+        """Entry bytes per stored byte (1.0 = no duplicate entries)."""
+        stored = self._offset - len(PACK_MAGIC)
+        return sum(length for _, length, _ in self.entries.values()) / stored if stored else 1.0
+
+    def close(self):
+        """Write the index and trailer and publish the pack."""
+        index = json.dumps({"version": 1, "entries": self.entries}, separators=(",", ":")).encode('utf-8')
+        self._file.write(index)
+        self._file.write(_PACK_TRAILER.pack(self._offset, PACK_MAGIC))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        os.replace(self._tmp, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+            os.remove(self._tmp)
+
+class SvgPack:
+    """Read-only, memory-mapped pack.
+
+    `pack[name]` returns a memoryview slice of the mapping, so serving an
+    entry copies nothing. Release those views before close().
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Empty file
+            self._file.close()
+            raise ValueError(f"{path}: not an SVG pack")
+        end = len(self._map) - _PACK_TRAILER.size
+        if end < len(PACK_MAGIC) or self._map[:len(PACK_MAGIC)] != PACK_MAGIC:
+            self.close()
+            raise ValueError(f"{path}: not an SVG pack")
+        index_offset, magic = _PACK_TRAILER.unpack_from(self._map, end)
+        if magic != PACK_MAGIC or not len(PACK_MAGIC) <= index_offset <= end:
+            self.close()
+            raise ValueError(f"{path}: truncated SVG pack")
+        self.entries = json.loads(self._map[index_offset:end])["entries"]
+        self._view = memoryview(self._map)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, name):
+        return name in self.entries
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __getitem__(self, name):
+        offset, length, _ = self.entries[name]
+        return self._view[offset:offset + length]
+
+    def etag(self, name):
+        """Strong ETag of an entry (from the index, no hashing at read time)."""
+        return f'"{self.entries[name][2]}"'
+
+    def extract(self, output_dir, names=None):
+        """Write entries (default: all) back out as loose files; returns the count."""
+        count = 0
+        made_dirs = set()
+        for name in self.entries if names is None else names:
+            filepath = os.path.join(output_dir, *name.split("/"))
+            directory = os.path.dirname(filepath)
+            if directory not in made_dirs:
+                os.makedirs(directory, exist_ok=True)
+                made_dirs.add(directory)
+            with open(filepath, 'wb') as f:
+                f.write(self[name])
+            count += 1
+        return count
+
+    def close(self):
+        if getattr(self, "_view", None) is not None:
+            self._view.release()
+            self._view = None
+        if getattr(self, "_map", None) is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def render_bytes_job(job):
+    """Render one job in memory: (slide_num, name, stored bytes) for a PackWriter."""
+    slide_num, data, name, _ = job
+    content = generate_svg_mockup(slide_num, data).encode('utf-8')
+    return slide_num, name, encode_output(content, name)
+
+def write_pack(path, data_path=None, jsonl=False, templates=None, workers=1, chunk_size=None,
+               progress_every=1000):
+    """Render templates, or a slideData file ('-' = stdin), into one pack.
+
+    Returns (slide count, dedup ratio of the stored entries).
+
+    Workers render in memory and only this process writes, so no per-slide
+    files, directories or fsyncs are created.
+    """
+    fp = None
+    if data_path is None:
+        jobs = template_jobs("", templates)
+    else:
+        jsonl = jsonl or data_path.endswith((".jsonl", ".ndjson"))
+        fp = sys.stdin if data_path == "-" else open(data_path, encoding="utf-8")
+        jobs = batch_jobs(fp, "", jsonl, create_dirs=False)
+    count = 0
+    try:
+        with PackWriter(path) as pack:
+            for count, (_, name, stored) in enumerate(run_jobs(jobs, workers, chunk_size, render_bytes_job), 1):
+                pack.add(name, stored)
+                if progress_every and count % progress_every == 0:
+                    print(f"  … {count} slides", file=sys.stderr)
+    finally:
+        if fp is not None and fp is not sys.stdin:
+            fp.close()
+    return count, pack.ratio
+
+# ============================================================================
+# DEDUPLICATION (--dedup: content-addressed blobs shared across decks)
+# Identical slideData is rendered once per batch and every distinct blob is
+# stored once under BLOB_DIR; deck files become hardlinks or symlinks to
+# it, or ("refs") entries in REFS_NAME listing a slide's fragments: the
+# shared header, its body and the footer.
+# ============================================================================
+
+BLOB_DIR = ".blobs"
+REFS_NAME = "svg_refs.json"
+DEDUP_MODES = ("hardlink", "symlink", "refs")
+
+class BlobStore:
+    """Content-addressed blob directory: root/ab/<sha256>.
+
+    put() writes a blob only the first time its digest is seen (blobs left
+    by an earlier run are reused); `stored` counts the bytes of distinct
+    blobs and `referenced` the bytes the materialized slides add up to.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.known = set()
+        self.stored = 0
+        self.referenced = 0
+
+    def path(self, digest):
+        return os.path.join(self.root, digest[:2], digest)
+
+    def put(self, data):
+        """Store `data` unless an identical blob exists; returns its digest."""
+        digest = hashlib.sha256(data).hexdigest()
+        if digest not in self.known:
+            self.known.add(digest)
+            self.stored += len(data)
+            path = self.path(digest)
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp = f"{path}.{os.getpid()}.tmp"
+                with open(tmp, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp, path)
+        return digest
+
+    def read(self, digest):
+        with open(self.path(digest), 'rb') as f:
+            return f.read()
+
+    def link(self, digest, filepath, mode="hardlink"):
+        """Materialize a blob at `filepath` as a hardlink or a relative symlink."""
+        target = self.path(digest)
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(filepath)
+        if mode == "symlink":
+            os.symlink(os.path.relpath(target, os.path.dirname(filepath)), filepath)
+        else:
+            os.link(target, filepath)
+
+    @property
+    def ratio(self):
+        """Referenced bytes per stored byte (1.0 = nothing shared)."""
+        return self.referenced / self.stored if self.stored else 1.0
+
+def render_body_job(job):
+    """Render one (slide_num, data, name, key) job without header and footer.
+
+    Returns (name, key, body, visual object count) for write_batch_dedup.
+    """
+    slide_num, data, name, key = job
+    scene = build_scene(slide_num, data)
+    buf = io.StringIO()
+    with SvgWriter(buf) as svg:
+        svg.scene(scene)
+    return name, key, buf.getvalue(), count_objects(scene)
+
+def write_batch_dedup(data_path, output_dir, mode="hardlink", jsonl=False, workers=1, chunk_size=None,
+                      progress_every=1000, index=None):
+    """Render a slideData file ('-' = stdin) into `output_dir` with content-addressed dedup.
+
+    Slides with the same template and slideData are rendered once, and the
+    header and footer are formatted once for the whole batch. "hardlink" /
+    "symlink" store each distinct complete SVG as a blob and link the deck
+    files to it (listed in `index`, a ViewerIndex, if given); "refs" stores
+    only fragments and writes REFS_NAME mapping every slide to its
+    [header, body, footer] digests (see read_ref). Returns (slide count,
+    rendered count, BlobStore).
+    """
+    jsonl = jsonl or data_path.endswith((".jsonl", ".ndjson"))
+    refs_mode = mode == "refs"
+    store = BlobStore(os.path.join(output_dir, BLOB_DIR))
+    header, footer = (fragment.encode('utf-8') for fragment in document_fragments())
+    if refs_mode:
+        shared = [store.put(header), store.put(footer)]
+    refs = {}
+    made_dirs = set()
+    done = {}       # input fingerprint → (digest, size, objects) of the complete slide, or of its body for refs
+    waiting = {}    # input fingerprint → (slide_num, filepath) repeating a slide whose render is in flight
+    count = 0
+
+    def materialize(slide_num, filepath, digest, size, objects):
+        nonlocal count
+        if refs_mode:
+            refs[os.path.relpath(filepath, output_dir).replace(os.sep, "/")] = [shared[0], digest, shared[1]]
+        else:
+            directory = os.path.dirname(filepath)
+            if directory not in made_dirs:
+                os.makedirs(directory, exist_ok=True)
+                made_dirs.add(directory)
+            store.link(digest, filepath, mode)
+            if index is not None:
+                index.record(slide_num, filepath, size, digest, objects)
+        store.referenced += size
+        count += 1
+        if progress_every and count % progress_every == 0:
+            print(f"  … {count} slides", file=sys.stderr)
+
+    def unique_jobs(jobs):
+        for slide_num, data, filepath, _ in jobs:
+            key = input_fingerprint(slide_num, data)
+            if key in done:
+                materialize(slide_num, filepath, *done[key])
+            elif key in waiting:
+                waiting[key].append((slide_num, filepath))
+            else:
+                waiting[key] = [(slide_num, filepath)]
+                yield slide_num, data, filepath, key
+
+    fp = sys.stdin if data_path == "-" else open(data_path, encoding="utf-8")
+    rendered = 0
+    try:
+        jobs = batch_jobs(fp, output_dir, jsonl, create_dirs=False)
+        if index is not None and not refs_mode:
+            jobs = index.track(jobs)
+        results = run_jobs(unique_jobs(jobs), workers, chunk_size, render_body_job)
+        for rendered, (filepath, key, body, objects) in enumerate(results, 1):
+            body = body.encode('utf-8')
+            if refs_mode:
+                done[key] = (store.put(body), len(header) + len(body) + len(footer), objects)
+            else:
+                content = encode_output(header + body + footer, filepath)
+                done[key] = (store.put(content), len(content), objects)
+            for slide_num, repeat in waiting.pop(key):
+                materialize(slide_num, repeat, *done[key])
+    finally:
+        if fp is not sys.stdin:
+            fp.close()
+    if refs_mode:
+        write_refs(os.path.join(output_dir, REFS_NAME), refs)
+    return count, rendered, store
+
+def write_refs(path, refs):
+    """Atomically write a REFS_NAME index: slide name → fragment digests."""
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({"version": 1, "blobs": BLOB_DIR, "slides": dict(sorted(refs.items()))}, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+def read_ref(output_dir, name, refs=None):
+    """Reassemble one slide of a "refs" batch from its fragments."""
+    if refs is None:
+        with open(os.path.join(output_dir, REFS_NAME), encoding='utf-8') as f:
+            refs = json.load(f)
+    store = BlobStore(os.path.join(output_dir, refs["blobs"]))
+    return b"".join(store.read(digest) for digest in refs["slides"][name])
+
+# ============================================================================
+# WATCH MODE (--watch: re-render only the slides whose dependencies changed)
+# ============================================================================
+
+WATCH_MANIFEST_NAME = "svg_watch.json"
+WATCH_INTERVAL = 0.1                # Seconds between mtime polls of the watched inputs
+
+# Every slide is rendered through render_job(). The serializer tables are
+# resolved per element kind instead (see _dependency_node), so a template
+# only depends on the serializers of the elements it actually draws.
+_DEPENDENCY_ROOTS = ("render_job",)
+_SERIALIZER_TABLES = ("SVG_SERIALIZERS", "MINIFIED_SERIALIZERS")
+_WATCH_MODULE = "_svg_mockups_watch"
+
+_definitions = {}  # name → top-level AST node of this module, parsed once on first use
+
+def _module_definitions(tree=None):
+    """Top-level function and class definitions of this module's source, by name."""
+    if not _definitions:
+        tree = tree or ast.parse(inspect.getsource(sys.modules[__name__]))
+        _definitions.update((node.name, node) for node in tree.body
+                            if isinstance(node, (ast.FunctionDef, ast.ClassDef)))
+    return _definitions
+
+def _definition_nodes(obj, skip_methods=()):
+    """AST nodes defining a function or class (a class minus `skip_methods`)."""
+    node = _module_definitions().get(obj.__name__) if obj.__module__ == __name__ else None
+    if node is None:  # Plugin generators live in other modules
+        node = ast.parse(textwrap.dedent(inspect.getsource(obj))).body[0]
+    if isinstance(node, ast.ClassDef) and skip_methods:
+        return [*node.bases, *node.decorator_list,
+                *(child for child in node.body if getattr(child, "name", None) not in skip_methods)]
+    return [node]
+
+def _references(nodes):
+    """Global names and `scene.<builder>` calls in AST nodes (default values included)."""
+    names, builders = set(), set()
+    for node in itertools.chain.from_iterable(map(ast.walk, nodes)):
+        if isinstance(node, ast.Name):
+            names.add(node.id)
+        elif (isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name) and node.value.id == "scene"
+              and node.attr in SVG_SERIALIZERS):
+            builders.add(f"Scene.{node.attr}")
+    return names | builders
+
+def _dump(nodes):
+    """Canonical text of AST nodes (comments and formatting do not appear)."""
+    return "\n".join(map(ast.dump, nodes))
+
+@functools.lru_cache(maxsize=None)
+def _dependency_node(name):
+    """(referenced names, digest) of one module global or Scene builder method.
+
+    Functions and classes defined here hash their AST, so comment and
+    whitespace edits do not count as changes; uppercase tokens hash their
+    value. Anything else (imports, registries, caches) is a leaf with no
+    digest. Scene itself excludes its builder methods: a template only
+    depends on the builders it calls, plus their element serializers.
+    """
+    if name.startswith("Scene."):
+        method = name.partition(".")[2]
+        nodes = [child for child in _module_definitions()["Scene"].body if getattr(child, "name", None) == method]
+        serializers = {SVG_SERIALIZERS[method].__name__, MINIFIED_SERIALIZERS[method].__name__}
+        return frozenset(_references(nodes) | serializers), _dump(nodes)
+    value = inspect.unwrap(globals()[name])
+    if (inspect.isfunction(value) or inspect.isclass(value)) and value.__module__ == __name__:
+        nodes = _definition_nodes(value, SVG_SERIALIZERS if value is Scene else ())
+        return frozenset(_references(nodes)), _dump(nodes)
+    if name.isupper() and name not in _SERIALIZER_TABLES:
+        return frozenset(), json.dumps(value, sort_keys=True,
+                                       default=lambda value: getattr(value, "__qualname__", str(value)))
+    return frozenset(), None
+
+@functools.lru_cache(maxsize=None)
+def template_dependencies(slide_num):
+    """Names of the design tokens and helpers one template's output depends on.
+
+    Global references are followed from the generator and the render path
+    through every helper defined in this module, so a token such as RADIUS
+    only reaches the templates that draw with it.
+    """
+    namespace = globals()
+    pending = [*_DEPENDENCY_ROOTS, *_references(_definition_nodes(get_generator(slide_num)))]
+    deps = set()
+    while pending:
+        name = pending.pop()
+        if name in deps or name in _SERIALIZER_TABLES or (name not in namespace and not name.startswith("Scene.")):
+            continue
+        deps.add(name)
+        pending.extend(_dependency_node(name)[0])
+    return frozenset(deps)
+
+@functools.lru_cache(maxsize=None)
+def _template_fingerprint(slide_num):
+    """Hash of a template's generator and its dependencies."""
+    h = hashlib.sha256(_dump(_definition_nodes(get_generator(slide_num))).encode('utf-8'))
+    for name in sorted(template_dependencies(slide_num)):
+        digest = _dependency_node(name)[1]
+        if digest is not None:
+            h.update(f"{name}\0{digest}\0".encode('utf-8'))
+    return h.hexdigest()
+
+def dependency_fingerprint(slide_num, data=None):
+    """Hash of a template's generator, its dependencies and an optional slideData entry."""
+    fingerprint = _template_fingerprint(slide_num)
+    if data is None:
+        return fingerprint
+    h = hashlib.sha256(fingerprint.encode('ascii'))
+    h.update(json.dumps(data, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+    return h.hexdigest()
+
+def _exec_generator_module(path, tree=None):
+    """Execute the module source at `path` as sys.modules[_WATCH_MODULE].
+
+    Registering it lets the jobs and render functions it defines be pickled
+    by name into process-pool workers.
+    """
+    if tree is None:
+        with open(path, encoding='utf-8') as f:
+            tree = ast.parse(f.read(), path)
+    spec = importlib.util.spec_from_file_location(_WATCH_MODULE, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[_WATCH_MODULE] = module
+    try:
+        exec(compile(tree, path, "exec"), vars(module))
+    except BaseException:
+        del sys.modules[_WATCH_MODULE]
+        raise
+    return module
+
+def load_generator_module(path):
+    """Execute a fresh copy of the generator module from `path`.
+
+    The source is read once, so the dependency fingerprints always describe
+    exactly the code that renders.
+    """
+    with open(path, encoding='utf-8') as f:
+        tree = ast.parse(f.read(), path)
+    module = _exec_generator_module(path, tree)
+    module._module_definitions(tree)
+    module._init_worker = _init_worker  # Importable by name in spawned workers, which then load `path`
+    module.save_token_cache()  # src/config.js may be what changed
+    module.FONT_OPTIONS.update(FONT_OPTIONS)
+    module.OUTPUT_OPTIONS.update(OUTPUT_OPTIONS)
+    return module
+
+def _watch_jobs(module, args, output_dir):
+    """(fingerprint, job) for every slide the watched inputs produce, using `module`."""
+    if not args.data:
+        for job in module.template_jobs(output_dir, module.select_templates(args.only, args.exclude)):
+            yield module.dependency_fingerprint(job[0]), job
+        return
+    jsonl = args.jsonl or args.data.endswith((".jsonl", ".ndjson"))
+    with open(args.data, encoding="utf-8") as fp:
+        for job in module.batch_jobs(fp, output_dir, jsonl):
+            yield module.dependency_fingerprint(job[0], job[1]), job
+
+def write_watch_manifest(output_dir, version, fingerprints, changed):
+    """Atomically publish the current slide versions for svg_viewer.html."""
+    def key(filepath):
+        return os.path.relpath(filepath, output_dir).replace(os.sep, "/")
+
+    path = os.path.join(output_dir, WATCH_MANIFEST_NAME)
+    tmp = path + ".tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({"version": version, "updated": time.time(), "changed": sorted(map(key, changed)),
+                   "slides": {key(filepath): fingerprint[:16] for filepath, fingerprint in fingerprints.items()}},
+                  f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+def _input_stamps(paths):
+    """(mtime_ns, size) per path; None for files that are missing."""
+    stamps = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            stamps.append(None)
+        else:
+            stamps.append((st.st_mtime_ns, st.st_size))
+    return stamps
+
+def watch(args, output_dir, workers=1, interval=WATCH_INTERVAL):
+    """Re-render slides as the module, src/config.js or --data file changes, until interrupted.
+
+    Every change re-executes the module source into a fresh namespace,
+    fingerprints each slide against its own dependencies and re-renders
+    only the slides whose fingerprint moved, then rewrites the ViewerIndex
+    and WATCH_MANIFEST_NAME so the viewer can reload just those images. Errors
+    (a syntax error mid-edit, invalid JSON) are reported and the previous
+    output is kept until the next change.
+    """
+    inputs = [os.path.abspath(__file__), CONFIG_JS] + ([os.path.abspath(args.data)] if args.data else [])
+    module = sys.modules[__name__]
+    fingerprints = {}
+    stamps = None
+    version = 0
+    has_sprite = not args.data and os.path.exists(os.path.join(output_dir, sprite_name()))
+    sprite = sprite_name() if has_sprite else None
+    print(f"👀 Watching {', '.join(os.path.relpath(path) for path in inputs)} → {output_dir}/ (Ctrl+C to stop)",
+          flush=True)
+    try:
+        while True:
+            current = _input_stamps(inputs)
+            if current == stamps:
+                time.sleep(interval)
+                continue
+            reload = stamps is not None and current[:2] != stamps[:2]  # Module source or design tokens
+            stamps = current
+            started = time.perf_counter()
+            changed = []
+            try:
+                if reload:
+                    module = load_generator_module(inputs[0])
+                jobs = list(_watch_jobs(module, args, output_dir))
+                stale = [job for fingerprint, job in jobs if fingerprints.get(job[2]) != fingerprint]
+                index = module.ViewerIndex(output_dir, incremental=True, sprite=sprite)
+                stale_paths = {job[2] for job in stale}
+                for job in index.track(job for _, job in jobs):
+                    if job[2] not in stale_paths:
+                        index.skip(job[2])
+                for result in module.run_indexed(stale, workers if len(stale) > 1 else 1, index=index):
+                    changed.append(result[1])
+                index.close()
+            except Exception as e:
+                # Slides that failed keep their old fingerprint and are retried on the next change
+                print(f"  ⚠ {type(e).__name__}: {e} (keeping previous output)", file=sys.stderr, flush=True)
+                continue
+            fingerprints = {job[2]: fingerprint for fingerprint, job in jobs}
+            version += 1
+            write_watch_manifest(output_dir, version, fingerprints, changed)
+            elapsed = (time.perf_counter() - started) * 1000
+            names = ", ".join(os.path.basename(path) for path in changed[:4]) + (" …" if len(changed) > 4 else "")
+            print(f"  ↻ v{version}: {len(changed)}/{len(jobs)} slides re-rendered in {elapsed:.1f} ms"
+                  + (f" ({names})" if changed else ""), flush=True)
+    except KeyboardInterrupt:
+        print(f"\n👋 Stopped watching after {version} builds")
+
+# ============================================================================
+# LAYOUT VALIDATION (--validate REPORT)
+# Geometry checks run on whole chunks of scenes at once as NumPy arrays.
+# ============================================================================
+
+MAX_OBJECTS = 4                     # "3-4 objects max"
+OBJECT_LIMITS = {1: 1, 14: 1}       # Title and hero slides: 1 object
+OBJECT_GAP = SPACING_XL             # Elements closer than this form one visual object
+SAFE_AREA_TOLERANCE = 1             # px
+TEXT_ASCENT = 0.75                  # Text box estimate, in em
+TEXT_DESCENT = 0.25
+
+_KIND_SHAPE, _KIND_TEXT, _KIND_LINE, _KIND_BACKGROUND = 0, 1, 2, 3
+_KIND_NAMES = {_KIND_SHAPE: "shape", _KIND_TEXT: "text", _KIND_LINE: "line", _KIND_BACKGROUND: "background"}
+
+def element_bbox(element):
+    """Axis-aligned bounding box (x0, y0, x1, y1) of a scene record."""
+    kind = element.kind
+    if kind == "text":
+        lines = text_lines(element.text)
+        width = max(measure_text(line, element.size, element.weight) for line in lines)
+        x0 = element.x - {"start": 0, "middle": width / 2, "end": width}[element.anchor]
+        y1 = element.y + element.size * (TEXT_DESCENT + LINE_HEIGHT * (len(lines) - 1))
+        return x0, element.y - element.size * TEXT_ASCENT, x0 + width, y1
+    if kind == "rect":
+        return element.x, element.y, element.x + element.w, element.y + element.h
+    if kind == "circle":
+        r = element.r
+        return element.cx - r, element.cy - r, element.cx + r, element.cy + r
+    if kind == "line":
+        half = element.stroke_width / 2
+        return (min(element.x1, element.x2) - half, min(element.y1, element.y2) - half,
+                max(element.x1, element.x2) + half, max(element.y1, element.y2) + half)
+    x, y, w, h = _path_box(element.d)
+    return x, y, x + w, y + h
+
+def _element_kind(element, scene):
+    if element.kind == "text":
+        return _KIND_TEXT
+    if element.kind == "line":
+        return _KIND_LINE
+    if element.kind == "rect" and (element.w >= scene.width or element.h >= scene.height):
+        return _KIND_BACKGROUND  # Full-bleed / split backgrounds are exempt from margins
+    return _KIND_SHAPE
+
+def count_objects(scene):
+    """Visual objects in a scene, grouped the way the layout validator does.
+
+    Elements whose boxes come within OBJECT_GAP of each other form one
+    object and backgrounds count on their own. Plain Python, so it works
+    without NumPy (scenes only hold a handful of elements).
+    """
+    gap = OBJECT_GAP / 2
+    boxes = []
+    backgrounds = 0
+    for element in scene:
+        if _element_kind(element, scene) == _KIND_BACKGROUND:
+            backgrounds += 1
+        else:
+            x0, y0, x1, y1 = element_bbox(element)
+            boxes.append((x0 - gap, y0 - gap, x1 + gap, y1 + gap))
+    parent = list(range(len(boxes)))
+
+    def root(i):
+        while parent[i] != i:
+            parent[i] = i = parent[parent[i]]
+        return i
+
+    for i, (ax0, ay0, ax1, ay1) in enumerate(boxes):
+        for j in range(i):
+            bx0, by0, bx1, by1 = boxes[j]
+            if min(ax1, bx1) >= max(ax0, bx0) and min(ay1, by1) >= max(ay0, by0):
+                parent[root(i)] = root(j)
+    return backgrounds + sum(1 for i in range(len(boxes)) if root(i) == i)
+
+def _validate_chunk(chunk):
+    """Validate a list of (slide_id, slide_num, scene); yields one result per slide."""
+    S = len(chunk)
+    K = max([len(scene) for _, _, scene in chunk] + [1])
+    box = np.full((S, K, 4), np.nan)
+    kind = np.full((S, K), -1, dtype=np.int8)
+    for s, (_, _, scene) in enumerate(chunk):
+        for k, element in enumerate(scene):
+            box[s, k] = element_bbox(element)
+            kind[s, k] = _element_kind(element, scene)
+    x0, y0, x1, y1 = np.moveaxis(box, -1, 0)
+    valid = kind >= 0
+    is_text = kind == _KIND_TEXT
+    is_bg = kind == _KIND_BACKGROUND
+    is_shape = kind == _KIND_SHAPE
+
+    # Per-element checks
+    tol = SAFE_AREA_TOLERANCE
+    outside_safe = valid & ~is_bg & ((x0 < MARGIN_H - tol) | (x1 > CANVAS_WIDTH - MARGIN_H + tol)
+                                     | (y0 < MARGIN_V - tol) | (y1 > CANVAS_HEIGHT - MARGIN_V + tol))
+    overflow = is_text & ((x0 < 0) | (x1 > CANVAS_WIDTH) | (y0 < 0) | (y1 > CANVAS_HEIGHT))
+
+    # Pairwise checks, shape (S, K, K)
+    def pair(a, b, op):
+        return op(a[:, :, None], b[:, None, :])
+    ix = pair(x1, x1, np.minimum) - pair(x0, x0, np.maximum)
+    iy = pair(y1, y1, np.minimum) - pair(y0, y0, np.maximum)
+    intersects = (ix > 0) & (iy > 0)
+    contained = ((x0[:, :, None] >= x0[:, None, :]) & (x1[:, :, None] <= x1[:, None, :])
+                 & (y0[:, :, None] >= y0[:, None, :]) & (y1[:, :, None] <= y1[:, None, :]))
+    upper = np.triu(np.ones((K, K), dtype=bool), 1)
+    text_overlap = intersects & is_text[:, :, None] & is_text[:, None, :] & upper
+    text_clipped = intersects & ~contained & is_text[:, :, None] & is_shape[:, None, :]
+
+    # Visual objects: connected components of elements within OBJECT_GAP
+    # of each other; backgrounds always count as their own object.
+    gap = OBJECT_GAP / 2
+    near = ((pair(x1 + gap, x1 + gap, np.minimum) - pair(x0 - gap, x0 - gap, np.maximum) >= 0)
+            & (pair(y1 + gap, y1 + gap, np.minimum) - pair(y0 - gap, y0 - gap, np.maximum) >= 0))
+    merge = ~is_bg & valid
+    adjacency = (near & merge[:, :, None] & merge[:, None, :]) | (np.eye(K, dtype=bool) & valid[:, :, None])
+    labels = np.where(valid, np.arange(K), K)
+    for _ in range(K):
+        spread = np.where(adjacency, labels[:, None, :], K).min(axis=2)
+        if np.array_equal(spread, labels):
+            break
+        labels = spread
+    objects = ((labels == np.arange(K)) & valid).sum(axis=1)
+
+    issues = [[] for _ in range(S)]
+    for s, k in zip(*np.nonzero(outside_safe)):
+        issues[s].append({"rule": "safe_area", "element": int(k), "kind": _KIND_NAMES[int(kind[s, k])],
+                          "bbox": [round(float(v), 1) for v in box[s, k]]})
+    for s, k in zip(*np.nonzero(overflow)):
+        issues[s].append({"rule": "text_overflow", "element": int(k),
+                          "bbox": [round(float(v), 1) for v in box[s, k]]})
+    for rule, mask in (("text_overlap", text_overlap), ("text_clipped", text_clipped)):
+        for s, i, j in zip(*np.nonzero(mask)):
+            issues[s].append({"rule": rule, "elements": [int(i), int(j)]})
+    for s, (slide_id, slide_num, _) in enumerate(chunk):
+        limit = OBJECT_LIMITS.get(slide_num, MAX_OBJECTS)
+        if objects[s] > limit:
+            issues[s].insert(0, {"rule": "object_count", "objects": int(objects[s]), "limit": limit})
+        yield {"id": slide_id, "template": slide_num, "objects": int(objects[s]), "issues": issues[s]}
+
+def validate_scenes(entries, chunk_size=4096):
+    """Validate (slide_id, slide_num, scene) entries chunk by chunk.
+
+    Checks object count, safe-area margins (MARGIN_H / MARGIN_V), text
+    running past the canvas, overlapping text and text crossing shape
+    edges. Yields one result dict per slide.
+    """
+    if np is None:
+        raise RuntimeError(f"layout validation requires numpy ({NUMPY_HINT})")
+    entries = iter(entries)
+    while True:
+        chunk = list(itertools.islice(entries, chunk_size))
+        if not chunk:
+            return
+        yield from _validate_chunk(chunk)
+
+def write_validation_report(results, fp):
+    """Stream validation results as JSON; returns the summary dict.
+
+    Only slides with issues are listed; the summary covers every slide.
+    """
+    summary = {"slides": 0, "failed": 0, "rules": {}}
+    fp.write('{"results": [')
+    for result in results:
+        summary["slides"] += 1
+        if not result["issues"]:
+            continue
+        for issue in result["issues"]:
+            summary["rules"][issue["rule"]] = summary["rules"].get(issue["rule"], 0) + 1
+        fp.write(",\n" if summary["failed"] else "\n")
+        summary["failed"] += 1
+        json.dump(result, fp, ensure_ascii=False)
+    fp.write('\n], "summary": ')
+    json.dump(summary, fp, sort_keys=True)
+    fp.write('}\n')
+    return summary
+
+def template_scenes(templates=None):
+    """(slide_id, slide_num, scene) for the built-in mockups (or the given template numbers)."""
+    for i in range(1, 33) if templates is None else templates:
+        yield template_id(i), i, build_scene(i)
+
+def batch_scenes(data_path, jsonl=False):
+    """(slide_id, slide_num, scene) for every renderable slide in a slideData file."""
+    jsonl = jsonl or data_path.endswith((".jsonl", ".ndjson"))
+    fp = sys.stdin if data_path == "-" else open(data_path, encoding="utf-8")
+    try:
+        for deck_index, slide_index, slide_num, slide in resolve_batch(iter_slide_data(fp, jsonl)):
+            yield batch_slide_id(deck_index, slide_index, slide_num), slide_num, build_scene(slide_num, slide)
+    finally:
+        if fp is not sys.stdin:
+            fp.close()
+
+def run_validation(scenes, report_path):
+    """Validate scenes, write the JSON report ('-' = stdout) and print a summary."""
+    if report_path == "-":
+        summary = write_validation_report(validate_scenes(scenes), sys.stdout)
+    else:
+        with open(report_path, 'w', encoding='utf-8') as f:
+            summary = write_validation_report(validate_scenes(scenes), f)
+    rules = ", ".join(f"{rule}: {count}" for rule, count in sorted(summary["rules"].items())) or "none"
+    print(f"🔍 Validated {summary['slides']} slides: {summary['failed']} with issues ({rules})", file=sys.stderr)
+    return 1 if summary["failed"] else 0
+
+def write_batch_slides_api(data_path, output_dir, jsonl=False):
+    """Write one batchUpdate payload per slideData deck; returns the deck count."""
+    jsonl = jsonl or data_path.endswith((".jsonl", ".ndjson"))
+    fp = sys.stdin if data_path == "-" else open(data_path, encoding="utf-8")
+    count = 0
+    try:
+        slides = resolve_batch(iter_slide_data(fp, jsonl))
+        for deck_index, entries in itertools.groupby(slides, key=lambda entry: entry[0]):
+            payload, warnings = deck_to_slides_payload(((i, n, d) for _, i, n, d in entries), deck_index)
+            for warning in warnings:
+                print(f"  ⚠ {warning}", file=sys.stderr)
+            write_slides_payload(payload, os.path.join(output_dir, f"deck_{deck_index:04d}{SLIDES_API_SUFFIX}"))
+            count += 1
+    finally:
+        if fp is not sys.stdin:
+            fp.close()
+    return count
+
+# ============================================================================
+# VISUAL REGRESSION (--regression REPORT: drift from Apple_like_template/*.jpeg)
+# The reference JPEGs are decoded once (with Pillow) into perceptual hashes
+# and layout grids kept in REFERENCE_INDEX_PATH; each run rasterizes the
+# scenes straight from the IR and compares everything as NumPy arrays.
+# Signatures are taken from luminance-normalized structure maps, so dim
+# mockup shapes and bright reference photos compare by layout, not brightness.
+# ============================================================================
+
+REFERENCE_DIR = os.path.join(_HERE, "Apple_like_template")
+REFERENCE_FILE = "Apple_like_template.{:03d}.jpeg"
+REFERENCE_INDEX_PATH = os.path.join(_HERE, "img", "svg_mockups", "reference_signatures.json")
+REFERENCE_INDEX_VERSION = 2
+REGRESSION_BASELINE_PATH = os.path.join(_HERE, "img", "svg_mockups", "regression_baseline.json")
+REGRESSION_BASELINE_VERSION = 1
+RASTER_SIZE = (256, 144)            # Working resolution (width, height) for both sides
+HASH_SIZE = 8                       # pHash: 8×8 low frequencies of a 32×32 DCT → 64 bits
+DCT_SIZE = 32
+LAYOUT_GRID = (16, 9)               # Layout signature: mean luma per cell
+TEXT_COVERAGE = 0.35                # Share of a text box covered by glyphs
+ARC_SEGMENTS = 16
+STRUCTURE_PERCENTILE = 99.5        # Contrast that maps to full ink in a structure map
+# Thresholds, in units of the median distance between two unrelated
+# references (1.0). Measured on the 32 templates: drift from the references
+# spans 0.68-1.31, the same range as unrelated reference pairs (0.71-1.21,
+# 5th-95th percentile), because the mockups are abstract stand-ins for the
+# photographic references; MAX_DRIFT therefore only flags a template that
+# ends up further from its reference than any does today. Against the
+# accepted renders an unchanged template scores 0, one swapped for another
+# template at least 0.19 and a blank slide about 1.0 (0 for hero_image, a
+# single full-bleed fill with no structure); MAX_CHANGE sits below the swaps
+# while a 24 px shift of a whole slide (median 0.35) still trips it.
+REGRESSION_MAX_DRIFT = 1.4
+REGRESSION_MAX_CHANGE = 0.15
+
+def _luma(color):
+    """ITU-R 601 luma in [0, 1] of a #RRGGBB color (the conversion Pillow's "L" mode uses)."""
+    if not isinstance(color, str) or not color.startswith("#") or len(color) != 7:
+        return None
+    r, g, b = (int(color[i:i + 2], 16) for i in (1, 3, 5))
+    return (r * 299 + g * 587 + b * 114) / 1000 / 255
+
+@functools.lru_cache(maxsize=4)
+def _raster_grid(width, height):
+    """Pixel edges and centers of RASTER_SIZE mapped onto a width×height canvas."""
+    cols, rows = RASTER_SIZE
+    edges_x = np.linspace(0, width, cols + 1)
+    edges_y = np.linspace(0, height, rows + 1)
+    return edges_x, edges_y, (edges_x[:-1] + edges_x[1:]) / 2, (edges_y[:-1] + edges_y[1:]) / 2
+
+def _box_coverage(edges_x, edges_y, x0, y0, x1, y1):
+    """Exact per-pixel coverage of an axis-aligned box (thin lines keep their weight)."""
+    cover_x = np.clip(np.minimum(edges_x[1:], x1) - np.maximum(edges_x[:-1], x0), 0, None) / np.diff(edges_x)
+    cover_y = np.clip(np.minimum(edges_y[1:], y1) - np.maximum(edges_y[:-1], y0), 0, None) / np.diff(edges_y)
+    return np.outer(cover_y, cover_x)
+
+def _path_polygon(d):
+    """Vertices of a wedge or polyline path, arcs flattened into ARC_SEGMENTS pieces."""
+    tokens = d.replace(",", " ").split()
+    if "A" not in tokens:
+        numbers = [float(t) for t in tokens if t not in ("M", "L", "Z")]
+        return np.array(numbers).reshape(-1, 2)
+    cx, cy, sx, sy = (float(tokens[i]) for i in (1, 2, 4, 5))
+    a = tokens.index("A")
+    r, ex, ey = float(tokens[a + 1]), float(tokens[a + 6]), float(tokens[a + 7])
+    start = math.atan2(sy - cy, sx - cx)
+    sweep = (math.atan2(ey - cy, ex - cx) - start) % (2 * math.pi)
+    angles = start + np.linspace(0, sweep, ARC_SEGMENTS + 1)
+    arc = np.column_stack((cx + r * np.cos(angles), cy + r * np.sin(angles)))
+    return np.vstack(([[cx, cy]], arc))
+
+def _polygon_mask(centers_x, centers_y, polygon):
+    """Even-odd fill of a polygon sampled at pixel centers."""
+    px, py = centers_x[None, :], centers_y[:, None]
+    inside = np.zeros((len(centers_y), len(centers_x)), dtype=bool)
+    for (x0, y0), (x1, y1) in zip(polygon, np.roll(polygon, -1, axis=0)):
+        if y0 == y1:
+            continue
+        crosses = (py > min(y0, y1)) & (py <= max(y0, y1)) & (px < x0 + (py - y0) * (x1 - x0) / (y1 - y0))
+        inside ^= crosses
+    return inside
+
+def rasterize_scene(scene, background=BG_COLOR):
+    """Luma image (RASTER_SIZE) of a scene, composited straight from the IR.
+
+    Rects, lines and text boxes use exact area coverage, circles and paths
+    are sampled at pixel centers; text counts as TEXT_COVERAGE of its box.
+    Precise enough for hashes and layout grids, far cheaper than an SVG
+    renderer.
+    """
+    edges_x, edges_y, centers_x, centers_y = _raster_grid(scene.width, scene.height)
+    image = np.full((RASTER_SIZE[1], RASTER_SIZE[0]), _luma(background))
+    for element in scene:
+        kind = element.kind
+        if kind == "text":
+            luma = _luma(element.fill)
+            cover = _box_coverage(edges_x, edges_y, *element_bbox(element)) * TEXT_COVERAGE
+        elif kind == "line":
+            luma = _luma(element.stroke)
+            cover = _box_coverage(edges_x, edges_y, *element_bbox(element))
+        elif kind == "rect":
+            luma = _luma(element.fill)
+            if luma is None and element.stroke:
+                luma, half = _luma(element.stroke), element.stroke_width / 2
+                x0, y0, x1, y1 = element_bbox(element)
+                cover = (_box_coverage(edges_x, edges_y, x0 - half, y0 - half, x1 + half, y1 + half)
+                         - _box_coverage(edges_x, edges_y, x0 + half, y0 + half, x1 - half, y1 - half))
+            else:
+                cover = _box_coverage(edges_x, edges_y, *element_bbox(element))
+        elif kind == "circle":
+            luma = _luma(element.fill) if _luma(element.fill) is not None else _luma(element.stroke)
+            cover = (((centers_x[None, :] - element.cx) ** 2 + (centers_y[:, None] - element.cy) ** 2)
+                     <= element.r ** 2).astype(float)
+        else:
+            luma = _luma(element.fill)
+            cover = _polygon_mask(centers_x, centers_y, _path_polygon(element.d)).astype(float)
+        if luma is None:
+            continue
+        alpha = cover * (1.0 if element.opacity is None else element.opacity) if kind != "text" else cover
+        image += alpha * (luma - image)
+    return image
+
+def _downscale(image, rows, cols):
+    """Area-average an image down to rows×cols (bins need not divide evenly)."""
+    row_edges = np.linspace(0, image.shape[0], rows + 1).astype(int)[:-1]
+    col_edges = np.linspace(0, image.shape[1], cols + 1).astype(int)[:-1]
+    sums = np.add.reduceat(np.add.reduceat(image, row_edges, axis=0), col_edges, axis=1)
+    counts = np.outer(np.diff(np.append(row_edges, image.shape[0])), np.diff(np.append(col_edges, image.shape[1])))
+    return sums / counts
+
+@functools.lru_cache(maxsize=1)
+def _dct_matrix(n=DCT_SIZE):
+    k, i = np.meshgrid(np.arange(n), np.arange(n), indexing="ij")
+    return np.cos(math.pi * (2 * i + 1) * k / (2 * n))
+
+def structure_map(image):
+    """Ink in [0, 1]: distance from the image's own background (its median
+    luma), scaled so its STRUCTURE_PERCENTILE contrast is full ink."""
+    ink = np.abs(image - np.median(image))
+    contrast = np.percentile(ink, STRUCTURE_PERCENTILE)
+    return np.clip(ink / contrast, 0, 1) if contrast > 0 else ink
+
+def image_signature(image):
+    """(64-bit pHash as a bool array, flattened LAYOUT_GRID ink) of a luma image's structure map."""
+    image = structure_map(image)
+    small = _downscale(image, DCT_SIZE, DCT_SIZE)
+    dct = _dct_matrix() @ small @ _dct_matrix().T
+    low = dct[:HASH_SIZE, :HASH_SIZE].ravel()
+    return low > np.median(low), _downscale(image, LAYOUT_GRID[1], LAYOUT_GRID[0]).ravel()
+
+def _file_sha256(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def build_reference_index(path=REFERENCE_INDEX_PATH, reference_dir=REFERENCE_DIR):
+    """Decode the reference JPEGs once and persist their signatures (requires Pillow)."""
+    try:
+        from PIL import Image
+    except ImportError:
+        raise RuntimeError("building the reference index requires Pillow (pip install pillow)") from None
+    references = {}
+    for slide_num in range(1, 33):
+        name = REFERENCE_FILE.format(slide_num)
+        with Image.open(os.path.join(reference_dir, name)) as im:
+            pixels = im.convert("L").resize(RASTER_SIZE, Image.Resampling.BOX)
+        bits, layout = image_signature(np.asarray(pixels, dtype=float) / 255)
+        references[str(slide_num)] = {"file": name, "sha256": _file_sha256(os.path.join(reference_dir, name)),
+                                      **_signature_entry(bits, layout)}
+    bits, layouts = _signature_arrays(references.values())
+    distance = signature_distance(bits[:, None], layouts[:, None], bits[None], layouts[None])
+    unrelated = float(np.median(distance[~np.eye(len(bits), dtype=bool)]))
+    index = {"version": REFERENCE_INDEX_VERSION, "raster": list(RASTER_SIZE), "references": references,
+             "unrelated_distance": round(unrelated, 4)}
+    _write_json(path, index)
+    return index
+
+def _signature_entry(bits, layout):
+    return {"phash": np.packbits(bits).tobytes().hex(), "layout": np.round(layout, 4).tolist()}
+
+def _signature_arrays(entries):
+    """(bits, layouts) arrays of stored signature entries."""
+    entries = list(entries)
+    bits = np.unpackbits(np.frombuffer(bytes.fromhex("".join(e["phash"] for e in entries)), dtype=np.uint8))
+    return bits.reshape(len(entries), -1).astype(bool), np.array([e["layout"] for e in entries])
+
+def _write_json(path, data):
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, separators=(",", ":"), sort_keys=True)
+        f.write("\n")
+    os.replace(tmp, path)
+
+def signature_distance(bits_a, layouts_a, bits_b, layouts_b):
+    """Distance in [0, 1] between signatures (broadcast over leading axes):
+    the mean of the pHash Hamming share and (1 - layout correlation) / 2."""
+    return (_hash_share(bits_a, bits_b) + (1 - _layout_correlation(layouts_a, layouts_b)) / 2) / 2
+
+def _hash_share(bits_a, bits_b):
+    return np.count_nonzero(bits_a != bits_b, axis=-1) / bits_a.shape[-1]
+
+def _layout_correlation(layouts_a, layouts_b):
+    """Pearson correlation of layout grids; 1 when both grids are flat, 0 when only one is."""
+    a = layouts_a - layouts_a.mean(axis=-1, keepdims=True)
+    b = layouts_b - layouts_b.mean(axis=-1, keepdims=True)
+    norm_a, norm_b = np.linalg.norm(a, axis=-1), np.linalg.norm(b, axis=-1)
+    norm = norm_a * norm_b
+    flat = np.asarray((norm_a == 0) & (norm_b == 0), dtype=float)
+    return np.divide((a * b).sum(axis=-1), norm, out=flat, where=norm > 0)
+
+def load_reference_index(path=REFERENCE_INDEX_PATH, reference_dir=REFERENCE_DIR):
+    """Load the persisted reference signatures, rebuilding them only if a JPEG changed.
+
+    The check hashes the reference files (milliseconds); decoding happens
+    only when the index is missing, outdated or a digest differs.
+    """
+    try:
+        with open(path, encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = None
+    if (index is None or index.get("version") != REFERENCE_INDEX_VERSION
+            or index.get("raster") != list(RASTER_SIZE)
+            or any(_file_sha256(os.path.join(reference_dir, entry["file"])) != entry["sha256"]
+                   for entry in index["references"].values())):
+        index = build_reference_index(path, reference_dir)
+    return index
+
+def template_signatures(slide_nums):
+    """(bits, layouts) arrays of the rendered templates."""
+    signatures = [image_signature(rasterize_scene(build_scene(n))) for n in slide_nums]
+    return np.array([bits for bits, _ in signatures]), np.array([layout for _, layout in signatures])
+
+def load_regression_baseline(path=REGRESSION_BASELINE_PATH):
+    """Accepted template signatures by template number ({} when none were accepted)."""
+    try:
+        with open(path, encoding='utf-8') as f:
+            baseline = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if baseline.get("version") != REGRESSION_BASELINE_VERSION or baseline.get("raster") != list(RASTER_SIZE):
+        return {}
+    return baseline["templates"]
+
+def accept_regression_baseline(templates=None, path=REGRESSION_BASELINE_PATH):
+    """Record the current renders as the accepted signatures (--accept); returns the count."""
+    if np is None:
+        raise RuntimeError(f"visual regression requires numpy ({NUMPY_HINT})")
+    slide_nums = list(range(1, 33) if templates is None else templates)
+    accepted = load_regression_baseline(path)
+    bits, layouts = template_signatures(slide_nums)
+    accepted.update({str(n): _signature_entry(b, l) for n, b, l in zip(slide_nums, bits, layouts)})
+    _write_json(path, {"version": REGRESSION_BASELINE_VERSION, "raster": list(RASTER_SIZE), "templates": accepted})
+    return len(slide_nums)
+
+def regression_results(templates=None, index=None, baseline=None):
+    """Per-template drift from the reference renders, as result dicts.
+
+    hash_distance is the pHash Hamming distance (0-64), layout_correlation
+    the Pearson correlation of the layout grids. drift is their combined
+    signature_distance() from the reference and change the one from the
+    accepted render (None if not accepted yet), both divided by the median
+    distance between unrelated references so 1.0 reads as "unrelated".
+    """
+    if np is None:
+        raise RuntimeError(f"visual regression requires numpy ({NUMPY_HINT})")
+    index = index or load_reference_index()
+    references = index["references"]
+    baseline = load_regression_baseline() if baseline is None else baseline
+    slide_nums = [n for n in (range(1, 33) if templates is None else templates) if str(n) in references]
+    if not slide_nums:
+        return []
+    bits, layouts = template_signatures(slide_nums)
+    entries = [references[str(n)] for n in slide_nums]
+    ref_bits, ref_layouts = _signature_arrays(entries)
+    unrelated = index["unrelated_distance"]
+
+    distance = np.count_nonzero(bits != ref_bits, axis=1)
+    correlation = _layout_correlation(layouts, ref_layouts)
+    drift = signature_distance(bits, layouts, ref_bits, ref_layouts) / unrelated
+    change = [None] * len(slide_nums)
+    accepted = [i for i, n in enumerate(slide_nums) if str(n) in baseline]
+    if accepted:
+        acc_bits, acc_layouts = _signature_arrays(baseline[str(slide_nums[i])] for i in accepted)
+        scores = signature_distance(bits[accepted], layouts[accepted], acc_bits, acc_layouts) / unrelated
+        for i, score in zip(accepted, scores.tolist()):
+            change[i] = round(score, 4)
+    return [{"template": n, "id": template_id(n), "reference": e["file"], "hash_distance": int(d),
+             "layout_correlation": round(float(c), 4), "drift": round(float(s), 4), "change": ch,
+             "status": ("drift" if s > REGRESSION_MAX_DRIFT
+                        else "changed" if ch is not None and ch > REGRESSION_MAX_CHANGE else "ok")}
+            for n, e, d, c, s, ch in zip(slide_nums, entries, distance, correlation, drift, change)]
+
+def run_regression(templates, report_path):
+    """Compare templates with their references and accepted renders, write the
+    JSON report ('-' = stdout) and print the flagged ones."""
+    results = regression_results(templates)
+    drifted = [result for result in results if result["status"] == "drift"]
+    changed = [result for result in results if result["status"] == "changed"]
+    report = {"results": results,
+              "summary": {"templates": len(results), "drifted": len(drifted), "changed": len(changed),
+                          "threshold": REGRESSION_MAX_DRIFT, "change_threshold": REGRESSION_MAX_CHANGE,
+                          "max_drift": max((result["drift"] for result in results), default=0.0),
+                          "unaccepted": sum(result["change"] is None for result in results)}}
+    if report_path == "-":
+        json.dump(report, sys.stdout, indent=1)
+        sys.stdout.write("\n")
+    else:
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=1)
+            f.write("\n")
+    for result in sorted(drifted, key=lambda result: -result["drift"]):
+        print(f"  ⚠ {result['id']}: drift {result['drift']:.3f} (pHash {result['hash_distance']}/64, "
+              f"layout r={result['layout_correlation']:.2f}) vs {result['reference']}", file=sys.stderr)
+    for result in sorted(changed, key=lambda result: -result["change"]):
+        print(f"  ⚠ {result['id']}: changed {result['change']:.3f} from the accepted render "
+              f"(re-run with --accept if intended)", file=sys.stderr)
+    print(f"🖼️ Compared {len(results)} templates with references: {len(drifted)} drifted "
+          f"(threshold {REGRESSION_MAX_DRIFT}), {len(changed)} changed (threshold {REGRESSION_MAX_CHANGE})",
+          file=sys.stderr)
+    return 1 if drifted or changed else 0
+
+# ============================================================================
+# RENDER SERVICE (--serve: local asyncio HTTP previews)
+# ============================================================================
+
+SERVE_CACHE_SIZE = 512              # Rendered SVGs kept in the LRU
+SERVE_MAX_BODY = 1 << 20            # Largest accepted POST body, in bytes
+
+_HTTP_REASONS = {200: "OK", 204: "No Content", 304: "Not Modified", 400: "Bad Request", 404: "Not Found",
+                 405: "Method Not Allowed", 413: "Payload Too Large", 422: "Unprocessable Entity",
+                 500: "Internal Server Error"}
+_CORS_HEADERS = {"Access-Control-Allow-Origin": "*", "Access-Control-Expose-Headers": "ETag"}
+
+class RenderedSvg:
+    """A cached SVG body with its strong ETag and gzip variant."""
+    __slots__ = ("body", "etag", "gzip")
+
+    def __init__(self, body):
+        self.body = body
+        self.etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        self.gzip = gzip.compress(body, mtime=0)  # mtime=0 keeps the bytes (and ETag) stable
+
+    @classmethod
+    def render(cls, slide_num, data=None):
+        """Render and compress a slide (RenderCache runs this off the event loop)."""
+        return cls(generate_svg_mockup(slide_num, data).encode('utf-8'))
+
+class RenderCache:
+    """Bounded LRU of rendered SVGs.
+
+    Keys are input_fingerprint() values, which cover the slideData, the
+    generator source and the theme (design tokens, helpers, font options),
+    so a cached entry can never be served for a changed input.
+    """
+
+    def __init__(self, maxsize=SERVE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    async def get(self, slide_num, data=None):
+        """Return the RenderedSvg for a slide.
+
+        A miss renders in the loop's default executor, so other connections
+        (and /stats) are served meanwhile; the entries are only touched on
+        the event loop thread.
+        """
+        key = input_fingerprint(slide_num, data)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+        self.misses += 1
+        entry = await asyncio.get_running_loop().run_in_executor(None, RenderedSvg.render, slide_num, data)
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return entry
+
+    def stats(self):
+        return {"entries": len(self), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+def _json_response(status, payload):
+    body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    return status, {"Content-Type": "application/json; charset=utf-8"}, body
+
+_ENTITY_TAG_RE = re.compile(r'(?:W/)?("[^"]*")')
+
+def if_none_match(header, etag):
+    """True if an If-None-Match header value matches `etag`.
+
+    The header may list several entity tags; they are compared with the
+    weak comparison function (RFC 9110 §13.1.2), so a W/"..." tag from a
+    proxy that weakened the response still matches.
+    """
+    header = header.strip()
+    if header == "*":
+        return True
+    return _ENTITY_TAG_RE.fullmatch(etag).group(1) in _ENTITY_TAG_RE.findall(header)
+
+def _svg_response(entry, headers):
+    """200/304 response for a cached SVG, gzip-encoded when the client accepts it."""
+    encodings = {token.split(";")[0].strip() for token in headers.get("accept-encoding", "").split(",")}
+    compressed = "gzip" in encodings
+    etag = entry.etag[:-1] + '-gzip"' if compressed else entry.etag  # Strong ETags differ per encoding
+    response_headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if if_none_match(headers.get("if-none-match", ""), etag):
+        return 304, response_headers, b""
+    response_headers["Content-Type"] = "image/svg+xml; charset=utf-8"
+    if compressed:
+        response_headers["Content-Encoding"] = "gzip"
+        return 200, response_headers, entry.gzip
+    return 200, response_headers, entry.body
+
+def _pack_response(pack, name, headers):
+    """200/304 response for a pack entry, sliced zero-copy from the mapping."""
+    etag = pack.etag(name)
+    response_headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if if_none_match(headers.get("if-none-match", ""), etag):
+        return 304, response_headers, b""
+    response_headers["Content-Type"] = "image/svg+xml; charset=utf-8"
+    if name.endswith(SVGZ_SUFFIX):
+        response_headers["Content-Encoding"] = "gzip"
+    return 200, response_headers, pack[name]
+
+async def handle_request(method, target, headers, body, cache, pack=None):
+    """Route one HTTP request; returns (status, headers, body).
+
+    GET  /template/{n}     built-in mockup for a template number or type name
+    POST /render           render the slideData object in the request body
+    GET  /render?slide=..  same, with URL-encoded slideData
+    GET  /pack/{name}      stored entry of the --pack file being served
+    GET  /stats            cache statistics
+    """
+    url = urllib.parse.urlsplit(target)
+    path = url.path.rstrip("/")
+    if method == "OPTIONS":
+        return 204, {"Access-Control-Allow-Methods": "GET, HEAD, POST, OPTIONS",
+                     "Access-Control-Allow-Headers": "Content-Type, If-None-Match"}, b""
+    if path.startswith("/template/"):
+        if method not in ("GET", "HEAD"):
+            return 405, {"Allow": "GET, HEAD, OPTIONS"}, b""
+        slide_num = find_template(path[len("/template/"):])
+        if slide_num is None:
+            return _json_response(404, {"error": f"unknown template {path[len('/template/'):]!r}"})
+        return _svg_response(await cache.get(slide_num), headers)
+    if path == "/render":
+        if method == "POST":
+            raw = body
+        elif method in ("GET", "HEAD"):
+            raw = urllib.parse.parse_qs(url.query).get("slide", [""])[0].encode('utf-8')
+        else:
+            return 405, {"Allow": "GET, HEAD, POST, OPTIONS"}, b""
+        try:
+            slide = json.loads(raw)
+        except ValueError as e:
+            return _json_response(400, {"error": f"invalid slideData JSON: {e}"})
+        if not isinstance(slide, dict):
+            return _json_response(400, {"error": "expected one slideData object"})
+        error = slide_data_error(slide)
+        if error is not None:
+            return _json_response(422, {"error": f"invalid slideData: {error}"})
+        slide_num = resolve_slide_num(slide)
+        if slide_num is None:
+            return _json_response(422, {"error": f"unsupported slide type {slide.get('type')!r}"})
+        return _svg_response(await cache.get(slide_num, slide), headers)
+    if path.startswith("/pack/") and pack is not None:
+        if method not in ("GET", "HEAD"):
+            return 405, {"Allow": "GET, HEAD, OPTIONS"}, b""
+        name = urllib.parse.unquote(path[len("/pack/"):])
+        if name not in pack:
+            return _json_response(404, {"error": f"no pack entry {name!r}"})
+        return _pack_response(pack, name, headers)
+    if path == "/stats" and method in ("GET", "HEAD"):
+        stats = {"cache": cache.stats()}
+        if pack is not None:
+            stats["pack"] = {"path": pack.path, "entries": len(pack)}
+        return _json_response(200, stats)
+    return _json_response(404, {"error": f"no route for {method} {url.path}"})
+
+async def _handle_connection(reader, writer, cache, pack=None):
+    """Serve HTTP/1.1 requests (with keep-alive) on one connection."""
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line.strip():
+                break
+            try:
+                method, target, version = request_line.decode('latin-1').split()
+            except ValueError:
+                method, target, version = "", "", "HTTP/1.0"
+            headers = {}
+            while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                name, _, value = line.decode('latin-1').partition(":")
+                headers[name.strip().lower()] = value.strip()
+            try:
+                length = int(headers.get("content-length") or 0) if method else 0
+            except ValueError:
+                length = -1
+            keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+            if not method or length < 0:
+                status, response_headers, body = _json_response(400, {"error": "malformed request"})
+                keep_alive = False
+            elif length > SERVE_MAX_BODY:
+                status, response_headers, body = _json_response(413, {"error": f"body over {SERVE_MAX_BODY} bytes"})
+                keep_alive = False
+            else:
+                request_body = await reader.readexactly(length) if length else b""
+                try:
+                    status, response_headers, body = await handle_request(method, target, headers,
+                                                                          request_body, cache, pack)
+                except Exception as e:
+                    # A bug in a generator must not drop the connection without a response
+                    print(f"  ⚠ {method} {target}: {type(e).__name__}: {e}", file=sys.stderr, flush=True)
+                    status, response_headers, body = _json_response(500, {"error": f"{type(e).__name__}: {e}"})
+            response_headers = {**_CORS_HEADERS, **response_headers, "Content-Length": str(len(body)),
+                                "Connection": "keep-alive" if keep_alive else "close"}
+            head = f"HTTP/1.1 {status} {_HTTP_REASONS.get(status, '')}\r\n"
+            head += "".join(f"{name}: {value}\r\n" for name, value in response_headers.items())
+            writer.write(head.encode('latin-1') + b"\r\n")
+            if body and method != "HEAD":
+                writer.write(body)  # Pack entries are memoryviews: written without a copy
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+def serve(address, cache_size=SERVE_CACHE_SIZE, pack_path=None):
+    """Run the preview server on '[HOST:]PORT' until interrupted (optionally serving a pack)."""
+    host, _, port = address.rpartition(":")
+    host = host or "127.0.0.1"
+    cache = RenderCache(cache_size)
+    pack = SvgPack(pack_path) if pack_path else None
+
+    async def run_server():
+        server = await asyncio.start_server(lambda r, w: _handle_connection(r, w, cache, pack), host, int(port))
+        print(f"🌐 Serving SVG previews on http://{host}:{port}/ (GET /template/{{n}}, POST /render)", flush=True)
+        if pack is not None:
+            print(f"📦 Serving {len(pack)} entries of {pack_path} at /pack/{{name}}", flush=True)
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run_server())
+    except KeyboardInterrupt:
+        stats = cache.stats()
+        print(f"\n👋 Stopped ({stats['hits']} cache hits, {stats['misses']} renders)")
+    finally:
+        if pack is not None:
+            pack.close()
+
+def parse_args(argv=None):
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(description="Generate minimal Apple-style SVG mockups.")
+    parser.add_argument("--data", metavar="PATH",
+                        help="render slideData from a JSON array or JSONL file (one deck per line); '-' reads stdin")
+    parser.add_argument("--jsonl", action="store_true",
+                        help="treat --data as JSONL regardless of its extension")
+    parser.add_argument("-o", "--output-dir", default=None,
+                        help="output directory (default: img/svg_mockups, or img/svg_mockups/batch with --data)")
+    parser.add_argument("-j", "--jobs", type=int, default=1, metavar="N",
+                        help="render with N worker processes (0 = one per CPU, default: 1 = serial)")
+    parser.add_argument("--chunk-size", type=int, default=None, metavar="N",
+                        help="slides per worker task with --jobs (default: 64, or an even split of the templates)")
+    parser.add_argument("--only", metavar="SELECTORS",
+                        help="render only these templates: comma-separated numbers, ranges (4-9), type names "
+                             "or globs (*_diagram); plugin templates included")
+    parser.add_argument("--exclude", metavar="SELECTORS",
+                        help="skip these templates (same syntax as --only)")
+    parser.add_argument("--format", choices=("files", "sprite", "both", "slides-api"), default="files",
+                        help=f"templates as one SVG per slide, a single {SPRITE_STEM}.svg bundle "
+                             f"(.svgz with --svgz), or both; "
+                             f"slides-api writes Google Slides batchUpdate JSON (one payload per deck)")
+    parser.add_argument("--fonts", choices=FONT_STRATEGIES, default="google",
+                        help="font source: Google Fonts @import (default), system stack only (offline), "
+                             "a shared local @font-face file, or a font embedded once per sprite bundle")
+    parser.add_argument("--font-file", metavar="PATH",
+                        help="font file for --fonts local/embed (.woff2/.woff/.ttf/.otf)")
+    parser.add_argument("--theme", metavar="NAMES",
+                        help=f"render templates in these themes: comma-separated {', '.join(THEMES)} or all; "
+                             f"each theme × aspect ratio goes to its own subdirectory (e.g. light_4x3/)")
+    parser.add_argument("--aspect", metavar="RATIOS",
+                        help=f"render templates on these canvases: comma-separated {', '.join(CANVASES)} "
+                             f"(16:9 also accepted) or all; the 16:9 layout is scaled to fit and centered, so "
+                             f"16:10 and 4:3 are letterboxed (layout and margins are not recomputed)")
+    parser.add_argument("--validate", metavar="REPORT",
+                        help="check object counts, safe margins, overlaps and text overflow instead of rendering; "
+                             "writes a JSON report ('-' = stdout) and exits 1 on issues (requires numpy)")
+    parser.add_argument("--regression", metavar="REPORT",
+                        help="compare the templates with the Apple_like_template/*.jpeg reference renders "
+                             "and the accepted renders (perceptual hash + layout grid of structure maps); writes "
+                             "per-template drift/change scores as JSON ('-' = stdout) and exits 1 above "
+                             "REGRESSION_MAX_DRIFT or REGRESSION_MAX_CHANGE (requires numpy)")
+    parser.add_argument("--accept", action="store_true",
+                        help="with --regression: record the current renders as accepted "
+                             f"(in {os.path.relpath(REGRESSION_BASELINE_PATH, _HERE)}) before comparing")
+    parser.add_argument("--incremental", action="store_true",
+                        help=f"skip slides whose inputs are unchanged since the last build (tracked in {MANIFEST_NAME})")
+    parser.add_argument("--precision", type=int, default=None, metavar="N",
+                        help="round coordinates to N decimal places (default: as computed)")
+    parser.add_argument("--minify", action="store_true",
+                        help="compact markup: no indentation or XML declaration, default attributes dropped, "
+                             "short colors")
+    parser.add_argument("--svgz", action="store_true",
+                        help="write gzip-compressed .svgz files (deterministic: no timestamp or file name)")
+    parser.add_argument("--pack", metavar="PATH",
+                        help=f"write all rendered slides into one indexed pack file (e.g. slides{PACK_SUFFIX}) "
+                             f"instead of loose files; with --serve, serve that pack at /pack/{{name}}")
+    parser.add_argument("--dedup", choices=DEDUP_MODES,
+                        help=f"with --data, render repeated slides once and store each distinct SVG once in "
+                             f"{BLOB_DIR}/; deck files become hardlinks or symlinks, or refs writes only "
+                             f"{REFS_NAME} (header/body/footer fragments per slide)")
+    parser.add_argument("--unpack", metavar="PACK",
+                        help="export a pack back to loose files in --output-dir (default: the pack name "
+                             "without its extension)")
+    parser.add_argument("--serve", metavar="[HOST:]PORT",
+                        help="run a local preview server instead of writing files "
+                             "(GET /template/{n}, POST /render with a slideData object)")
+    parser.add_argument("--cache-size", type=int, default=SERVE_CACHE_SIZE, metavar="N",
+                        help="rendered SVGs kept in the --serve LRU cache (default: %(default)s)")
+    parser.add_argument("--watch", action="store_true",
+                        help=f"keep running and re-render only the slides affected by edits to this module or "
+                             f"--data; publishes {WATCH_MANIFEST_NAME} for svg_viewer.html?watch (SVG files only)")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="record per-template render time, element count, bytes and write latency; "
+                             "writes a JSON summary or Prometheus textfile ('-' = stdout)")
+    parser.add_argument("--metrics-format", choices=("json", "prometheus"), default=None,
+                        help="--metrics output format (default: prometheus for *.prom, otherwise json)")
+    parser.add_argument("--profile", metavar="PATH",
+                        help="run under cProfile and dump pstats to PATH (parent process only; use -j 1)")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="trace allocations with tracemalloc and report the peak and top sites")
+    args = parser.parse_args(argv)
+    if args.accept and not args.regression:
+        parser.error("--accept requires --regression")
+    if args.data and args.format in ("sprite", "both"):
+        parser.error(f"--format {args.format} bundles the built-in templates; it cannot be used with --data")
+    return args
+
+def render_matrix(output_dir, templates, themes, canvases, workers=1, chunk_size=None):
+    """Render every template × theme × canvas variant into per-variant subdirectories."""
+    print(f"🎨 Rendering {len(templates)} templates × {len(themes)} themes × {len(canvases)} aspect ratios...")
+    chunk_size = chunk_size or max(1, math.ceil(len(templates) / (workers * 2)))
+    count = 0
+    jobs = matrix_jobs(output_dir, templates, themes, canvases)
+    for results in run_jobs(jobs, workers, chunk_size, render_variants_job):
+        count += len(results)
+    for canvas in canvases:
+        for theme in themes:
+            letterbox = ", 16:9 letterboxed" if canvas.letterboxed else ""
+            print(f"  ✓ {variant_name(theme, canvas)}/ ({canvas.width}×{canvas.height}, {theme.name}{letterbox})")
+    print(f"✨ Rendered {count} SVGs into {output_dir}/")
+
+def main(argv=None):
+    """Main function to generate all SVG mockups."""
+    args = parse_args(argv)
+    save_token_cache()
+    metrics = RenderMetrics() if args.metrics else None
+    configure_instrumentation(metrics is not None)
+    try:
+        with profiling(args.profile, args.trace_memory, metrics):
+            return run(args, metrics)
+    finally:
+        if metrics is not None:
+            fmt = args.metrics_format or ("prometheus" if args.metrics.endswith(".prom") else "json")
+            metrics.save(args.metrics, fmt)
+
+def run(args, metrics=None):
+    """Generate mockups for parsed command-line options."""
+    workers = _resolve_workers(args.jobs)
+    output_dir = args.output_dir or ("img/svg_mockups/batch" if args.data else "img/svg_mockups")
+    font_url = None
+    if args.font_file:
+        # Referenced from the SVGs, so make it relative to where they are written
+        font_url = os.path.relpath(args.font_file, os.path.join(output_dir, "deck_0000") if args.data else output_dir)
+    try:
+        configure_fonts(args.fonts, args.font_file, font_url)
+    except ValueError as e:
+        sys.exit(f"error: {e} (use --font-file)")
+    try:
+        configure_output(args.precision, args.minify, args.svgz)
+    except ValueError as e:
+        sys.exit(f"error: --precision: {e}")
+    try:
+        templates = select_templates(args.only, args.exclude)
+    except ValueError as e:
+        sys.exit(f"error: --only/--exclude: {e}")
+    if args.unpack:
+        target = args.output_dir or os.path.splitext(args.unpack)[0]
+        try:
+            with SvgPack(args.unpack) as pack:
+                count = pack.extract(target)
+        except ValueError as e:
+            sys.exit(f"error: --unpack: {e}")
+        print(f"✨ Exported {count} slides from {args.unpack} into {target}/")
+        return
+    if args.serve:
+        try:
+            return serve(args.serve, args.cache_size, args.pack)
+        except ValueError as e:
+            sys.exit(f"error: --pack: {e}")
+    if args.validate:
+        if np is None:
+            sys.exit(f"error: --validate requires numpy ({NUMPY_HINT})")
+        scenes = batch_scenes(args.data, args.jsonl) if args.data else template_scenes(templates)
+        return run_validation(scenes, args.validate)
+    if args.regression:
+        if np is None:
+            sys.exit(f"error: --regression requires numpy ({NUMPY_HINT})")
+        if args.data:
+            sys.exit("error: --regression compares the built-in templates (not --data)")
+        try:
+            if args.accept:
+                print(f"✅ Accepted {accept_regression_baseline(templates)} template renders", file=sys.stderr)
+            return run_regression(templates, args.regression)
+        except RuntimeError as e:
+            sys.exit(f"error: --regression: {e}")
+    if args.theme or args.aspect:
+        try:
+            themes, canvases = select_variants(args.theme, args.aspect)
+        except ValueError as e:
+            sys.exit(f"error: --theme/--aspect: {e}")
+        if args.data or args.watch or args.incremental or args.pack or args.format != "files":
+            sys.exit("error: --theme/--aspect render template SVG files only "
+                     "(not with --data, --watch, --incremental, --pack or --format)")
+        return render_matrix(output_dir, templates, themes, canvases, workers, args.chunk_size)
+    if args.pack:
+        if args.watch or args.incremental or args.format != "files":
+            sys.exit("error: --pack stores SVG files only (not with --watch, --incremental or --format)")
+        print(f"📦 Packing {'slideData from ' + args.data if args.data else f'{len(templates)} templates'} "
+              f"into {args.pack}...")
+        count, ratio = write_pack(args.pack, args.data, args.jsonl, templates, workers, args.chunk_size)
+        print(f"✨ Packed {count} slides into {args.pack} ({os.path.getsize(args.pack):,} bytes, "
+              f"dedup ratio {ratio:.2f}×)")
+        return
+    if args.dedup:
+        if not args.data or args.watch or args.incremental or args.format != "files":
+            sys.exit("error: --dedup needs --data and SVG files (not --watch, --incremental or --format)")
+        if args.dedup == "refs" and args.svgz:
+            sys.exit("error: --dedup refs stores uncompressed fragments (not --svgz)")
+        os.makedirs(output_dir, exist_ok=True)
+        print(f"🎨 Rendering slideData from {args.data} (dedup: {args.dedup})...")
+        index = ViewerIndex(output_dir) if args.dedup != "refs" else None
+        count, rendered, store = write_batch_dedup(args.data, output_dir, args.dedup, args.jsonl, workers,
+                                                   args.chunk_size, index=index)
+        print(f"✨ Rendered {rendered} unique of {count} slides into {output_dir}/")
+        if index is not None:
+            index.close()
+            print(f"📇 Viewer index: {index.path} ({index.pages} pages)")
+        print(f"♻️  Dedup: {len(store.known)} blobs, {store.referenced:,} bytes referenced → "
+              f"{store.stored:,} stored (ratio {store.ratio:.2f}×)")
+        return
+    if args.watch:
+        if args.data == "-":
+            sys.exit("error: --watch needs a --data file, not stdin")
+        os.makedirs(output_dir, exist_ok=True)
+        return watch(args, output_dir, workers)
+    if args.data:
+        os.makedirs(output_dir, exist_ok=True)
+        if args.format == "slides-api":
+            count = write_batch_slides_api(args.data, output_dir, args.jsonl)
+            print(f"✨ Wrote {count} batchUpdate payloads into {output_dir}/")
+            return
+        manifest = BuildManifest(output_dir) if args.incremental else None
+        index = ViewerIndex(output_dir, incremental=manifest is not None)
+        print(f"🎨 Rendering slideData from {args.data}...")
+        count = write_batch(args.data, output_dir, args.jsonl, workers, args.chunk_size, manifest=manifest,
+                            metrics=metrics, index=index)
+        index.close()
+        print(f"✨ Rendered {count} slides into {output_dir}/")
+        print(f"📇 Viewer index: {index.path} ({index.count} slides, {index.pages} pages)")
+        if manifest is not None:
+            manifest.save()
+            print(f"♻️  Incremental: {manifest.summary()}")
+        return
+
+    os.makedirs(output_dir, exist_ok=True)
+    if args.format == "slides-api":
+        filepath = os.path.join(output_dir, f"apple_templates{SLIDES_API_SUFFIX}")
+        payload, warnings = deck_to_slides_payload((i, i, None) for i in templates)
+        for warning in warnings:
+            print(f"  ⚠ {warning}", file=sys.stderr)
+        write_slides_payload(payload, filepath)
+        print(f"✨ Wrote batchUpdate payload for {len(templates)} templates: {filepath}")
+        return
+    manifest = BuildManifest(output_dir) if args.incremental else None
+
+    print(f"🎨 Generating minimal Apple-style SVG mockups...")
+    print(f"📁 Output directory: {output_dir}/")
+    print(f"🎯 Design principle: 3-4 objects maximum per slide\n")
+
+    chunk_size = args.chunk_size or max(1, math.ceil(len(templates) / (workers * 2)))
+    index = None
+    jobs = ()
+    if args.format != "sprite":
+        # An existing bundle is still listed: `--format files` does not rewrite it
+        has_sprite = args.format == "both" or os.path.exists(os.path.join(output_dir, sprite_name()))
+        index = ViewerIndex(output_dir, incremental=manifest is not None,
+                            sprite=sprite_name() if has_sprite else None)
+        jobs = index.track(template_jobs(output_dir, templates))
+    if manifest is not None:
+        jobs = manifest.filter(jobs, index)
+    for result in run_indexed(jobs, workers, chunk_size, index):
+        if manifest is not None:
+            manifest.record(result)
+        if metrics is not None:
+            metrics.observe(result)
+        i, filepath = result[:2]
+        print(f"  ✓ {i:2d}. {os.path.basename(filepath)}")
+
+    if args.format != "files":
+        write_sprite(((template_id(i), i, None) for i in templates), os.path.join(output_dir, sprite_name()))
+        print(f"  ✓ sprite bundle: {sprite_name()} ({len(templates)} symbols)")
+    if index is not None:
+        index.close()
+        print(f"  ✓ viewer index: {VIEWER_INDEX_NAME} ({index.pages} pages)")
+
+    if manifest is not None:
+        manifest.save()
+        print(f"\n♻️  Incremental: {manifest.summary()}")
+        for key in manifest.skipped:
+            print(f"  · {key}")
+    print(f"\n✨ Successfully generated {len(templates)} minimal SVG mockups!")
     print(f"🍎 Each slide follows Apple design principles:")
     print(f"   • Maximum 3-4 visual objects")
     print(f"   • Generous whitespace (12% H / 15% V margins)")
     print(f"   • Large typography (64-96pt titles)")
     print(f"   • Minimal color palette (3 colors max)")
-    print(f"\n📖 Open svg_viewer.html to preview all slides")
+    print(f"\n📖 Serve the repository root (python3 -m http.server) and open svg_viewer.html to preview all slides")
 
 if __name__ == "__main__":
-    main()
+    # Plugins that `import generate_svg_mockups` must share this module's registry
+    sys.modules.setdefault("generate_svg_mockups", sys.modules[__name__])
+    sys.exit(main())
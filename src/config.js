@@ -675,6 +675,26 @@ const CONFIG = {
       caption2: 13        
     },
     
+    // SVG mockup type scale (px on the 1920×1080 canvas of generate_svg_mockups.py)
+    mockupTypography: {
+      hero: 96,           // Hero titles
+      title: 64,          // Section titles
+      body: 32,           // Body text
+      caption: 24         // Captions (minimum readable size)
+    },
+    
+    // SVG mockup palette (dark slides of generate_svg_mockups.py)
+    mockupColors: {
+      background: '#000000',
+      text: '#FFFFFF',
+      textSecondary: '#86868B',  // Secondary text and neutral shapes
+      accent: '#0A84FF',
+      surface: '#333333',        // De-emphasized panels (before/after)
+      textMuted: '#CCCCCC',      // Text on surface panels
+      positive: '#30D158',       // Gains in stat comparisons
+      negative: '#FF9F0A'        // Losses in stat comparisons
+    },
+    
     // Spacing Scale (8pt grid system) - DOUBLED for breathing room
     spacing: {
       xs: 8,     // 4→8px: Minimal spacing
@@ -741,7 +761,9 @@ const CONFIG = {
         accent: '#0A84FF',
         accentHover: '#0070E0',
         border: '#D2D2D7',
-        separator: '#E5E5EA'
+        separator: '#E5E5EA',
+        positive: '#248A3D',
+        negative: '#C93400'
       },
       dark: {
         background: '#000000',
@@ -753,7 +775,9 @@ const CONFIG = {
         accent: '#0A84FF',
         accentHover: '#409CFF',
         border: '#38383A',
-        separator: '#48484A'
+        separator: '#48484A',
+        positive: '#30D158',
+        negative: '#FF9F0A'
       }
     },
     
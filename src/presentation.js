@@ -161,3 +161,27 @@ const slideGenerators = {
   imageText: createImageTextSlide
 };
 
+
+// ========================================
+// 5. 事前計算済み batchUpdate ペイロードの適用
+// ========================================
+
+/**
+ * generate_svg_mockups.py --format slides-api が出力した batchUpdate ペイロードを
+ * Slides API（高度なサービス）でまとめて送信します。
+ * シェイプごとの SlidesApp 呼び出しを数回の一括リクエストに置き換えます。
+ * @param {string} presentationId 対象プレゼンテーションID
+ * @param {{requests: Object[]}|string} payload ペイロード（オブジェクトまたはJSON文字列）
+ * @param {number} [chunkSize=500] 1回の batchUpdate に含めるリクエスト数
+ * @return {number} 送信した batchUpdate 呼び出し回数
+ */
+function applyBatchUpdatePayload(presentationId, payload, chunkSize = 500) {
+  const data = typeof payload === 'string' ? JSON.parse(payload) : payload;
+  const requests = Array.isArray(data.requests) ? data.requests : [];
+  let calls = 0;
+  for (let i = 0; i < requests.length; i += chunkSize) {
+    Slides.Presentations.batchUpdate({ requests: requests.slice(i, i + chunkSize) }, presentationId);
+    calls++;
+  }
+  return calls;
+}
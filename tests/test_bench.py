@@ -0,0 +1,17 @@
+import io
+
+import bench_svg_mockups as bench
+
+
+def _document(**results):
+    return {"results": results}
+
+
+def test_unmeasured_throughput_prints_na():
+    baseline = _document(e2e=bench._result(100, 1000, 0.5), io=bench._result(100, 1000, 0.5))
+    current = _document(e2e=bench._result(100, 1000, 0), io=bench._result(100, 1000, 1.0))
+    rows = list(bench.compare_results(baseline, current))
+    out = io.StringIO()
+    assert bench.print_comparison(rows, out) == 2  # io halved: slides and bytes per second
+    lines = [line for line in out.getvalue().splitlines() if "e2e" in line]
+    assert len(lines) == 2 and all(line.split()[-3:] == ["→", "n/a", "n/a"] for line in lines)
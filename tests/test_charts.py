@@ -0,0 +1,42 @@
+import math
+
+import pytest
+
+import generate_svg_mockups as g
+
+np = pytest.importorskip("numpy")
+
+
+def test_lttb_keeps_endpoints_and_extremes():
+    x = np.arange(1000, dtype=float)
+    y = np.sin(x / 50)
+    y[437] = 10
+    y[712] = -10
+    picked = g.lttb(x, y, 32)
+    assert len(picked) == 32
+    assert picked[0] == 0 and picked[-1] == 999
+    assert np.all(np.diff(picked) > 0)
+    assert {437, 712} <= set(picked.tolist())
+
+
+def test_lttb_returns_short_series_unchanged():
+    x = np.arange(10, dtype=float)
+    assert g.lttb(x, x * 2, 32).tolist() == list(range(10))
+
+
+def test_pie_slices_buckets_small_categories():
+    names, fractions = g.pie_slices(["a", "b", "c", "d", "e"], [50, 30, 10, 6, 4])
+    assert names == ["a", "b", "Other"]
+    assert fractions.tolist() == pytest.approx([0.5, 0.3, 0.2])
+
+
+def test_pie_slices_sends_tiny_shares_to_other():
+    names, fractions = g.pie_slices(["a", "b", "c"], [96, 3, 1])
+    assert names == ["a", "Other"]
+    assert math.isclose(fractions.sum(), 1)
+
+
+def test_pie_slices_ignores_invalid_values():
+    names, fractions = g.pie_slices(["a", "b", "c"], [float("nan"), -5, 2])
+    assert names == ["c"] and fractions.tolist() == [1.0]
+    assert g.pie_slices(["a"], [0]) is None
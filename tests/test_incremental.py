@@ -0,0 +1,65 @@
+import hashlib
+import json
+import os
+
+import generate_svg_mockups as g
+
+
+def _render(output_dir):
+    manifest = g.BuildManifest(str(output_dir))
+    for result in g.run_jobs(manifest.filter(g.template_jobs(str(output_dir), [6, 10]))):
+        manifest.record(result)
+    manifest.save()
+    return manifest
+
+
+def test_svgz_manifest_describes_bytes_on_disk(tmp_path):
+    g.configure_output(svgz=True)
+    try:
+        _render(tmp_path)
+        with open(tmp_path / g.MANIFEST_NAME, encoding="utf-8") as f:
+            entries = json.load(f)["entries"]
+        for key, entry in entries.items():
+            with open(tmp_path / key, "rb") as f:
+                stored = f.read()
+            assert entry["size"] == len(stored) == os.path.getsize(tmp_path / key)
+            assert entry["output"] == hashlib.sha256(stored).hexdigest()
+        assert sorted(_render(tmp_path).skipped) == sorted(entries)
+    finally:
+        g.configure_output()
+
+
+def _pages(output_dir):
+    with open(output_dir / g.VIEWER_INDEX_NAME, encoding="utf-8") as f:
+        pages = json.load(f)["pages"]
+    return [json.loads((output_dir / page).read_text(encoding="utf-8"))["slides"] for page in pages]
+
+
+def test_skipped_slides_flush_pages_before_close(tmp_path, monkeypatch):
+    monkeypatch.setattr(g, "VIEWER_PAGE_SIZE", 2)
+    templates = [1, 6, 10, 20, 24]
+    for run in range(2):
+        manifest = g.BuildManifest(str(tmp_path))
+        index = g.ViewerIndex(str(tmp_path), incremental=True)
+        jobs = manifest.filter(index.track(g.template_jobs(str(tmp_path), templates)), index)
+        if run == 0:
+            for result in g.run_jobs(jobs):
+                manifest.record(result)
+                index.record(*result[:4], None)
+        else:
+            assert list(jobs) == []
+            assert index.pages == 2  # Every full page is out before close()
+        index.close()
+        manifest.save()
+        if run == 0:
+            rendered = _pages(tmp_path)
+    assert _pages(tmp_path) == rendered
+
+
+def test_damaged_output_is_rewritten(tmp_path):
+    _render(tmp_path)
+    damaged = tmp_path / (g.template_id(6) + ".svg")
+    damaged.write_text("<svg/>")
+    manifest = _render(tmp_path)
+    assert manifest.rewritten == [damaged.name]
+    assert damaged.read_text(encoding="utf-8") == g.generate_svg_mockup(6)
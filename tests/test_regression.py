@@ -0,0 +1,29 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import generate_svg_mockups as g
+
+
+def test_current_templates_pass():
+    results = g.regression_results()
+    assert len(results) == 32
+    assert [r["id"] for r in results if r["status"] != "ok"] == []
+    assert all(r["change"] == 0 for r in results)
+
+
+def test_swapped_template_is_flagged():
+    index = g.load_reference_index()
+    baseline = g.load_regression_baseline()
+    swapped = {"4": baseline["5"], "5": baseline["4"]}
+    results = g.regression_results([4, 5], index, swapped)
+    assert [r["status"] for r in results] == ["changed", "changed"]
+
+
+def test_structure_map_ignores_brightness():
+    image = np.zeros((144, 256))
+    image[40:100, 60:200] = 0.3
+    bits, layout = g.image_signature(image)
+    bright_bits, bright_layout = g.image_signature(image / 0.3)
+    assert (bits == bright_bits).all()
+    assert np.allclose(layout, bright_layout)
@@ -0,0 +1,18 @@
+import os
+
+import generate_svg_mockups as g
+
+
+def _render_or_die(job):
+    if job[0] == 10 and os.environ.get("SVG_MOCKUPS_TEST_PARENT") != str(os.getpid()):
+        os._exit(1)
+    return g.render_job(job)
+
+
+def test_dead_worker_falls_back_to_serial(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv("SVG_MOCKUPS_TEST_PARENT", str(os.getpid()))
+    jobs = list(g.template_jobs(str(tmp_path), range(1, 17)))
+    results = list(g.run_jobs(jobs, workers=2, chunk_size=2, render=_render_or_die))
+    assert [result[0] for result in results] == list(range(1, 17))
+    assert all(os.path.exists(result[1]) for result in results)
+    assert "rendering the remaining jobs serially" in capsys.readouterr().err
@@ -0,0 +1,50 @@
+import asyncio
+import json
+import time
+
+import generate_svg_mockups as g
+
+
+def test_if_none_match_uses_weak_comparison():
+    etag = '"abc-gzip"'
+    assert g.if_none_match('"abc-gzip"', etag)
+    assert g.if_none_match('W/"abc-gzip"', etag)
+    assert g.if_none_match('"other", W/"abc-gzip"', etag)
+    assert g.if_none_match(" * ", etag)
+    assert not g.if_none_match('"abc"', etag)
+    assert not g.if_none_match("", etag)
+
+
+def test_weak_tag_gets_304():
+    cache = g.RenderCache()
+    status, headers, _ = asyncio.run(g.handle_request("GET", "/template/6", {}, b"", cache))
+    assert status == 200
+    status, _, body = asyncio.run(g.handle_request("GET", "/template/6", {"if-none-match": f'W/{headers["ETag"]}'},
+                                                   b"", cache))
+    assert (status, body) == (304, b"")
+
+
+def test_slow_render_does_not_block_other_requests(monkeypatch):
+    def slow_render(slide_num, data=None):
+        time.sleep(0.5)
+        return "<svg/>"
+
+    monkeypatch.setattr(g, "generate_svg_mockup", slow_render)
+    cache = g.RenderCache()
+    finished = []
+
+    async def request(target):
+        status, _, body = await g.handle_request("GET", target, {}, b"", cache)
+        finished.append((target, status))
+        return body
+
+    async def main():
+        render = asyncio.ensure_future(request("/template/6"))
+        await asyncio.sleep(0.05)
+        stats = json.loads(await request("/stats"))
+        await render
+        return stats
+
+    stats = asyncio.run(main())
+    assert finished == [("/stats", 200), ("/template/6", 200)]
+    assert stats["cache"]["misses"] == 1
@@ -0,0 +1,36 @@
+import io
+
+import pytest
+
+import generate_svg_mockups as g
+
+
+def _elements(text, chunk_size):
+    return list(g._iter_json_array(io.StringIO(text), chunk_size))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 1 << 16])
+def test_iter_json_array_matches_json_load(chunk_size):
+    text = ' [ {"title": "a, b]"}, [1, 2] ,12345,\n"x" ] '
+    assert _elements(text, chunk_size) == [{"title": "a, b]"}, [1, 2], 12345, "x"]
+    assert _elements("[ ]", chunk_size) == []
+
+
+@pytest.mark.parametrize("text", ["[1 2]", "[,,{}]", "[1,]", "[1,,2]", "[,]", "[1", "{}"])
+@pytest.mark.parametrize("chunk_size", [1, 3, 1 << 16])
+def test_iter_json_array_rejects_malformed_separators(text, chunk_size):
+    with pytest.raises(ValueError):
+        _elements(text, chunk_size)
+
+
+def test_iter_slide_data_decks_and_slides():
+    slides = list(g.iter_slide_data(io.StringIO('[{"type": "title"}, {"type": "content"}]')))
+    assert [entry[:2] for entry in slides] == [(0, 0), (0, 1)]
+    decks = list(g.iter_slide_data(io.StringIO('[[{"type": "title"}], [{}, {}]]')))
+    assert [entry[:2] for entry in decks] == [(0, 0), (1, 0), (1, 1)]
+
+
+@pytest.mark.parametrize("text", ['[[{"type": "title"}], {"type": "title"}]', '[{"type": "title"}, []]'])
+def test_iter_slide_data_rejects_mixed_arrays(text):
+    with pytest.raises(ValueError, match="mixed decks and slides"):
+        list(g.iter_slide_data(io.StringIO(text)))
@@ -0,0 +1,60 @@
+import math
+import os
+
+import generate_svg_mockups as g
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "slides_api")
+
+
+def _area(polygon):
+    return abs(sum(g._cross((0, 0), polygon[i - 1], polygon[i]) for i in range(len(polygon)))) / 2
+
+
+def test_payload_matches_fixture(tmp_path):
+    # Regenerate with: payload, _ = deck_to_slides_payload([(6, 6, None), (10, 10, None), (20, 20, None)])
+    #                  write_slides_payload(payload, <fixture path>)
+    payload, warnings = g.deck_to_slides_payload([(6, 6, None), (10, 10, None), (20, 20, None)])
+    out = tmp_path / "deck.batchUpdate.json"
+    g.write_slides_payload(payload, str(out))
+    with open(os.path.join(FIXTURES, "templates_006_010_020.batchUpdate.json"), "rb") as f:
+        assert out.read_bytes() == f.read()
+    assert warnings == []
+
+
+def test_wedge_exported_as_filled_triangles():
+    scene = g.Scene()
+    scene.path("M 960 540 L 960 240 A 300 300 0 0 1 1260 540 Z", g.ACCENT_BLUE, 0.7)
+    requests, warnings = g.scene_to_slides_requests(scene, "p", 0)
+    shapes = [r["createShape"] for r in requests if "createShape" in r]
+    assert shapes and all(shape["shapeType"] == "RIGHT_TRIANGLE" for shape in shapes)
+    fills = [r["updateShapeProperties"]["shapeProperties"]["shapeBackgroundFill"] for r in requests
+             if "updateShapeProperties" in r]
+    assert all(fill["solidFill"]["alpha"] == 0.7 for fill in fills)
+    assert warnings == []
+
+
+def test_unsupported_path_is_reported_not_printed(capsys):
+    scene = g.Scene()
+    scene.path("M 0 0 C 10 10 20 10 30 0 Z", g.ACCENT_BLUE)
+    requests, warnings = g.scene_to_slides_requests(scene, "p", 0)
+    assert not any("createShape" in r for r in requests)
+    assert warnings == ["p: 1 path(s) with unsupported commands skipped"]
+    assert capsys.readouterr().err == ""
+
+
+def test_triangle_transform_maps_unit_corners():
+    create = g._triangle_requests("t", "p", (10, 20), (30, 80), (90, 40), "#0A84FF", None, 1)[0]["createShape"]
+    t = create["elementProperties"]["transform"]
+    size = g.SLIDES_TRIANGLE_SIZE
+    corners = [(t["scaleX"] * u + t["shearX"] * v + t["translateX"], t["shearY"] * u + t["scaleY"] * v + t["translateY"])
+               for u, v in ((0, 0), (0, size), (size, size))]
+    assert corners == [(10, 20), (30, 80), (90, 40)]
+
+
+def test_triangulate_covers_polygon():
+    wedge = g.path_outline("M 960 540 L 960 240 A 300 300 0 1 1 700 690 Z")
+    area = [(0, 10), (0, 5), (1, 7), (2, 3), (3, 8), (4, 1), (4, 10), (0, 10)]
+    for polygon in (wedge, area):
+        triangles = g.triangulate(polygon)
+        assert math.isclose(sum(_area(t) for t in triangles), _area(polygon[:-1]))
+
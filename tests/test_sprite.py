@@ -0,0 +1,35 @@
+import gzip
+from xml.dom import minidom
+
+import pytest
+
+import generate_svg_mockups as g
+
+
+@pytest.fixture
+def output_options():
+    yield g.configure_output
+    g.configure_output()
+
+
+def _symbols(data):
+    return [symbol.getAttribute("id") for symbol in minidom.parseString(data).getElementsByTagName("symbol")]
+
+
+def test_sprite_honours_minify_and_svgz(tmp_path, output_options):
+    entries = [(g.template_id(i), i, None) for i in (1, 6)]
+    g.write_sprite(entries, str(tmp_path / "plain.svg"))
+    plain = (tmp_path / "plain.svg").read_bytes()
+    output_options(minify=True, svgz=True)
+    assert g.sprite_name() == "apple_templates_sprite.svgz"
+    g.write_sprite(entries, str(tmp_path / g.sprite_name()))
+    minified = gzip.decompress((tmp_path / g.sprite_name()).read_bytes())
+    assert len(minified) < len(plain) and b"\n" not in minified
+    assert _symbols(minified) == _symbols(plain) == [entry[0] for entry in entries]
+
+
+@pytest.mark.parametrize("fmt", ["sprite", "both"])
+def test_sprite_format_rejects_data(fmt, capsys):
+    with pytest.raises(SystemExit):
+        g.parse_args(["--data", "deck.json", "--format", fmt])
+    assert "cannot be used with --data" in capsys.readouterr().err
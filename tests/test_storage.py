@@ -0,0 +1,80 @@
+import os
+
+import pytest
+
+import generate_svg_mockups as g
+
+
+def test_pack_round_trip(tmp_path):
+    path = str(tmp_path / "slides.svgpack")
+    entries = {"deck_0000/a.svg": b"<svg>a</svg>", "deck_0000/b.svg": b"<svg>b</svg>",
+               "deck_0001/a.svg": b"<svg>a</svg>"}
+    with g.PackWriter(path) as writer:
+        for name, data in entries.items():
+            writer.add(name, data)
+        with pytest.raises(ValueError):
+            writer.add("deck_0000/a.svg", b"")
+    assert writer.ratio == pytest.approx(36 / 24)
+    assert not os.path.exists(path + ".tmp")
+    with g.SvgPack(path) as pack:
+        assert len(pack) == 3 and list(pack) == list(entries)
+        for name, data in entries.items():
+            view = pack[name]
+            assert bytes(view) == data
+            view.release()
+        assert pack.etag("deck_0000/a.svg") == pack.etag("deck_0001/a.svg")
+        assert pack.extract(str(tmp_path / "out")) == 3
+    assert (tmp_path / "out" / "deck_0001" / "a.svg").read_bytes() == b"<svg>a</svg>"
+
+
+def test_pack_writer_discards_partial_file_on_error(tmp_path):
+    path = str(tmp_path / "slides.svgpack")
+    with pytest.raises(RuntimeError):
+        with g.PackWriter(path) as writer:
+            writer.add("a.svg", b"<svg/>")
+            raise RuntimeError
+    assert os.listdir(tmp_path) == []
+
+
+def test_svg_pack_rejects_other_files(tmp_path):
+    for content in (b"", b"not a pack at all, just some bytes"):
+        path = tmp_path / "bad.svgpack"
+        path.write_bytes(content)
+        with pytest.raises(ValueError):
+            g.SvgPack(str(path))
+
+
+def test_blob_store_stores_each_digest_once(tmp_path):
+    store = g.BlobStore(str(tmp_path / "blobs"))
+    first = store.put(b"<svg>a</svg>")
+    assert store.put(b"<svg>a</svg>") == first
+    second = store.put(b"<svg>b</svg>")
+    assert store.stored == 24 and store.known == {first, second}
+    assert store.read(first) == b"<svg>a</svg>"
+    for mode in ("hardlink", "symlink"):
+        target = tmp_path / f"{mode}.svg"
+        store.link(first, str(target), mode)
+        store.link(first, str(target), mode)  # Replaces an existing file
+        assert target.read_bytes() == b"<svg>a</svg>"
+    assert os.path.islink(tmp_path / "symlink.svg") and not os.path.isabs(os.readlink(tmp_path / "symlink.svg"))
+    assert g.BlobStore(str(tmp_path / "blobs")).put(b"<svg>a</svg>") == first  # Reuses the blob on disk
+
+
+def test_build_manifest_skips_unchanged_inputs(tmp_path):
+    title, kpi = (g.template_id(i) + ".svg" for i in (1, 6))
+
+    def build():
+        manifest = g.BuildManifest(str(tmp_path))
+        for result in g.run_jobs(manifest.filter(g.template_jobs(str(tmp_path), [1, 6]))):
+            manifest.record(result)
+        manifest.save()
+        return manifest
+
+    assert build().rewritten == [title, kpi]
+    assert build().skipped == [title, kpi]
+    (tmp_path / kpi).write_text("<svg/>")  # Size no longer matches the manifest
+    rebuilt = build()
+    assert (rebuilt.skipped, rebuilt.rewritten) == ([title], [kpi])
+    os.remove(tmp_path / title)
+    rebuilt = build()
+    assert (rebuilt.skipped, rebuilt.rewritten) == ([kpi], [title])
@@ -0,0 +1,23 @@
+import generate_svg_mockups as g
+
+
+def _fits(lines, max_width, size):
+    return all(g.measure_text(line, size) <= max_width for line in lines)
+
+
+def test_fit_text_keeps_short_text():
+    assert g.fit_text("Hello", 800, size=64) == (64, ("Hello",))
+
+
+def test_fit_text_wraps_before_shrinking():
+    text = "Design is not just what it looks like and feels like"
+    size, lines = g.fit_text(text, 900, size=64, max_lines=3)
+    assert size == 64 and len(lines) > 1
+    assert " ".join(lines) == text and _fits(lines, 900, size)
+
+
+def test_fit_text_shrinks_to_minimum_then_ellipsizes():
+    text = "An extraordinarily long headline that cannot possibly fit " * 4
+    size, lines = g.fit_text(text, 600, size=96, max_lines=2, min_size=24)
+    assert size == 24 and len(lines) == 2
+    assert lines[-1].endswith("…") and _fits(lines, 600, size)
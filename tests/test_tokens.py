@@ -0,0 +1,21 @@
+import os
+import subprocess
+import sys
+
+import generate_svg_mockups as g
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_builtin_tokens_match_config():
+    assert g._freeze(g.BUILTIN_TOKENS) == g.DESIGN_TOKENS
+
+
+def test_import_without_config_uses_builtin_tokens(tmp_path):
+    env = dict(os.environ, SVG_MOCKUPS_CONFIG=str(tmp_path / "missing.js"), XDG_CACHE_HOME=str(tmp_path))
+    result = subprocess.run([sys.executable, "-c", "import generate_svg_mockups as g; print(g.BG_COLOR)"],
+                            cwd=ROOT, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == g.BG_COLOR
+    assert "using the built-in design tokens" in result.stderr
+    assert not (tmp_path / "svg_mockups").exists()
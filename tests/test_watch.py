@@ -0,0 +1,17 @@
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import generate_svg_mockups as g
+
+
+def test_reloaded_module_renders_in_spawned_workers(tmp_path):
+    module = g.load_generator_module(g.__file__)
+    module.ProcessPoolExecutor = functools.partial(ProcessPoolExecutor,
+                                                   mp_context=multiprocessing.get_context("spawn"))
+    jobs = list(module.template_jobs(str(tmp_path), [1, 6]))
+    results = list(module.run_jobs(jobs, workers=2, chunk_size=1))
+    assert [result[0] for result in results] == [1, 6]
+    for slide_num, filepath, *_ in results:
+        with open(filepath, encoding="utf-8") as f:
+            assert f.read() == g.generate_svg_mockup(slide_num)